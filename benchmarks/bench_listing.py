@@ -0,0 +1,68 @@
+"""
+Listing page parse time: the old two-BeautifulSoup-parse path vs the single lxml parse.
+
+    python benchmarks/bench_listing.py [--pages 20] [--repeat 5] [--html-dir saved/]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bs4 import BeautifulSoup
+
+from corpus import CATEGORY_URL, listing_corpus, load_dir
+from crawler.paginator import BestBuyPaginator
+
+def legacy_parse(html: str, base_url: str):
+    soup = BeautifulSoup(html, "lxml")
+    urls = []
+    for a in soup.select('a.sku-header, a[data-sku-id], div.sku-title a, a[href*=".p?skuId="]'):
+        href = a.get("href")
+        if href:
+            abs_url = urljoin(base_url, href)
+            if re.search(r"/site/.*\.p\?skuId=\d+", abs_url):
+                urls.append(abs_url)
+    urls = list(dict.fromkeys(urls))
+    soup = BeautifulSoup(html, "lxml")
+    pager = soup.select_one('nav.pagination, div.pagination, a[aria-label="Next Page"]')
+    return urls, bool(pager)
+
+def _time(fn, corpus, repeat):
+    per_page = []
+    for _ in range(repeat):
+        for url, html in corpus:
+            t0 = time.perf_counter()
+            fn(html, url)
+            per_page.append(time.perf_counter() - t0)
+    return per_page
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--html-dir", default=None, help="Directory of saved listing pages (*.html)")
+    args = ap.parse_args()
+
+    corpus = load_dir(args.html_dir) if args.html_dir else listing_corpus(args.pages)
+    paginator = BestBuyPaginator(client=None, category_url=CATEGORY_URL)
+
+    for url, html in corpus:
+        assert legacy_parse(html, url) == paginator._parse_listing(html, url), f"Mismatch on {url}"
+
+    size_kb = statistics.mean(len(h) for _, h in corpus) / 1024
+    print(f"{len(corpus)} pages, avg {size_kb:.0f} KB, repeat={args.repeat}")
+    results = {}
+    for name, fn in (("before (2x bs4)", legacy_parse), ("after (1x lxml)", paginator._parse_listing)):
+        t = _time(fn, corpus, args.repeat)
+        results[name] = statistics.median(t)
+        print(f"  {name:<18} median {results[name] * 1000:8.2f} ms/page   mean {statistics.mean(t) * 1000:8.2f} ms/page")
+    before, after = results.values()
+    print(f"  speedup x{before / after:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+normalize_product hot loop: the old per-record implementation (each price
+parsed up to four times), normalize_product (each distinct price parsed once
+per record) and normalize_products (once per batch). Outputs are checked to
+be byte-identical first.
+
+    python benchmarks/bench_normalize.py [--records 100000] [--batch 1000] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import raw_products
+from extractors.schema_normalizer import _as_float, _norm_aggregate_rating, _norm_brand, normalize_product, normalize_products
+
+def legacy_norm_offers(obj: Any) -> Dict[str, Any]:
+    if not obj:
+        return {}
+    result: Dict[str, Any] = {"priceCurrency": "USD", "seller": {"name": "Best Buy"}}
+    if isinstance(obj, dict):
+        result["priceCurrency"] = obj.get("priceCurrency") or obj.get("pricecurrency") or result["priceCurrency"]
+        seller = obj.get("seller")
+        if seller:
+            if isinstance(seller, dict):
+                result["seller"] = {"name": seller.get("name")}
+            elif isinstance(seller, str):
+                result["seller"] = {"name": seller}
+        low = _as_float(obj.get("lowPrice") or obj.get("lowprice") or obj.get("price"))
+        high = _as_float(obj.get("highPrice") or obj.get("highprice") or obj.get("price"))
+        if low is not None:
+            result["lowPrice"] = f"{low:.2f}"
+        if high is not None:
+            result["highPrice"] = f"{high:.2f}"
+        items: List[Dict[str, Any]] = []
+        raw_items = obj.get("offers") or obj.get("items") or []
+        if isinstance(raw_items, dict):
+            raw_items = [raw_items]
+        for it in raw_items:
+            if not isinstance(it, dict):
+                continue
+            item = {
+                "priceCurrency": it.get("priceCurrency") or result["priceCurrency"],
+                "price": f"{_as_float(it.get('price')):.2f}" if _as_float(it.get("price")) is not None else None,
+                "availability": it.get("availability") or it.get("availabilityStatus"),
+                "itemCondition": it.get("itemCondition"),
+                "description": it.get("description") or it.get("name"),
+            }
+            nested = it.get("offers")
+            if nested and isinstance(nested, list):
+                item["offers"] = []
+                for n in nested:
+                    if not isinstance(n, dict):
+                        continue
+                    item["offers"].append(
+                        {
+                            "priceCurrency": n.get("priceCurrency") or result["priceCurrency"],
+                            "price": f"{_as_float(n.get('price')):.2f}" if _as_float(n.get("price")) is not None else None,
+                            "itemCondition": n.get("itemCondition"),
+                            "description": n.get("description") or n.get("name"),
+                        }
+                    )
+            items.append(item)
+        if items:
+            result["offers"] = items
+            result["offercount"] = len(items)
+            prices = [_as_float(i.get("price")) for i in items if _as_float(i.get("price")) is not None]
+            if prices:
+                result["lowPrice"] = f"{min(prices):.2f}"
+                result["highPrice"] = f"{max(prices):.2f}"
+        return result
+    if isinstance(obj, list):
+        collated = {"priceCurrency": "USD", "seller": {"name": "Best Buy"}, "offers": []}
+        prices = []
+        for it in obj:
+            if isinstance(it, dict):
+                price = _as_float(it.get("price"))
+                if price is not None:
+                    prices.append(price)
+                collated["offers"].append(
+                    {
+                        "priceCurrency": it.get("priceCurrency") or "USD",
+                        "price": f"{price:.2f}" if price is not None else None,
+                        "availability": it.get("availability"),
+                        "itemCondition": it.get("itemCondition"),
+                        "description": it.get("description") or it.get("name"),
+                    }
+                )
+        if prices:
+            collated["lowPrice"] = f"{min(prices):.2f}"
+            collated["highPrice"] = f"{max(prices):.2f}"
+            collated["offercount"] = len(prices)
+        return collated
+    return {}
+
+def legacy_normalize_product(raw: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(raw, dict):
+        return {}
+    brand = _norm_brand(raw.get("brand"))
+    aggregate = _norm_aggregate_rating(raw.get("aggregateRating"))
+    offers = legacy_norm_offers(raw.get("offers"))
+    image = raw.get("image")
+    images = raw.get("images") if isinstance(raw.get("images"), list) else None
+    sku = raw.get("sku") or raw.get("skuId")
+    gtin13 = raw.get("gtin13") or raw.get("gtin") or raw.get("gtin_13")
+    model = raw.get("model") or raw.get("modelNumber")
+    doc: Dict[str, Any] = {
+        "name": raw.get("name"),
+        "image": image,
+        "url": raw.get("url"),
+        "description": raw.get("description"),
+        "sku": str(sku) if sku is not None else None,
+        "gtin13": str(gtin13) if gtin13 is not None else None,
+        "model": str(model) if model is not None else None,
+        "color": raw.get("color"),
+        "brand": brand if brand else None,
+        "aggregateRating": aggregate if aggregate else None,
+        "offers": offers if offers else None,
+        "images": images or ([image] if image else None),
+    }
+    return {k: v for k, v in doc.items() if v not in (None, "", [], {})}
+
+def _dumps(docs: List[Dict[str, Any]]) -> bytes:
+    return "\n".join(json.dumps(d, ensure_ascii=False) for d in docs).encode("utf-8")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=1000, help="Records per normalize_products call")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    corpus = raw_products(args.records)
+    batches = [corpus[i : i + args.batch] for i in range(0, len(corpus), args.batch)]
+
+    legacy = [legacy_normalize_product(r) for r in corpus]
+    assert _dumps(legacy) == _dumps([normalize_product(r) for r in corpus]), "normalize_product output changed"
+    assert _dumps(legacy) == _dumps([d for b in batches for d in normalize_products(b)]), "normalize_products output changed"
+
+    nested = sum(len(o.get("offers") or []) for r in corpus if isinstance(r["offers"], dict) for o in r["offers"]["offers"])
+    print(f"{len(corpus)} raw records, {nested} nested carrier offers, batch={args.batch}, repeat={args.repeat}")
+    runs = (
+        ("before (per record)", lambda: [legacy_normalize_product(r) for r in corpus]),
+        ("normalize_product", lambda: [normalize_product(r) for r in corpus]),
+        ("normalize_products", lambda: [d for b in batches for d in normalize_products(b)]),
+    )
+    results = {}
+    for name, fn in runs:
+        times = []
+        for _ in range(args.repeat):
+            gc.collect()
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        results[name] = statistics.median(times)
+        print(f"  {name:<20} {results[name]:7.3f} s   {len(corpus) / results[name]:10,.0f} records/s")
+    before = results["before (per record)"]
+    print(f"  speedup x{before / results['normalize_product']:.2f} (per record), x{before / results['normalize_products']:.2f} (batched)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Parse + normalize throughput: in-process vs ParsePool worker processes.
+
+    python benchmarks/bench_parse_pool.py [--pages 64] [--workers 4] [--chunksize 8] [--html-dir saved/]
+
+Synthetic pages omit the JSON-LD image/description by default so every page
+takes the full DOM fallback; pass --complete to measure the JSON-LD fast path.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import load_dir, pdp_corpus
+from extractors.parse_pool import ParsePool, parse_and_normalize
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunksize", type=int, default=8)
+    ap.add_argument("--complete", action="store_true", help="Generate pages whose JSON-LD is complete")
+    ap.add_argument("--html-dir", default=None, help="Directory of saved PDP pages (*.html)")
+    args = ap.parse_args()
+
+    corpus = load_dir(args.html_dir) if args.html_dir else pdp_corpus(args.pages, complete=args.complete)
+    payload = [(url, url, html.encode("utf-8")) for url, html in corpus]
+    mb = sum(len(b) for _, _, b in payload) / 1e6
+    print(f"{len(payload)} pages, {mb:.1f} MB total")
+
+    t0 = time.perf_counter()
+    serial = [parse_and_normalize(body, url) for _, url, body in payload]
+    serial_s = time.perf_counter() - t0
+    print(f"  in-process            {len(payload) / serial_s:8.1f} pages/s")
+
+    with ParsePool(workers=args.workers, chunksize=args.chunksize) as pool:
+        t0 = time.perf_counter()
+        pooled = [doc for _, doc, _ in pool.imap(payload)]
+        pool_s = time.perf_counter() - t0
+    print(f"  ParsePool(workers={args.workers}) {len(payload) / pool_s:8.1f} pages/s   x{serial_s / pool_s:.1f}")
+    assert pooled == serial, "pool output differs from in-process output"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Price history lookups at scale: fills a store with `--skus` x `--runs`
+observations, then times latest / at-time-T lookups and the drops query.
+
+    python benchmarks/bench_price_history.py [--skus 50000] [--runs 20] [--lookups 20000] [--db /tmp/prices.sqlite]
+
+The default builds one million observations in a temporary directory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from outputs.price_history import PriceHistory
+
+def _doc(sku: str, price: float):
+    low = f"{price:.2f}"
+    return {
+        "sku": sku,
+        "offers": {
+            "priceCurrency": "USD",
+            "lowPrice": low,
+            "highPrice": f"{price * 1.2:.2f}",
+            "offers": [{"price": f"{price * 1.2:.2f}", "availability": "InStock", "itemCondition": "NewCondition", "description": "New"}],
+        },
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--skus", type=int, default=50_000)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--lookups", type=int, default=20_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--db", default=None, help="Database path (default: a temporary file)")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = os.path.join(tmp.name, "prices.sqlite")
+    store = PriceHistory(args.db, commit_every=50_000)
+    skus = [str(6_000_000 + i) for i in range(args.skus)]
+    prices = {sku: rng.uniform(20, 2000) for sku in skus}
+
+    t0 = time.perf_counter()
+    day = 86400.0
+    for run in range(args.runs):
+        run_id = store.start_run("bench", started_at=run * day)
+        for i, sku in enumerate(skus):
+            prices[sku] *= rng.choice((1.0, 1.0, 1.0, 0.9, 0.95, 1.05))
+            store.record(_doc(sku, prices[sku]), run_id, ts=run * day + i * 0.001)
+    store.commit()
+    load_s = time.perf_counter() - t0
+    n = args.skus * args.runs
+    print(f"{n:,} observations written in {load_s:.1f} s ({n / load_s:,.0f}/s), {os.path.getsize(args.db) / 1e6:.0f} MB")
+
+    sample = [rng.choice(skus) for _ in range(args.lookups)]
+    for name, fn in (
+        ("latest", lambda sku: store.latest(sku)),
+        ("at", lambda sku: store.at(sku, rng.uniform(0, args.runs * day))),
+    ):
+        t0 = time.perf_counter()
+        for sku in sample:
+            assert fn(sku) is not None or name == "at"
+        per = (time.perf_counter() - t0) / len(sample)
+        print(f"  {name:<8} {per * 1e6:8.1f} µs per lookup")
+
+    t0 = time.perf_counter()
+    drops = store.drops(limit=20)
+    print(f"  drops    {(time.perf_counter() - t0) * 1000:8.1f} ms for the last run ({args.skus:,} SKUs), top drop {drops[0].percent if drops else 0}%")
+    store.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
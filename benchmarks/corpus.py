@@ -0,0 +1,177 @@
+"""
+Synthetic BestBuy-like HTML (and raw product dicts) used by the offline benchmarks.
+
+Pages are generated deterministically from a seed so runs are comparable.
+A directory of saved pages can be used instead via `load_dir`.
+"""
+import glob
+import json
+import os
+import random
+from typing import Any, Dict, Iterable, List, Tuple
+from urllib.parse import quote, unquote
+
+CATEGORY_URL = "https://www.bestbuy.com/site/all-laptops/pc-laptops/abcat0502000.c?id=abcat0502000"
+
+def _noise(rng: random.Random, blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        words = " ".join(rng.choice(("deal", "laptop", "save", "open-box", "member", "price", "shop")) for _ in range(12))
+        parts.append(
+            f'<div class="c-section-{i}" data-track="nav-{i}"><ul class="menu">'
+            f'<li><a href="/site/misc/{i}.c?id={i}">{words}</a></li><li><span>{words}</span></li></ul></div>'
+        )
+    return "".join(parts)
+
+def listing_html(page: int, pages: int = 5, cards: int = 24, seed: int = 0) -> str:
+    rng = random.Random(seed * 1000 + page)
+    items = []
+    for i in range(cards):
+        sku = 6000000 + page * 1000 + i
+        price = rng.randint(99, 2499) + 0.99
+        items.append(
+            f'<li class="sku-item" data-sku-id="{sku}"><div class="shop-sku-list-item">'
+            f'<a class="image-link" href="/site/laptop-{sku}/{sku}.p?skuId={sku}">'
+            f'<img class="product-image" src="https://pisces.bbystatic.com/image2/BestBuy_US/images/products/{sku // 1000}/{sku}_sd.jpg" alt="Laptop {sku}"></a>'
+            f'<h4 class="sku-title"><a class="sku-header" href="/site/laptop-{sku}/{sku}.p?skuId={sku}">Acme - Laptop {sku} 16GB Memory</a></h4>'
+            f'<div class="sku-model"><span class="sku-value">{sku}</span></div>'
+            f'<div class="c-ratings-reviews"><p class="visually-hidden">Rating {rng.randint(30, 50) / 10} out of 5 stars with {rng.randint(1, 900)} reviews</p></div>'
+            f'<div class="priceView-hero-price priceView-customer-price"><span aria-hidden="true">${price:,.2f}</span></div>'
+            f"{_noise(rng, 6)}</div></li>"
+        )
+    pager = '<nav class="pagination"><a aria-label="Next Page" href="?page=%d">Next</a></nav>' % (page + 1) if page < pages else ""
+    return (
+        "<!DOCTYPE html><html><head><title>Laptops</title>"
+        f"<script>window.__STATE__ = {json.dumps({'page': page, 'blob': 'x' * 2000})};</script></head>"
+        f"<body><header>{_noise(rng, 80)}</header><main><ol class=\"sku-item-list\">{''.join(items)}</ol>{pager}</main>"
+        f"<footer>{_noise(rng, 80)}</footer></body></html>"
+    )
+
+def pdp_html(sku: int, seed: int = 0, noise_blocks: int = 1500, complete: bool = True) -> str:
+    """A product page of roughly 1 MB with a JSON-LD Product block and a gallery."""
+    rng = random.Random(seed * 7919 + sku)
+    new_price = rng.randint(199, 1999) + 0.99
+    offers = [
+        {"@type": "Offer", "priceCurrency": "USD", "price": f"{new_price:.2f}", "availability": "http://schema.org/InStock",
+         "itemCondition": "http://schema.org/NewCondition", "description": "New",
+         "offers": [{"priceCurrency": "USD", "price": f"{new_price - rng.randint(0, 100):.2f}", "itemCondition": "NewCondition",
+                     "description": f"FULL_SRP {carrier} Unlocked Upgrade"} for carrier in ("SPR", "TMO", "VZW", "ATT")]},
+    ] + [
+        {"@type": "Offer", "priceCurrency": "USD", "price": f"{new_price * ratio:.2f}", "itemCondition": "http://schema.org/UsedCondition",
+         "description": label}
+        for label, ratio in (("Open-Box Excellent", 0.85), ("Open-Box Satisfactory", 0.8), ("Open-Box Fair", 0.75))
+    ]
+    ld = {
+        "@context": "http://schema.org/",
+        "@type": "Product",
+        "name": f"Acme - Phone {sku} 128GB (Unlocked) - Black",
+        "sku": str(sku),
+        "gtin13": f"0887276{sku:06d}"[:13],
+        "model": f"SM-{sku}",
+        "color": "Black",
+        "brand": {"@type": "Brand", "name": "Acme"},
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": f"{rng.randint(30, 50) / 10}", "reviewCount": str(rng.randint(1, 900))},
+        "offers": {"@type": "AggregateOffer", "priceCurrency": "USD", "lowPrice": "1.00", "highPrice": "2.00", "offers": offers},
+    }
+    if complete:
+        ld["image"] = f"https://pisces.bbystatic.com/image2/BestBuy_US/images/products/{sku // 1000}/{sku}_sd.jpg"
+        ld["description"] = f"Shop Acme Phone {sku} at Best Buy."
+    gallery = "".join(
+        f'<img class="thumb" src="https://pisces.bbystatic.com/image2/BestBuy_US/images/products/{sku // 1000}/{sku}cv1{i}d.jpg">'
+        for i in range(7)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Phone</title>"
+        f'<meta name="description" content="Shop Acme Phone {sku} at Best Buy.">'
+        f'<script type="application/ld+json">{json.dumps(ld)}</script></head>'
+        f'<body><header>{_noise(rng, noise_blocks // 3)}</header><main><div class="sku-title"><h1>{ld["name"]}</h1></div>'
+        f'<div class="shop-media-gallery">{gallery}</div>{_noise(rng, noise_blocks)}</main></body></html>'
+    )
+
+def pdp_corpus(pages: int = 20, seed: int = 0, **kwargs) -> List[Tuple[str, str]]:
+    """Return `(product_url, html)` pairs."""
+    out = []
+    for i in range(pages):
+        sku = 6400000 + i
+        out.append((f"https://www.bestbuy.com/site/acme-phone-{sku}/{sku}.p?skuId={sku}", pdp_html(sku, seed=seed, **kwargs)))
+    return out
+
+def listing_corpus(pages: int = 20, seed: int = 0) -> List[Tuple[str, str]]:
+    """Return `(page_url, html)` pairs."""
+    out = []
+    for page in range(1, pages + 1):
+        out.append((f"{CATEGORY_URL}&page={page}", listing_html(page, pages=pages, seed=seed)))
+    return out
+
+# Retail price points (…9.99 / …9.00); real listings cluster on a few hundred of them.
+_PRICE_POINTS = [p + c for p in range(9, 2000, 10) for c in (0.99, 0.0)]
+
+def _raw_price(rng: random.Random, value: float = None) -> Any:
+    if value is None:
+        value = rng.choice(_PRICE_POINTS)
+    kind = rng.random()
+    if kind < 0.6:
+        return f"{value:.2f}"
+    if kind < 0.75:
+        return f"{value:,.2f}"
+    if kind < 0.9:
+        return value
+    return rng.choice((None, "", "N/A", int(value)))
+
+def raw_products(n: int = 100_000, seed: int = 0, max_carrier_offers: int = 36) -> List[Dict[str, Any]]:
+    """
+    Raw product dicts as produced by parse_product_from_html. About a third
+    are phones whose offers carry up to `max_carrier_offers` carrier/plan
+    breakdowns (monthly installments of the base price); prices mix strings,
+    thousands separators, numbers and junk.
+    """
+    rng = random.Random(seed)
+    carriers = ("AT&T", "Verizon", "T-Mobile", "Unlocked", "Boost")
+    out = []
+    for i in range(n):
+        sku = 6400000 + i
+        base = rng.choice(_PRICE_POINTS)
+        offers: List[Dict[str, Any]] = [
+            {"priceCurrency": "USD", "price": _raw_price(rng, base), "itemCondition": "NewCondition", "description": "New"}
+        ]
+        for cond in ("Open-Box Excellent", "Open-Box Good")[: rng.randint(0, 2)]:
+            offers.append({"price": _raw_price(rng), "itemCondition": "UsedCondition", "name": cond})
+        if rng.random() < 0.35:
+            offers[0]["offers"] = [
+                {"price": _raw_price(rng, round(base / m, 2)), "description": f"{rng.choice(carriers)} {m}-month plan"}
+                for m in rng.sample((1, 12, 18, 24, 30, 36) * 6, rng.randint(4, max_carrier_offers))
+            ]
+        raw_offers: Any = {"priceCurrency": "USD", "lowPrice": _raw_price(rng), "highPrice": _raw_price(rng), "offers": offers}
+        if rng.random() < 0.05:
+            raw_offers = offers
+        out.append(
+            {
+                "name": f"Acme Device {sku}",
+                "url": f"https://www.bestbuy.com/site/acme-device-{sku}/{sku}.p?skuId={sku}",
+                "sku": str(sku),
+                "image": f"https://pisces.bbystatic.com/{sku}_sd.jpg",
+                "brand": {"name": "Acme"},
+                "aggregateRating": {"ratingValue": round(rng.uniform(1, 5), 1), "reviewCount": rng.randint(0, 5000)},
+                "offers": raw_offers,
+                "images": [f"https://pisces.bbystatic.com/{sku}_{k}.jpg" for k in range(rng.randint(0, 6))],
+            }
+        )
+    return out
+
+def load_dir(path: str, pattern: str = "*.html") -> List[Tuple[str, str]]:
+    """Load saved pages; the (URL-unquoted) file name without extension is used as the URL."""
+    out = []
+    for fp in sorted(glob.glob(os.path.join(path, pattern))):
+        with open(fp, "r", encoding="utf-8", errors="replace") as f:
+            out.append((unquote(os.path.splitext(os.path.basename(fp))[0]), f.read()))
+    return out
+
+def save_dir(pages: Iterable[Tuple[str, str]], path: str) -> int:
+    """Write `(url, html)` pairs as a fixture directory readable by `load_dir`."""
+    os.makedirs(path, exist_ok=True)
+    count = 0
+    for url, html in pages:
+        with open(os.path.join(path, quote(url, safe="") + ".html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        count += 1
+    return count
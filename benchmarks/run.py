@@ -0,0 +1,196 @@
+"""
+Offline benchmark suite: replays a listing + PDP corpus through the paginator,
+parser and normalizer without touching the network.
+
+    python benchmarks/run.py [--listing-pages 20] [--pdp-pages 40] [--repeat 3]
+                             [--html-dir fixtures/] [--save-corpus fixtures/]
+                             [--out results.json] [--compare baseline.json]
+
+Each stage reports pages/sec, p50/p99 latency and the process's peak RSS
+after the stage. Import time of the runner entry points (bare startup,
+--list-urls discovery and a full crawl) is measured in fresh interpreters.
+Results are written as JSON (default benchmarks/results/<timestamp>.json)
+so runs can be compared with --compare.
+`--html-dir` expects `listing/` and `pdp/` subdirectories of saved pages,
+as written by --save-corpus.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from corpus import CATEGORY_URL, listing_corpus, load_dir, pdp_corpus, save_dir
+from crawler.paginator import BestBuyPaginator
+from extractors.product_parser import parse_product_from_html
+from extractors.schema_normalizer import normalize_product
+
+RESULTS_VERSION = 1
+
+# What each entry point has imported by the time it starts working.
+IMPORT_TARGETS = {
+    "runner": "runner",
+    "discovery": "runner, crawler.paginator",
+    "crawl": "runner, crawler.paginator, crawler.prefetch, crawler.workers, extractors.rules, "
+    "extractors.product_parser, extractors.schema_normalizer, outputs.writer_jsonl",
+}
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(round(q / 100.0 * len(sorted_values) + 0.5))))
+    return sorted_values[rank - 1]
+
+def run_stage(name: str, fn: Callable[[Any, str], Any], items: List[Tuple[str, Any]], repeat: int, size_of=len) -> Dict[str, Any]:
+    """Time `fn(payload, url)` for every item, `repeat` times over."""
+    latencies: List[float] = []
+    total = 0.0
+    for _ in range(repeat):
+        for url, payload in items:
+            t0 = time.perf_counter()
+            fn(payload, url)
+            dt = time.perf_counter() - t0
+            latencies.append(dt)
+            total += dt
+    latencies.sort()
+    result = {
+        "items": len(latencies),
+        "pagesPerSec": round(len(latencies) / total, 2) if total else None,
+        "p50Ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99Ms": round(_percentile(latencies, 99) * 1000, 3),
+        "meanMs": round(total / max(1, len(latencies)) * 1000, 3),
+        "inputMb": round(sum(size_of(p) for _, p in items) / 1e6, 2),
+        "peakRssMb": peak_rss_mb(),
+    }
+    print(
+        f"  {name:<18} {result['pagesPerSec'] or 0:10.1f} pages/s   p50 {result['p50Ms']:8.2f} ms"
+        f"   p99 {result['p99Ms']:8.2f} ms   peak RSS {result['peakRssMb']} MB"
+    )
+    return result
+
+def import_times(repeat: int = 5) -> Dict[str, float]:
+    """Median milliseconds to import each IMPORT_TARGETS entry in a fresh interpreter."""
+    src = os.path.join(HERE, "..", "src")
+    out: Dict[str, float] = {}
+    for name, modules in IMPORT_TARGETS.items():
+        code = f"import time; t0 = time.perf_counter(); import {modules}; print(time.perf_counter() - t0)"
+        samples = sorted(
+            float(subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True).stdout)
+            for _ in range(repeat)
+        )
+        out[name] = round(samples[len(samples) // 2] * 1000, 1)
+    print("  imports            " + "   ".join(f"{name} {ms:.1f} ms" for name, ms in out.items()))
+    return out
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Compared with {baseline_path} ({baseline.get('commit') or 'unknown commit'}):")
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base.get("pagesPerSec") or not cur.get("pagesPerSec"):
+            continue
+        ratio = cur["pagesPerSec"] / base["pagesPerSec"]
+        print(f"  {name:<18} x{ratio:5.2f} throughput   p99 {base['p99Ms']:.2f} → {cur['p99Ms']:.2f} ms")
+    for name, ms in current.get("importMs", {}).items():
+        base_ms = baseline.get("importMs", {}).get(name)
+        if base_ms is not None:
+            print(f"  import {name:<11} {base_ms:.1f} → {ms:.1f} ms")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--listing-pages", type=int, default=20)
+    ap.add_argument("--pdp-pages", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--html-dir", default=None, help="Saved corpus with listing/ and pdp/ subdirectories")
+    ap.add_argument("--save-corpus", default=None, help="Write the synthetic corpus to this directory and exit")
+    ap.add_argument("--out", default=None, help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    ap.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    if args.html_dir:
+        listings = load_dir(os.path.join(args.html_dir, "listing"))
+        pdps = load_dir(os.path.join(args.html_dir, "pdp"))
+        pdps_fallback: List[Tuple[str, str]] = []
+    else:
+        listings = listing_corpus(args.listing_pages, seed=args.seed)
+        pdps = pdp_corpus(args.pdp_pages, seed=args.seed)
+        # Incomplete JSON-LD forces the DOM fallback, the slow path.
+        pdps_fallback = pdp_corpus(max(1, args.pdp_pages // 4), seed=args.seed, complete=False)
+    if args.save_corpus:
+        n = save_dir(listings, os.path.join(args.save_corpus, "listing"))
+        n += save_dir(pdps + pdps_fallback, os.path.join(args.save_corpus, "pdp"))
+        print(f"Wrote {n} pages to {args.save_corpus}")
+        return
+
+    paginator = BestBuyPaginator(client=None, category_url=CATEGORY_URL)
+    raws = [(url, parse_product_from_html(html, url=url)) for url, html in pdps + pdps_fallback]
+    size_of_raw = lambda raw: len(json.dumps(raw))
+
+    print(f"{len(listings)} listing pages, {len(pdps)} PDPs (+{len(pdps_fallback)} DOM-fallback), repeat={args.repeat}")
+    stages: Dict[str, Dict[str, Any]] = {}
+    stages["listing"] = run_stage("listing", lambda html, url: paginator._extract_product_urls(html, url), listings, args.repeat)
+    stages["listing_cards"] = run_stage("listing_cards", lambda html, url: paginator._parse_cards(html, url), listings, args.repeat)
+    stages["pdp_parse"] = run_stage("pdp_parse", lambda html, url: parse_product_from_html(html, url=url), pdps, args.repeat)
+    if pdps_fallback:
+        stages["pdp_parse_fallback"] = run_stage(
+            "pdp_parse_fallback", lambda html, url: parse_product_from_html(html, url=url), pdps_fallback, args.repeat
+        )
+    stages["normalize"] = run_stage("normalize", lambda raw, url: normalize_product(raw), raws, args.repeat * 20, size_of=size_of_raw)
+    import_ms = import_times()
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "source": args.html_dir or "synthetic",
+            "seed": None if args.html_dir else args.seed,
+            "listingPages": len(listings),
+            "pdpPages": len(pdps),
+            "pdpFallbackPages": len(pdps_fallback),
+        },
+        "repeat": args.repeat,
+        "stages": stages,
+        "importMs": import_ms,
+        "peakRssMb": peak_rss_mb(),
+    }
+    out = args.out or os.path.join(HERE, "results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
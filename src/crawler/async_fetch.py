@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+from telemetry.metrics import METRICS
+
+from .cache import CacheMiss, ResponseCache
+from .fetch import STREAM_CHUNK_BYTES
+from .proxy_pool import ProxyPool
+from .rate_limiter import TokenBucket
+from .throttle import AdaptiveThrottle, parse_retry_after, retry_delay
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+async def aread_body(resp: "httpx.Response", max_bytes: Optional[int] = None, stop: Optional[Callable[[bytearray], bool]] = None) -> bool:
+    """httpx counterpart of fetch.read_body for a response sent with `stream=True`."""
+    buf = bytearray()
+    truncated = False
+    try:
+        async for chunk in resp.aiter_bytes(STREAM_CHUNK_BYTES):
+            buf += chunk
+            if max_bytes and len(buf) >= max_bytes:
+                del buf[max_bytes:]
+                truncated = True
+                break
+            if stop is not None and stop(buf):
+                truncated = True
+                break
+    finally:
+        await resp.aclose()
+    resp._content = bytes(buf)
+    return truncated
+
+class AsyncHttpClient:
+    """
+    asyncio/httpx backend with the same `get()` contract as HttpClient.
+
+    Each proxy gets its own httpx.AsyncClient, i.e. its own keep-alive
+    connection pool (HTTP/2 when `h2` is installed). Requests rotate across the
+    whole ProxyPool. The event loop runs on a background thread so the
+    blocking `get()` can be called from the existing fetch workers; coroutine
+    callers can use `aget()` directly.
+    """
+
+    def __init__(
+        self,
+        default_headers: Optional[Dict[str, str]] = None,
+        proxies: Optional[Dict[str, str]] = None,
+        timeout: int = 30,
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[ResponseCache] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        throttle: Optional[AdaptiveThrottle] = None,
+        max_connections_per_proxy: int = 20,
+        http2: bool = True,
+    ):
+        if httpx is None:
+            raise ImportError("AsyncHttpClient requires httpx: pip install 'httpx[http2]'")
+        self.default_headers = default_headers or {}
+        self.proxies = proxies
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.proxy_pool = proxy_pool
+        self.throttle = throttle
+        self.max_connections_per_proxy = max_connections_per_proxy
+        self.http2 = http2 and _HAS_H2
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _client_for(self, proxy_url: Optional[str]) -> "httpx.AsyncClient":
+        key = proxy_url or ""
+        client = self._clients.get(key)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections_per_proxy,
+                max_keepalive_connections=self.max_connections_per_proxy,
+            )
+            client = httpx.AsyncClient(
+                headers=self.default_headers,
+                proxy=proxy_url or None,
+                timeout=self.timeout,
+                follow_redirects=True,
+                http2=self.http2,
+                limits=limits,
+            )
+            self._clients[key] = client
+        return client
+
+    async def aget(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 3,
+        backoff: float = 0.8,
+        max_bytes: Optional[int] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ):
+        cached = None
+        if self.cache:
+            cached = self.cache.lookup(url)
+            if cached and self.cache.is_fresh(cached):
+                METRICS.inc("http_cache_total", result="hit")
+                return self.cache.to_response(cached)
+            if self.cache.offline:
+                raise CacheMiss(f"Offline mode: {url} is not cached")
+        last_exc = None
+        throttle = self.throttle
+        metrics = METRICS
+        stream = bool(max_bytes) or stop is not None
+        for attempt in range(1, retries + 1):
+            if attempt > 1:
+                metrics.inc("http_retries_total")
+                if throttle:
+                    throttle.on_retry()
+            proxy = None
+            t0 = None
+            try:
+                h = dict(headers or {})
+                if cached:
+                    h.update(self.cache.revalidation_headers(cached))
+                if self.rate_limiter:
+                    wait = self.rate_limiter.reserve()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+                proxy_url = proxy.url if proxy else (self.proxies or {}).get("https")
+                if metrics.enabled:
+                    t0 = time.perf_counter()
+                client = self._client_for(proxy_url)
+                truncated = False
+                if stream:
+                    resp = await client.send(client.build_request("GET", url, headers=h), stream=True)
+                    if resp.status_code == 200:
+                        truncated = await aread_body(resp, max_bytes, stop)
+                    else:
+                        await resp.aread()
+                else:
+                    resp = await client.get(url, headers=h)
+                if metrics.enabled:
+                    metrics.observe("http_request_seconds", time.perf_counter() - t0, status=resp.status_code)
+                    metrics.inc("http_response_bytes_total", len(resp.content))
+                    t0 = None
+                if resp.status_code in (403, 429):
+                    # Backoff for anti-bot triggers
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if proxy:
+                        self.proxy_pool.report(proxy, blocked=True, retry_after=retry_after)
+                    if throttle:
+                        throttle.on_block(None if self.proxy_pool and len(self.proxy_pool) > 1 else retry_after)
+                    logging.warning("Received %s for %s. Backing off.", resp.status_code, url)
+                    await asyncio.sleep(retry_delay(attempt, backoff, throttle, retry_after))
+                    continue
+                if resp.status_code >= 500:
+                    # A proxy that keeps answering 5xx is benched like one that errors out.
+                    if proxy:
+                        self.proxy_pool.report(proxy, error=True)
+                    raise requests.HTTPError(f"Server error {resp.status_code}")
+                if proxy:
+                    self.proxy_pool.report(proxy)
+                if resp.status_code == 304 and cached:
+                    metrics.inc("http_cache_total", result="revalidated")
+                    self.cache.refresh(cached)
+                    return self.cache.to_response(cached)
+                if throttle:
+                    throttle.on_success()
+                if self.cache:
+                    metrics.inc("http_cache_total", result="miss")
+                    if not truncated:
+                        self.cache.store(url, resp)
+                return resp
+            except Exception as e:
+                last_exc = e
+                if t0 is not None and not isinstance(e, requests.HTTPError):
+                    metrics.observe("http_request_seconds", time.perf_counter() - t0, status="error")
+                if proxy and not isinstance(e, requests.HTTPError):
+                    self.proxy_pool.report(proxy, error=True)
+                logging.warning("GET attempt %d failed for %s: %s", attempt, url, e)
+                await asyncio.sleep(retry_delay(attempt, backoff, throttle))
+        if isinstance(last_exc, requests.HTTPError):
+            raise last_exc
+        raise RuntimeError(f"Failed to fetch {url}: {last_exc}")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="async-http", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 3,
+        backoff: float = 0.8,
+        max_bytes: Optional[int] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ):
+        """Blocking wrapper around `aget()` for thread-based callers."""
+        loop = self._ensure_loop()
+        coro = self.aget(url, headers=headers, retries=retries, backoff=backoff, max_bytes=max_bytes, stop=stop)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    def close(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a URL has never been cached."""
+
+class CachedResponse:
+    __slots__ = ("url", "status", "headers", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, url, status, headers, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache keyed by URL, stored in SQLite.
+
+    Bodies are zlib-compressed. Entries younger than `ttl_s` are served
+    without touching the network; older ones are revalidated with
+    If-None-Match / If-Modified-Since. When the stored size exceeds
+    `max_bytes` the least recently used entries are evicted. In `offline`
+    mode every cached entry is served regardless of age and misses raise
+    CacheMiss.
+    """
+
+    def __init__(self, cache_dir: str, ttl_s: float = 6 * 3600, max_bytes: int = 2 * 1024 ** 3, offline: bool = False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "http_cache.sqlite")
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        status, headers, body, etag, last_modified, fetched_at = row
+        return CachedResponse(url, status, json.loads(headers), zlib.decompress(body), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return self.offline or (time.time() - entry.fetched_at) < self.ttl_s
+
+    def revalidation_headers(self, entry: CachedResponse) -> Dict[str, str]:
+        h = {}
+        if entry.etag:
+            h["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            h["If-Modified-Since"] = entry.last_modified
+        return h
+
+    def refresh(self, entry: CachedResponse):
+        """Mark an entry as fresh again after a 304 Not Modified."""
+        now = time.time()
+        entry.fetched_at = now
+        with self._lock:
+            self._db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, entry.url))
+
+    def store(self, url: str, resp: requests.Response):
+        if resp.status_code != 200:
+            return
+        body = zlib.compress(resp.content, 6)
+        # The body is stored decoded, so transport framing headers no longer apply.
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in _HOP_HEADERS}
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body, etag, last_modified, fetched_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, resp.status_code, json.dumps(headers), body, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), now, now, len(body)),
+            )
+            self._total += len(body) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until we are 10% under the cap.
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._total > target:
+            rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 256").fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self._total <= target:
+                    break
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total -= size
+                evicted += 1
+        logging.debug("Response cache evicted %d entries (%d bytes stored).", evicted, self._total)
+
+    def to_response(self, entry: CachedResponse) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry.status
+        resp.headers = CaseInsensitiveDict(entry.headers)
+        resp._content = entry.body
+        resp.url = entry.url
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.reason = "OK (cached)"
+        return resp
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,142 @@
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional, Set
+
+SEEN_VERSION = 1
+
+_SKU_ID_RE = re.compile(r"skuId=(\d+)")
+
+def sku_key(url: str) -> str:
+    """De-duplication key for a PDP URL: its skuId, ignoring tracking params (the URL itself if it has none)."""
+    m = _SKU_ID_RE.search(url)
+    return m.group(1) if m else url
+
+def _as_int(key: str) -> Optional[int]:
+    # Only canonical decimal SKUs are packed into ints, so "0123" and "123" stay distinct.
+    if key.isascii() and key.isdigit() and (key == "0" or key[0] != "0"):
+        return int(key)
+    return None
+
+class SkuSeenSet:
+    """
+    Compact set of SKUs already crawled.
+
+    By default it is exact: numeric SKUs are stored as ints (anything else as
+    strings). With `bloom_capacity` it becomes a fixed-size Bloom filter sized
+    for that many SKUs at `error_rate` false positives (~1.8 MB for a million
+    SKUs at 0.1%), i.e. a small fraction of SKUs may be skipped by mistake but
+    memory stays flat. Thread-safe; `save()`/`load()` persist it between runs.
+    """
+
+    def __init__(self, bloom_capacity: int = 0, error_rate: float = 0.001):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._ints: Set[int] = set()
+        self._strs: Set[str] = set()
+        self._bits: Optional[bytearray] = None
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        if bloom_capacity > 0:
+            if not 0 < error_rate < 1:
+                raise ValueError("error_rate must be between 0 and 1")
+            self._m = max(8, int(math.ceil(-bloom_capacity * math.log(error_rate) / (math.log(2) ** 2))))
+            self._k = max(1, int(round(self._m / bloom_capacity * math.log(2))))
+            self._bits = bytearray((self._m + 7) // 8)
+
+    @property
+    def is_bloom(self) -> bool:
+        return self._bits is not None
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._m for i in range(self._k)]
+
+    def _contains(self, key: str) -> bool:
+        if self._bits is not None:
+            bits = self._bits
+            return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+        num = _as_int(key)
+        return num in self._ints if num is not None else key in self._strs
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._contains(key)
+
+    def add(self, key: str) -> bool:
+        """Add `key`; returns False if it was (probably, for a Bloom filter) already present."""
+        with self._lock:
+            if self._contains(key):
+                return False
+            if self._bits is not None:
+                for p in self._positions(key):
+                    self._bits[p >> 3] |= 1 << (p & 7)
+            else:
+                num = _as_int(key)
+                if num is not None:
+                    self._ints.add(num)
+                else:
+                    self._strs.add(key)
+            self._count += 1
+            return True
+
+    def update(self, keys: Iterable[str]):
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data: Dict[str, Any] = {"version": SEEN_VERSION, "count": self._count}
+            if self._bits is not None:
+                data.update(
+                    kind="bloom",
+                    capacity=self.bloom_capacity,
+                    errorRate=self.error_rate,
+                    bits=base64.b64encode(zlib.compress(bytes(self._bits))).decode("ascii"),
+                )
+            else:
+                data.update(kind="exact", ints=sorted(self._ints), keys=sorted(self._strs))
+            return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SkuSeenSet":
+        if data.get("version") != SEEN_VERSION:
+            raise ValueError(f"Unsupported seen-set version {data.get('version')!r}")
+        if data.get("kind") == "bloom":
+            seen = cls(bloom_capacity=int(data["capacity"]), error_rate=float(data["errorRate"]))
+            bits = zlib.decompress(base64.b64decode(data["bits"]))
+            if len(bits) != len(seen._bits):
+                raise ValueError("Corrupt seen-set: Bloom filter size mismatch")
+            seen._bits[:] = bits
+        else:
+            seen = cls()
+            seen._ints = set(data.get("ints", []))
+            seen._strs = set(data.get("keys", []))
+        seen._count = int(data.get("count", 0))
+        return seen
+
+    @classmethod
+    def load(cls, path: str, bloom_capacity: int = 0, error_rate: float = 0.001) -> "SkuSeenSet":
+        """Load a saved set, or start an empty one if `path` does not exist yet."""
+        if not os.path.exists(path):
+            return cls(bloom_capacity=bloom_capacity, error_rate=error_rate)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str):
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, path)
@@ -0,0 +1,152 @@
+import logging
+import os
+import socket
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from outputs.dataset_adapter import ensure_parent_dir, open_writer
+from telemetry.metrics import METRICS
+
+from .session import CrawlSession, iter_product_urls, iter_scraped, state_key
+
+if TYPE_CHECKING:
+    from .jobqueue import JobQueue
+
+# URLs pushed to the job queue per transaction while the listing is walked (about one listing page).
+QUEUE_PUSH_BATCH = 24
+
+def run_coordinator(session: CrawlSession, settings: Dict, queue: "JobQueue", output_path: str, resume: bool = False) -> bool:
+    """
+    Distributed mode, coordinator side: walk the listing into `queue` and
+    write the documents workers send back, as the only writer of
+    `output_path`. Results are acknowledged together with the output's byte
+    offset once the writer has flushed them; a restarted coordinator
+    (--resume) cuts the output back to that offset, so results written but not
+    acknowledged are delivered again instead of twice. The output must be
+    uncompressed JSONL (see runner.main). Returns True when every queued URL is done.
+    """
+    from .paginator import BestBuyPaginator
+
+    category_url = settings["categoryUrl"]
+    tag = settings.get("tag")
+    seen = session.seen
+    session.start_price_run(category_url)
+    poll_s = float(settings.get("queuePollS", 1.0))
+    paginator = BestBuyPaginator(client=session.client, category_url=category_url, country=session.country)
+    ensure_parent_dir(output_path)
+    if resume:
+        # Nothing acknowledged yet means nothing in the output is kept.
+        writer = open_writer(
+            output_path, session.output_format, append=True, truncate_at=queue.output_offset() or 0, **session.writer_opts
+        )
+    else:
+        writer = open_writer(output_path, session.output_format, **session.writer_opts)
+    written = 0
+    failed = 0
+    unacked: Optional[int] = None
+
+    def ack():
+        nonlocal unacked
+        if unacked is not None:
+            queue.ack_results(unacked, output_offset=writer.tell())
+            unacked = None
+
+    def drain() -> int:
+        nonlocal written, failed, unacked
+        results = queue.take_results()
+        for rid, product_url, doc, err in results:
+            unacked = rid
+            session.maybe_log_stats()
+            if err is not None:
+                failed += 1
+                METRICS.inc("products_total", result="error")
+                logging.error("Failed to process %s: %s", product_url, err)
+                continue
+            session._emit(writer, state_key(product_url), doc, tag=tag)
+            written += 1
+            logging.info("Scraped %d → %s", written, doc.get("sku") or product_url)
+        ack()
+        return len(results)
+
+    completed = False
+    try:
+        if queue.listing_done():
+            logging.info("Listing already queued; collecting results.")
+        else:
+            logging.info("Coordinating crawl: %s → %s", category_url, queue.path)
+            batch: List[str] = []
+            for product_url in iter_product_urls(paginator, max_products=session.max_products, seen=seen):
+                batch.append(product_url)
+                if len(batch) >= QUEUE_PUSH_BATCH:
+                    queue.push(batch)
+                    batch = []
+                    drain()
+            queue.push(batch)
+            queue.mark_listing_done()
+        while not queue.finished():
+            if queue.requeue_expired():
+                logging.warning("Requeued URLs whose worker lease expired.")
+            if METRICS.enabled:
+                METRICS.set("queue_depth", queue.counts().get("pending", 0), queue="jobs")
+            if not drain():
+                session.maybe_log_stats()
+                time.sleep(poll_s)
+        drain()
+        completed = True
+    except KeyboardInterrupt:
+        logging.warning("Interrupted; queued work is kept in %s, rerun with --resume to continue.", queue.path)
+    finally:
+        try:
+            # Whatever an interrupted drain() already wrote is acknowledged with its offset.
+            ack()
+        finally:
+            writer.close()
+    counts = queue.counts()
+    logging.info(
+        "Done. Wrote %d products to %s (%d failed; queue: %s)",
+        written, output_path, failed, ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "empty",
+    )
+    return completed
+
+def run_worker(session: CrawlSession, settings: Dict, queue: "JobQueue") -> bool:
+    """
+    Distributed mode, worker side: lease product URLs from `queue`, fetch,
+    parse and normalize them with this session, and hand the documents back.
+    Exits once the coordinator has queued the whole listing and nothing is
+    left to lease. Returns False if interrupted.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    poll_s = float(settings.get("queuePollS", 1.0))
+    lease_n = max(1, session.concurrency * 2)
+    done = 0
+    logging.info("Worker %s pulling from %s", worker_id, queue.path)
+    try:
+        while True:
+            urls = queue.lease(worker_id, lease_n)
+            if not urls:
+                if queue.finished():
+                    break
+                session.maybe_log_stats()
+                time.sleep(poll_s)
+                continue
+            for product_url, doc, err in iter_scraped(
+                session.client,
+                urls,
+                concurrency=session.concurrency,
+                parse_pool=session.parse_pool,
+                max_page_bytes=session.max_page_bytes,
+                stream_pages=session.stream_pages,
+            ):
+                error = f"{type(err).__name__}: {err}" if err is not None else None
+                if not queue.complete(product_url, worker_id, doc=doc, error=error):
+                    logging.warning("Lease on %s expired before it finished; result dropped.", product_url)
+                elif error:
+                    logging.warning("Failed to process %s: %s", product_url, error)
+                else:
+                    done += 1
+            session.maybe_log_stats()
+    except KeyboardInterrupt:
+        logging.warning("Interrupted; leased URLs return to the queue when their lease expires.")
+        return False
+    logging.info("Worker %s done: %d products.", worker_id, done)
+    return True
@@ -1,39 +1,176 @@
 import logging
-import random
+import threading
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 import requests
 
+from telemetry.metrics import METRICS
+
+from .cache import CacheMiss, ResponseCache
+from .proxy_pool import ProxyPool
+from .rate_limiter import TokenBucket
+from .throttle import AdaptiveThrottle, parse_retry_after, retry_delay
+
+# Read granularity for streamed bodies; also the most a capped read overshoots by.
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def read_body(resp: requests.Response, max_bytes: Optional[int] = None, stop: Optional[Callable[[bytearray], bool]] = None) -> bool:
+    """
+    Read a `stream=True` response body incrementally into `resp.content`,
+    stopping after `max_bytes` or as soon as `stop(body_so_far)` returns True.
+    Returns True when the body was cut short. The connection is closed, not
+    returned to the pool, if the body was not read to the end.
+    """
+    buf = bytearray()
+    truncated = False
+    try:
+        for chunk in resp.iter_content(STREAM_CHUNK_BYTES):
+            buf += chunk
+            if max_bytes and len(buf) >= max_bytes:
+                del buf[max_bytes:]
+                truncated = True
+                break
+            if stop is not None and stop(buf):
+                truncated = True
+                break
+    finally:
+        resp.close()
+    resp._content = bytes(buf)
+    return truncated
+
 class HttpClient:
-    def __init__(self, default_headers: Optional[Dict[str, str]] = None, proxies: Optional[Dict[str, str]] = None, timeout: int = 30):
-        self.session = requests.Session()
+    def __init__(
+        self,
+        default_headers: Optional[Dict[str, str]] = None,
+        proxies: Optional[Dict[str, str]] = None,
+        timeout: int = 30,
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[ResponseCache] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        throttle: Optional[AdaptiveThrottle] = None,
+    ):
+        # requests.Session is not guaranteed thread-safe; keep one per worker thread.
+        self._local = threading.local()
+        self._sessions = []
         self.default_headers = default_headers or {}
-        self.session.headers.update(self.default_headers)
         self.proxies = proxies
         self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        # A pool takes precedence over the static `proxies` mapping.
+        self.proxy_pool = proxy_pool
+        self.throttle = throttle
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.default_headers)
+            self._local.session = session
+            self._sessions.append(session)
+        return session
 
-    def get(self, url: str, headers: Optional[Dict[str, str]] = None, retries: int = 3, backoff: float = 0.8) -> requests.Response:
+    def close(self):
+        for session in self._sessions:
+            session.close()
+        self._sessions = []
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 3,
+        backoff: float = 0.8,
+        max_bytes: Optional[int] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ) -> requests.Response:
+        """
+        GET with caching, rate limiting, proxy rotation and retries. With
+        `max_bytes` or `stop` the body is streamed (see read_body) and may be
+        cut short; partial bodies are never written to the cache.
+        """
+        cached = None
+        if self.cache:
+            cached = self.cache.lookup(url)
+            if cached and self.cache.is_fresh(cached):
+                METRICS.inc("http_cache_total", result="hit")
+                return self.cache.to_response(cached)
+            if self.cache.offline:
+                raise CacheMiss(f"Offline mode: {url} is not cached")
         last_exc = None
+        throttle = self.throttle
+        metrics = METRICS
+        stream = bool(max_bytes) or stop is not None
         for attempt in range(1, retries + 1):
+            if attempt > 1:
+                metrics.inc("http_retries_total")
+                if throttle:
+                    throttle.on_retry()
+            proxy = None
+            t0 = None
             try:
                 h = self.default_headers.copy()
                 if headers:
                     h.update(headers)
-                resp = self.session.get(url, headers=h, proxies=self.proxies, timeout=self.timeout, allow_redirects=True)
-                if resp.status_code >= 500:
-                    raise requests.HTTPError(f"Server error {resp.status_code}")
+                if cached:
+                    h.update(self.cache.revalidation_headers(cached))
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+                proxies = proxy.mapping if proxy else self.proxies
+                if metrics.enabled:
+                    t0 = time.perf_counter()
+                resp = self.session.get(url, headers=h, proxies=proxies, timeout=self.timeout, allow_redirects=True, stream=stream)
+                discarded = stream and (resp.status_code in (304, 403, 429) or resp.status_code >= 500)
+                if discarded:
+                    # Retried, raised or answered from cache below: hand the pooled connection back unread.
+                    resp.close()
+                truncated = stream and not discarded and read_body(resp, max_bytes, stop)
+                if metrics.enabled:
+                    metrics.observe("http_request_seconds", time.perf_counter() - t0, status=resp.status_code)
+                    if not discarded:
+                        metrics.inc("http_response_bytes_total", len(resp.content))
+                    t0 = None
                 if resp.status_code in (403, 429):
                     # Backoff for anti-bot triggers
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if proxy:
+                        self.proxy_pool.report(proxy, blocked=True, retry_after=retry_after)
+                    if throttle:
+                        # With several proxies the Retry-After applies to the one proxy, not to everyone.
+                        throttle.on_block(None if self.proxy_pool and len(self.proxy_pool) > 1 else retry_after)
                     logging.warning("Received %s for %s. Backing off.", resp.status_code, url)
-                    time.sleep(backoff * attempt + random.uniform(0, 0.5))
-                else:
-                    return resp
+                    time.sleep(retry_delay(attempt, backoff, throttle, retry_after))
+                    continue
+                if resp.status_code >= 500:
+                    # A proxy that keeps answering 5xx is benched like one that errors out.
+                    if proxy:
+                        self.proxy_pool.report(proxy, error=True)
+                    raise requests.HTTPError(f"Server error {resp.status_code}")
+                if proxy:
+                    self.proxy_pool.report(proxy)
+                if resp.status_code == 304 and cached:
+                    metrics.inc("http_cache_total", result="revalidated")
+                    self.cache.refresh(cached)
+                    return self.cache.to_response(cached)
+                if throttle:
+                    throttle.on_success()
+                if self.cache:
+                    metrics.inc("http_cache_total", result="miss")
+                    if not truncated:
+                        self.cache.store(url, resp)
+                return resp
             except Exception as e:
                 last_exc = e
+                if t0 is not None and not isinstance(e, requests.HTTPError):
+                    metrics.observe("http_request_seconds", time.perf_counter() - t0, status="error")
+                if proxy and not isinstance(e, requests.HTTPError):
+                    self.proxy_pool.report(proxy, error=True)
                 logging.warning("GET attempt %d failed for %s: %s", attempt, url, e)
-                time.sleep(backoff * attempt + random.uniform(0, 0.5))
+                time.sleep(retry_delay(attempt, backoff, throttle))
         # Final try: return last response if available, else raise
         if isinstance(last_exc, requests.HTTPError):
             raise last_exc
-        raise RuntimeError(f"Failed to fetch {url}: {last_exc}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to fetch {url}: {last_exc}")
@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    doc TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Result = Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]
+
+class JobQueue:
+    """
+    Durable product-URL queue shared by one coordinator and any number of
+    worker processes, stored in SQLite.
+
+    The coordinator `push()`es URLs from the listing and collects finished
+    documents with `take_results()` / `ack_results()`. Workers `lease()` URLs
+    for `lease_s` seconds and `complete()` them. A lease that runs out (the
+    worker crashed or hung) puts the URL back in the queue; after
+    `max_attempts` leases or failures it is reported as a failed result.
+    Jobs are handed out in the order they were pushed.
+    """
+
+    def __init__(self, path: str, lease_s: float = 300, max_attempts: int = 3):
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        # Several processes write to the same file; wait for their transactions instead of failing.
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(*args)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return out
+
+    def push(self, urls: Iterable[str]) -> int:
+        """Queue URLs not queued before; returns how many were added."""
+
+        def insert(rows):
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO jobs (url) VALUES (?)", rows)
+            return self._db.total_changes - before
+
+        rows = [(url,) for url in urls]
+        return self._transaction(insert, rows) if rows else 0
+
+    def _expire(self, now: float) -> int:
+        expired = "state = 'leased' AND lease_expires < ?"
+        self._db.execute(
+            f"INSERT INTO results (url, error) SELECT url, 'lease expired ' || attempts || ' times' FROM jobs WHERE {expired} AND attempts >= ?",
+            (now, self.max_attempts),
+        )
+        cur = self._db.execute(
+            f"UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, owner = NULL WHERE {expired}",
+            (self.max_attempts, now),
+        )
+        return cur.rowcount
+
+    def requeue_expired(self) -> int:
+        """Return URLs whose lease ran out to the queue; returns how many."""
+        return self._transaction(self._expire, time.time())
+
+    def lease(self, worker: str, n: int = 1) -> List[str]:
+        """Lease up to `n` pending URLs to `worker`."""
+
+        def take():
+            now = time.time()
+            self._expire(now)
+            urls = [
+                row[0]
+                for row in self._db.execute("SELECT url FROM jobs WHERE state = 'pending' ORDER BY rowid LIMIT ?", (n,))
+            ]
+            self._db.executemany(
+                "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE url = ?",
+                [(worker, now + self.lease_s, url) for url in urls],
+            )
+            return urls
+
+        return self._transaction(take)
+
+    def complete(self, url: str, worker: str, doc: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> bool:
+        """
+        Report a leased URL as done (`doc`) or failed (`error`). A failure is
+        retried until `max_attempts`. Returns False if `worker` no longer
+        holds the lease, in which case the report is dropped.
+        """
+
+        def finish():
+            row = self._db.execute("SELECT state, owner, attempts FROM jobs WHERE url = ?", (url,)).fetchone()
+            if row is None or row[0] != "leased" or row[1] != worker:
+                return False
+            if error is not None and row[2] < self.max_attempts:
+                self._db.execute("UPDATE jobs SET state = 'pending', owner = NULL, error = ? WHERE url = ?", (error, url))
+                return True
+            state = "done" if error is None else "failed"
+            self._db.execute("UPDATE jobs SET state = ?, owner = NULL, error = ? WHERE url = ?", (state, error, url))
+            self._db.execute(
+                "INSERT INTO results (url, doc, error) VALUES (?, ?, ?)",
+                (url, json.dumps(doc, ensure_ascii=False) if doc is not None else None, error),
+            )
+            return True
+
+        return self._transaction(finish)
+
+    def take_results(self, limit: int = 500) -> List[Result]:
+        """Oldest unacknowledged results as `(id, url, doc, error)`."""
+        with self._lock:
+            rows = self._db.execute("SELECT id, url, doc, error FROM results ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(rid, url, json.loads(doc) if doc is not None else None, error) for rid, url, doc, error in rows]
+
+    def ack_results(self, last_id: int, output_offset: Optional[int] = None):
+        """
+        Drop results up to and including `last_id` once they are safely
+        written. `output_offset`, the output's size with exactly those results
+        in it, is stored in the same transaction (see `output_offset()`).
+        """
+
+        def ack():
+            self._db.execute("DELETE FROM results WHERE id <= ?", (last_id,))
+            if output_offset is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('output_offset', ?)", (str(output_offset),)
+                )
+
+        self._transaction(ack)
+
+    def output_offset(self) -> Optional[int]:
+        """Output size at the last acknowledgement; anything past it was never acknowledged."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'output_offset'").fetchone()
+        return int(row[0]) if row else None
+
+    def mark_listing_done(self):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('listing_done', '1')")
+
+    def listing_done(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM meta WHERE key = 'listing_done'").fetchone() is not None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def finished(self) -> bool:
+        """True once the listing is fully queued and no URL is pending or leased."""
+        if not self.listing_done():
+            return False
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM jobs WHERE state IN ('pending', 'leased') LIMIT 1").fetchone() is None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
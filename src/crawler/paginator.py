@@ -1,14 +1,126 @@
+import json
 import logging
 import re
-from typing import Generator, Iterable, List, Optional
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
 from urllib.parse import urljoin, urlencode, urlparse, ParseResult, parse_qs, urlunparse
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
+from .dedupe import SkuSeenSet, sku_key
 from .fetch import HttpClient
 
 BESTBUY_DOMAIN = "www.bestbuy.com"
 
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Compiled once; equivalent to the CSS selectors
+#   a.sku-header, a[data-sku-id], div.sku-title a, a[href*=".p?skuId="]
+#   nav.pagination, div.pagination, a[aria-label="Next Page"]
+_PRODUCT_HREFS = etree.XPath(
+    f"(//a[{_has_class('sku-header')}] | //a[@data-sku-id] | //div[{_has_class('sku-title')}]//a"
+    " | //a[contains(@href, '.p?skuId=')])/@href"
+)
+_HAS_PAGER = etree.XPath(
+    f"boolean(//nav[{_has_class('pagination')}] | //div[{_has_class('pagination')}] | //a[@aria-label='Next Page'])"
+)
+_LD_JSON_TEXT = etree.XPath("//script[@type='application/ld+json']/text()")
+_PDP_URL_RE = re.compile(r"/site/.*\.p\?skuId=\d+")
+
+# Listing cards, and their fields relative to one card:
+#   li.sku-item, li[data-sku-id]
+#   .sku-title a, a.sku-header
+#   .priceView-customer-price span, .priceView-hero-price span
+#   .c-ratings-reviews p, img.product-image, img
+_CARDS = etree.XPath(f"//li[{_has_class('sku-item')} or @data-sku-id]")
+_CARD_HREFS = etree.XPath(
+    f"(.//a[{_has_class('sku-header')}] | .//*[{_has_class('sku-title')}]//a | .//a[contains(@href, '.p?skuId=')])/@href"
+)
+_CARD_NAME = etree.XPath(f".//*[{_has_class('sku-title')}]//a | .//a[{_has_class('sku-header')}]")
+_CARD_PRICE = etree.XPath(
+    f".//*[{_has_class('priceView-customer-price')}]//span | .//*[{_has_class('priceView-hero-price')}]//span"
+)
+_CARD_RATING = etree.XPath(f".//*[{_has_class('c-ratings-reviews')}]//p")
+_CARD_IMAGE = etree.XPath(f"(.//img[{_has_class('product-image')}] | .//img)/@src")
+_PRICE_RE = re.compile(r"([0-9]+\.[0-9]{2})")
+_RATING_RE = re.compile(r"Rating\s+([0-9.]+)")
+_REVIEWS_RE = re.compile(r"([0-9,]+)\s+review")
+
+# Fields a card must carry for its record to stand in for the PDP's.
+CARD_FIELDS = ("sku", "name", "offers")
+
+def _html_tree(html: str):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+def _list_item_url(item: Any) -> Optional[str]:
+    if not isinstance(item, dict):
+        return None
+    url = item.get("url")
+    if not url:
+        inner = item.get("item")
+        url = inner.get("url") if isinstance(inner, dict) else inner
+    return url if isinstance(url, str) else None
+
+def _text(el: Any) -> str:
+    return " ".join(" ".join(el.itertext()).split())
+
+def _first_text(xpath: etree.XPath, node: Any) -> Optional[str]:
+    for el in xpath(node):
+        text = _text(el)
+        if text:
+            return text
+    return None
+
+def _card_fields(card: Any, base_url: str) -> Dict[str, Any]:
+    """Raw product fields (parse_product_from_html's shape) shown on one listing card."""
+    raw: Dict[str, Any] = {}
+    url = next((urljoin(base_url, h) for h in _CARD_HREFS(card) if _PDP_URL_RE.search(urljoin(base_url, h))), None)
+    if url:
+        raw["url"] = url
+    sku = card.get("data-sku-id") or (sku_key(url) if url and "skuId=" in url else None)
+    if sku:
+        raw["sku"] = sku
+    name = _first_text(_CARD_NAME, card)
+    if name:
+        raw["name"] = name
+    image = next(iter(_CARD_IMAGE(card)), None)
+    if image:
+        raw["image"] = urljoin(base_url, image)
+    price = _first_text(_CARD_PRICE, card)
+    m = _PRICE_RE.search(price.replace(",", "")) if price else None
+    if m:
+        raw["offers"] = {"priceCurrency": "USD", "lowPrice": m.group(1), "highPrice": m.group(1)}
+    rating = _first_text(_CARD_RATING, card)
+    if rating:
+        value, count = _RATING_RE.search(rating), _REVIEWS_RE.search(rating)
+        if value or count:
+            raw["aggregateRating"] = {
+                "ratingValue": value.group(1) if value else None,
+                "reviewCount": count.group(1).replace(",", "") if count else None,
+            }
+    return raw
+
+def _list_item_product(item: Any, base_url: str) -> Optional[Dict[str, Any]]:
+    """Raw product fields from an ItemList element (a ListItem wrapping a Product, or the Product itself)."""
+    url = _list_item_url(item)
+    if not url:
+        return None
+    inner = item.get("item") if isinstance(item.get("item"), dict) else item
+    raw = {k: v for k, v in inner.items() if not k.startswith("@") and k != "position"}
+    raw["url"] = urljoin(base_url, url)
+    if not raw.get("sku") and "skuId=" in raw["url"]:
+        raw["sku"] = sku_key(raw["url"])
+    return raw
+
 def _with_query(url: str, params: dict) -> str:
     pr: ParseResult = urlparse(url)
     q = parse_qs(pr.query)
@@ -29,43 +141,85 @@ class BestBuyPaginator:
         self.category_url = category_url
         self.country = country
 
-    def _extract_product_urls(self, html: str, base_url: str) -> List[str]:
-        soup = BeautifulSoup(html, "lxml")
+    def _parse_listing(self, html: str, base_url: str) -> Tuple[List[str], bool]:
+        """
+        Parse a listing page once and return `(product_urls, has_next_page)`.
+        """
+        tree = _html_tree(html)
+        if tree is None:
+            return [], False
         urls: List[str] = []
 
         # Typical card selector for BestBuy listings: a[data-sku-id], or anchors with class "sku-header"
-        for a in soup.select('a.sku-header, a[data-sku-id], div.sku-title a, a[href*=".p?skuId="]'):
-            href = a.get("href")
-            if not href:
-                continue
+        for href in _PRODUCT_HREFS(tree):
             # Normalize to absolute URL
             abs_url = urljoin(base_url, href)
             # Heuristic: PDP links contain "/site/" and end with ".p?skuId=<digits>"
-            if re.search(r"/site/.*\.p\?skuId=\d+", abs_url):
+            if _PDP_URL_RE.search(abs_url):
                 urls.append(abs_url)
 
         # Fallback: detect LD+JSON listing items if present
         if not urls:
-            for script in soup.find_all("script", type="application/ld+json"):
+            for text in _LD_JSON_TEXT(tree):
                 try:
-                    import json
-                    data = json.loads(script.text.strip())
-                    if isinstance(data, dict) and data.get("@type") in ("ItemList", "CollectionPage"):
-                        for item in data.get("itemListElement", []):
-                            url = (item.get("url") if isinstance(item, dict) else item.get("item", {}).get("url"))
-                            if url:
-                                urls.append(urljoin(base_url, url))
+                    data = json.loads(text.strip())
                 except Exception:
                     continue
+                if isinstance(data, dict) and data.get("@type") in ("ItemList", "CollectionPage"):
+                    for item in data.get("itemListElement", []):
+                        url = _list_item_url(item)
+                        if url:
+                            urls.append(urljoin(base_url, url))
 
-        # De-duplicate while preserving order
+        # De-duplicate by SKU (tracking params differ between cards) while preserving order
         seen = set()
         deduped = []
         for u in urls:
-            if u not in seen:
-                seen.add(u)
+            key = sku_key(u)
+            if key not in seen:
+                seen.add(key)
                 deduped.append(u)
-        return deduped
+        return deduped, bool(_HAS_PAGER(tree))
+
+    def _parse_cards(self, html: str, base_url: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Parse a listing page into `(raw_products, has_next_page)`: one raw
+        product dict per card, in page order, without fetching any PDP. The
+        page's ItemList JSON-LD is preferred where it describes the same SKU;
+        card markup fills the fields it leaves out, and JSON-LD items with no
+        card are appended. Products without a SKU are dropped.
+        """
+        tree = _html_tree(html)
+        if tree is None:
+            return [], False
+        from_ld: Dict[str, Dict[str, Any]] = {}
+        for text in _LD_JSON_TEXT(tree):
+            try:
+                data = json.loads(text.strip())
+            except Exception:
+                continue
+            if isinstance(data, dict) and data.get("@type") in ("ItemList", "CollectionPage"):
+                for item in data.get("itemListElement", []):
+                    raw = _list_item_product(item, base_url) if isinstance(item, dict) else None
+                    if raw and raw.get("sku"):
+                        from_ld.setdefault(str(raw["sku"]), raw)
+
+        products: Dict[str, Dict[str, Any]] = {}
+        for card in _CARDS(tree):
+            raw = _card_fields(card, base_url)
+            sku = raw.get("sku")
+            if not sku or sku in products:
+                continue
+            ld = from_ld.pop(sku, None)
+            if ld:
+                raw.update({k: v for k, v in ld.items() if v})
+            products[sku] = raw
+        for sku, raw in from_ld.items():
+            products.setdefault(sku, raw)
+        return list(products.values()), bool(_HAS_PAGER(tree))
+
+    def _extract_product_urls(self, html: str, base_url: str) -> List[str]:
+        return self._parse_listing(html, base_url)[0]
 
     def _next_page_url(self, url: str, page: int) -> Optional[str]:
         if "page=" in url:
@@ -73,30 +227,51 @@ class BestBuyPaginator:
         # If no 'page' query parameter, add it
         return _with_query(url, {"page": page})
 
-    def iter_product_urls(self) -> Generator[str, None, None]:
-        page = 1
+    def _iter_listing(
+        self, parse: Callable[[str, str], Tuple[List[Any], bool]], key: Callable[[Any], str], start_page: int
+    ) -> Generator[Tuple[int, List[Any]], None, None]:
+        listed = SkuSeenSet()
+        page = start_page
         while True:
             page_url = self._next_page_url(self.category_url, page)
             logging.debug("Fetching list page %d: %s", page, page_url)
             resp = self.client.get(page_url)
             html = resp.text
 
-            urls = self._extract_product_urls(html, base_url=page_url)
-            if not urls:
+            items, has_next = parse(html, page_url)
+            if not items:
                 if page > 1:
                     logging.info("No more product URLs at page %d. Stopping.", page)
                 else:
                     logging.warning("No products found on the first page. Check category URL.")
                 break
 
-            for u in urls:
-                yield u
+            yield page, [item for item in items if listed.add(key(item))]
 
             # Stop if there is no obvious pagination control
-            soup = BeautifulSoup(html, "lxml")
-            pager = soup.select_one('nav.pagination, div.pagination, a[aria-label="Next Page"]')
-            if not pager:
+            if not has_next:
                 # Heuristic: Stop after first page if pager missing
                 break
 
-            page += 1
\ No newline at end of file
+            page += 1
+
+    def iter_pages(self, start_page: int = 1) -> Generator[Tuple[int, List[str]], None, None]:
+        """
+        Yield `(page_number, product_urls)` for each listing page in turn. A SKU
+        already listed on an earlier page (e.g. a sponsored slot) is dropped, so
+        a page may come back with an empty list.
+        """
+        return self._iter_listing(self._parse_listing, sku_key, start_page)
+
+    def iter_card_pages(self, start_page: int = 1) -> Generator[Tuple[int, List[Dict[str, Any]]], None, None]:
+        """
+        Listing-only mode: yield `(page_number, raw_products)` built from the
+        cards and ItemList JSON-LD of each listing page (see `_parse_cards`).
+        Ready for normalize_product; only listing pages are requested.
+        """
+        return self._iter_listing(self._parse_cards, lambda raw: str(raw["sku"]), start_page)
+
+    def iter_product_urls(self) -> Generator[str, None, None]:
+        for _, urls in self.iter_pages():
+            for u in urls:
+                yield u
@@ -0,0 +1,87 @@
+import logging
+import queue
+import threading
+from typing import Generator, List, Optional, Tuple
+
+from telemetry.metrics import METRICS
+
+from .paginator import BestBuyPaginator
+
+_DONE = object()
+
+class PrefetchingPaginator:
+    """
+    Fetch listing pages ahead of the product workers.
+
+    A background thread walks `paginator.iter_pages()` and pushes each page's
+    URLs into a bounded queue of `max_pages` entries; when the queue is full
+    the thread blocks, which is the backpressure limit. Once `max_products`
+    URLs have been queued no further listing pages are requested.
+    """
+
+    def __init__(self, paginator: BestBuyPaginator, max_pages: int = 2, max_products: Optional[int] = None, start_page: int = 1):
+        self.paginator = paginator
+        self.max_products = max_products
+        self.start_page = start_page
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_pages))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def _put(self, entry) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(entry, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        queued = 0
+        try:
+            for page, urls in self.paginator.iter_pages(start_page=self.start_page):
+                if self.max_products:
+                    urls = urls[: self.max_products - queued]
+                if not self._put((page, urls)):
+                    return
+                queued += len(urls)
+                if self.max_products and queued >= self.max_products:
+                    logging.debug("Prefetch reached %d URLs; not fetching further listing pages.", queued)
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_DONE)
+
+    def start(self) -> "PrefetchingPaginator":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="listing-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def iter_pages(self, start_page: Optional[int] = None) -> Generator[Tuple[int, List[str]], None, None]:
+        if start_page is not None and self._thread is None:
+            self.start_page = start_page
+        self.start()
+        try:
+            while True:
+                entry = self._queue.get()
+                METRICS.set("queue_depth", self._queue.qsize(), queue="listing")
+                if entry is _DONE:
+                    break
+                yield entry
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.close()
+
+    def iter_product_urls(self) -> Generator[str, None, None]:
+        for _, urls in self.iter_pages():
+            for u in urls:
+                yield u
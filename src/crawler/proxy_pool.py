@@ -0,0 +1,137 @@
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+class Proxy:
+    __slots__ = ("mapping", "weight", "consecutive_blocks", "ejected_until", "requests", "blocks", "errors", "health")
+
+    def __init__(self, mapping: Dict[str, str], weight: float = 1.0):
+        # requests-style {"http": ..., "https": ...}
+        self.mapping = mapping
+        self.weight = weight
+        self.consecutive_blocks = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.blocks = 0
+        self.errors = 0
+        # Exponentially weighted success rate in [0, 1]; routing prefers healthy proxies.
+        self.health = 1.0
+
+    @property
+    def url(self) -> str:
+        return self.mapping.get("https") or self.mapping.get("http") or ""
+
+    def __repr__(self) -> str:
+        # Never log credentials embedded in the proxy URL.
+        host = self.url.rsplit("@", 1)[-1]
+        return f"Proxy({host})"
+
+def _parse_entry(entry: Any) -> Optional[Proxy]:
+    if isinstance(entry, str):
+        return Proxy({"http": entry, "https": entry})
+    if isinstance(entry, dict):
+        if "url" in entry:
+            return Proxy({"http": entry["url"], "https": entry["url"]}, weight=float(entry.get("weight", 1.0)))
+        if "http" in entry or "https" in entry:
+            mapping = {k: v for k, v in entry.items() if k in ("http", "https")}
+            return Proxy(mapping, weight=float(entry.get("weight", 1.0)))
+    return None
+
+class ProxyPool:
+    """
+    Rotate requests across a list of proxies.
+
+    `strategy` is "round_robin" or "weighted" (random, proportional to each
+    proxy's weight). After `eject_after` consecutive 403/429 responses a proxy
+    is taken out of rotation for `cooldown_s` seconds (or for its Retry-After).
+    If every proxy is ejected, the one whose cooldown ends first is used anyway.
+
+    Each proxy also carries a health score (EWMA of successful requests,
+    counting blocks and connection errors as failures). Weighted routing
+    multiplies weight by health, and a proxy whose health falls below
+    `min_health` is benched for `cooldown_s` and comes back on probation at
+    exactly `min_health`.
+    """
+
+    def __init__(
+        self,
+        proxies: List[Union[str, Dict[str, Any]]],
+        strategy: str = "round_robin",
+        eject_after: int = 3,
+        cooldown_s: float = 120.0,
+        min_health: float = 0.25,
+        health_alpha: float = 0.1,
+    ):
+        self.proxies: List[Proxy] = [p for p in (_parse_entry(e) for e in proxies) if p is not None]
+        if not self.proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        if strategy not in ("round_robin", "weighted"):
+            raise ValueError(f"Unknown proxy strategy {strategy!r}")
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.cooldown_s = cooldown_s
+        self.min_health = min_health
+        self.health_alpha = health_alpha
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(range(len(self.proxies)))
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def acquire(self) -> Proxy:
+        now = time.monotonic()
+        with self._lock:
+            live = [p for p in self.proxies if p.ejected_until <= now]
+            if not live:
+                proxy = min(self.proxies, key=lambda p: p.ejected_until)
+            elif self.strategy == "weighted":
+                proxy = random.choices(live, weights=[max(p.weight * p.health, 1e-6) for p in live])[0]
+            else:
+                for _ in range(len(self.proxies)):
+                    proxy = self.proxies[next(self._cycle)]
+                    if proxy.ejected_until <= now:
+                        break
+            proxy.requests += 1
+            return proxy
+
+    def report(self, proxy: Proxy, blocked: bool = False, error: bool = False, retry_after: Optional[float] = None):
+        """Record the outcome of a request made through `proxy`."""
+        with self._lock:
+            ok = not (blocked or error)
+            proxy.health = (1 - self.health_alpha) * proxy.health + (self.health_alpha if ok else 0.0)
+            if error:
+                proxy.errors += 1
+            if proxy.health < self.min_health:
+                proxy.ejected_until = max(proxy.ejected_until, time.monotonic() + self.cooldown_s)
+                proxy.health = self.min_health
+                logging.warning("Benching unhealthy %r for %.0fs.", proxy, self.cooldown_s)
+            if not blocked:
+                if ok:
+                    proxy.consecutive_blocks = 0
+                return
+            proxy.blocks += 1
+            proxy.consecutive_blocks += 1
+            if retry_after:
+                proxy.ejected_until = max(proxy.ejected_until, time.monotonic() + retry_after)
+            if proxy.consecutive_blocks >= self.eject_after:
+                proxy.ejected_until = max(proxy.ejected_until, time.monotonic() + self.cooldown_s)
+                proxy.consecutive_blocks = 0
+                logging.warning("Ejecting %r for %.0fs after repeated blocks.", proxy, self.cooldown_s)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "proxy": repr(p),
+                    "health": round(p.health, 3),
+                    "requests": p.requests,
+                    "blocks": p.blocks,
+                    "errors": p.errors,
+                    "ejected": p.ejected_until > now,
+                }
+                for p in self.proxies
+            ]
@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every fetch worker.
+
+    `rate` is tokens per second and `capacity` the burst size. A rate of 0
+    (or less) disables limiting entirely.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else 1.0
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+
+    @classmethod
+    def from_delay(cls, delay_s: float, burst: float = 1.0) -> "TokenBucket":
+        """Build a limiter equivalent to sleeping `delay_s` between requests."""
+        return cls(rate=1.0 / delay_s if delay_s > 0 else 0.0, capacity=burst)
+
+    def _refill(self, now: float):
+        elapsed = now - self._last
+        self._last = now
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds: float):
+        """Hold every caller for at least `seconds` (e.g. a Retry-After)."""
+        if self.rate <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Consume `tokens` now and return how long the caller must wait before
+        using them. Lets asyncio callers sleep without blocking the loop.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
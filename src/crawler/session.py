@@ -0,0 +1,653 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from outputs.dataset_adapter import ensure_parent_dir, open_writer
+from telemetry.metrics import METRICS
+
+from .dedupe import SkuSeenSet, sku_key
+
+# The HTTP clients (requests, httpx), lxml and the parse/normalize stack are
+# imported where they are first used, so argument errors, --list-urls and
+# short runs do not pay for what they never touch.
+if TYPE_CHECKING:
+    from extractors.parse_pool import ParsePool
+
+    from .fetch import HttpClient
+    from .proxy_pool import ProxyPool
+    from .throttle import AdaptiveThrottle
+
+def load_proxy_pool(path: Optional[str], settings: Dict) -> Optional["ProxyPool"]:
+    """
+    Build a ProxyPool from the proxies file. Accepts a requests-style
+    {"http": ..., "https": ...} mapping (one proxy), or a list of proxy URLs
+    and/or {"url": ..., "weight": ...} entries.
+    """
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logging.warning("Proxies file '%s' not found. Continuing without proxies.", path)
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = [data] if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        return None
+    from .proxy_pool import ProxyPool
+
+    pool = ProxyPool(
+        entries,
+        strategy=settings.get("proxyStrategy", "round_robin"),
+        eject_after=int(settings.get("proxyEjectAfter", 3)),
+        cooldown_s=float(settings.get("proxyCooldownS", 120)),
+    )
+    logging.info("Loaded %d proxies (%s).", len(pool), pool.strategy)
+    return pool
+
+def iter_product_urls(
+    paginator,
+    max_products: int,
+    start_page: int = 1,
+    skip: Optional[Set[str]] = None,
+    pages: Optional[Dict[str, int]] = None,
+    seen: Optional[SkuSeenSet] = None,
+    on_seen: Optional[Callable[[str], None]] = None,
+) -> Iterable[str]:
+    """
+    Product URLs from the listing, capped at `max_products`. URLs whose key is
+    in `skip` (already completed before a resume) are not yielded; `pages`
+    records the listing page each yielded URL came from. Keys in `seen` were
+    already crawled (for another category, or by an earlier run) and are
+    passed to `on_seen` instead.
+    """
+    count = 0
+    for page, urls in paginator.iter_pages(start_page=start_page):
+        for url in urls:
+            key = state_key(url)
+            if skip and key in skip:
+                continue
+            if seen and key in seen:
+                if on_seen:
+                    on_seen(key)
+                continue
+            if pages is not None:
+                pages[url] = page
+            yield url
+            count += 1
+            if max_products and count >= max_products:
+                return
+
+def log_fetch_stats(throttle: Optional["AdaptiveThrottle"], proxy_pool: Optional["ProxyPool"]):
+    if throttle:
+        st = throttle.stats()
+        logging.info(
+            "Fetch stats: rate %.2f/%.2f req/s, %d blocks/min (%d total), %d retries, %d requests",
+            st["rate"], st["maxRate"], st["blocksPerMin"], st["blocks"], st["retries"], st["requests"],
+        )
+    if proxy_pool and len(proxy_pool) > 1:
+        for st in proxy_pool.stats():
+            logging.debug("Proxy %s: health %.2f, %d requests, %d blocks, %d errors%s",
+                          st["proxy"], st["health"], st["requests"], st["blocks"], st["errors"], " (ejected)" if st["ejected"] else "")
+
+def state_key(url: str) -> str:
+    return sku_key(url)
+
+def iter_scraped(
+    client: "HttpClient",
+    urls: Iterable[str],
+    concurrency: int = 1,
+    parse_pool: Optional["ParsePool"] = None,
+    unchanged: Optional[Callable[[str, bytes], bool]] = None,
+    max_page_bytes: Optional[int] = None,
+    stream_pages: bool = False,
+) -> Iterator[Tuple[str, Optional[Dict], Optional[BaseException]]]:
+    """
+    Fetch, parse and normalize product pages; yields `(url, doc, error)` in listing order.
+
+    Without a parse pool the fetch threads also parse. With one, the threads
+    only download bytes and parsing runs on the pool's worker processes.
+    When `unchanged(url, body)` returns True the page is not parsed and
+    `(url, None, None)` is yielded.
+
+    Pages are parsed from the raw bytes, never decoded to str. With
+    `stream_pages` a download stops as soon as a complete JSON-LD Product
+    block has arrived, and `max_page_bytes` caps every page, so a fetch
+    worker holds at most one capped body at a time.
+    """
+    from extractors.product_parser import LdProductWatch, parse_product_from_html
+    from extractors.schema_normalizer import normalize_product
+
+    from .workers import ordered_map
+
+    def fetch_body(product_url: str) -> bytes:
+        if not stream_pages and not max_page_bytes:
+            return client.get(product_url).content
+        stop = LdProductWatch() if stream_pages else None
+        return client.get(product_url, max_bytes=max_page_bytes, stop=stop).content
+
+    if parse_pool is None:
+        def scrape(product_url: str) -> Optional[Dict]:
+            body = fetch_body(product_url)
+            if unchanged and unchanged(product_url, body):
+                return None
+            with METRICS.timer("parse_seconds"):
+                raw = parse_product_from_html(body, url=product_url)
+            with METRICS.timer("normalize_seconds"):
+                return normalize_product(raw)
+
+        yield from ordered_map(scrape, urls, concurrency=concurrency)
+        return
+
+    # Fetch failures and skipped pages are not parsed, but pass through the
+    # pool in their place so results stay in listing order.
+    def fetched() -> Iterator[Tuple[Tuple[str, Optional[BaseException]], str, Optional[bytes]]]:
+        for product_url, body, err in ordered_map(fetch_body, urls, concurrency=concurrency):
+            if err is not None:
+                yield (product_url, err), product_url, None
+            elif unchanged and unchanged(product_url, body):
+                yield (product_url, None), product_url, None
+            else:
+                yield (product_url, None), product_url, body
+
+    for (product_url, fetch_err), doc, parse_err in parse_pool.imap(fetched()):
+        yield product_url, doc, fetch_err or parse_err
+
+class CategoryResult:
+    def __init__(self, completed: bool, interrupted: bool, written: int):
+        self.completed = completed
+        self.interrupted = interrupted
+        self.written = written
+
+class CrawlSession:
+    """
+    HTTP client, cache, rate limiter, throttle, proxy pool and parse pool for a
+    run. A batch run crawls every category through one session, so they share
+    the request budget, connection pools and proxy health. A `discovery`
+    session only walks listings: no parse pool, no price history, and the
+    seen-set is read but never saved.
+    """
+
+    def __init__(self, settings: Dict, args: argparse.Namespace, discovery: bool = False):
+        from .fetch import HttpClient
+        from .rate_limiter import TokenBucket
+        from .throttle import AdaptiveThrottle
+
+        self.args = args
+        self.discovery = discovery
+        delay_s = args.delay if args.delay is not None else float(settings.get("delayMs", 600)) / 1000.0
+        self.concurrency = args.concurrency if args.concurrency is not None else int(settings.get("concurrency", 1))
+        self.parse_workers = args.parse_workers if args.parse_workers is not None else int(settings.get("parseWorkers", 0))
+        self.prefetch_pages = args.prefetch if args.prefetch is not None else int(settings.get("prefetchPages", 0))
+        self.max_products = args.max if args.max is not None else int(settings.get("maxProducts", 100))
+        self.country = settings.get("country", "US")
+
+        ua = settings.get(
+            "userAgent",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        )
+        proxies_path = settings.get("proxiesFile")
+        self.proxy_pool = load_proxy_pool(proxies_path, settings)
+        http_backend = args.http_backend or settings.get("httpBackend", "requests")
+
+        cache_dir = args.cache_dir or settings.get("cacheDir")
+        self.cache = None
+        if cache_dir:
+            from .cache import ResponseCache
+
+            self.cache = ResponseCache(
+                cache_dir,
+                ttl_s=float(settings.get("cacheTtlS", 6 * 3600)),
+                max_bytes=int(float(settings.get("cacheMaxMb", 2048)) * 1024 * 1024),
+                offline=args.offline,
+            )
+        elif args.offline:
+            logging.error("--offline requires --cache-dir (or settings.cacheDir).")
+            sys.exit(2)
+
+        limiter = TokenBucket.from_delay(delay_s)
+        self.throttle = None
+        if limiter.rate > 0 and settings.get("adaptiveThrottle", True):
+            # AIMD: back off the shared request rate when blocks spike, recover when they stop.
+            self.throttle = AdaptiveThrottle(limiter, min_rate=limiter.rate / float(settings.get("throttleMaxSlowdown", 20)))
+        client_cls = HttpClient
+        if http_backend == "async":
+            from .async_fetch import AsyncHttpClient as client_cls
+        self.client = client_cls(
+            default_headers={"User-Agent": ua, "Accept-Language": "en-US,en;q=0.9"},
+            rate_limiter=limiter,
+            cache=self.cache,
+            proxy_pool=self.proxy_pool,
+            throttle=self.throttle,
+        )
+        # Streamed PDP fetches: stop reading once the JSON-LD Product block is in, and cap page size.
+        self.stream_pages = args.stream_pages or bool(settings.get("streamPages", False))
+        max_page_kb = args.max_page_kb if args.max_page_kb is not None else float(settings.get("maxPageKb", 0))
+        self.max_page_bytes = int(max_page_kb * 1024) or None
+        # Listing-only: records come from listing cards; a PDP is fetched only to complete a card, if enabled.
+        self.listing_only = args.listing_only or bool(settings.get("listingOnly", False))
+        self.listing_follow_up = args.pdp_follow_up or bool(settings.get("listingFollowUp", False))
+        self.listing_fields = settings.get("listingRequiredFields")
+        self.stats_interval_s = float(settings.get("statsIntervalS", 60))
+        # Per-stage metrics: summary in the periodic stats line, and /metrics when a port is set.
+        metrics_port = args.metrics_port if args.metrics_port is not None else settings.get("metricsPort")
+        self.metrics_server = None
+        if metrics_port is not None or settings.get("metrics", False):
+            METRICS.enable()
+        if metrics_port is not None:
+            from telemetry.metrics import serve_metrics
+
+            self.metrics_server = serve_metrics(int(metrics_port))
+        self._last_stats = time.monotonic()
+
+        # Checkpointing: listing page, completed SKUs and output offset, so --resume
+        # continues appending where a crashed run stopped.
+        self.checkpoint_every = int(settings.get("checkpointEvery", 50))
+        self.writer_opts = dict(
+            flush_every=int(settings.get("writeFlushEvery", 100)),
+            fsync=bool(settings.get("writeFsync", False)),
+            encoder=settings.get("jsonEncoder", "json"),
+            row_group_size=int(settings.get("parquetRowGroupSize", 5000)),
+        )
+        self.output_format = args.format or settings.get("outputFormat")
+        self.parse_pool: Optional["ParsePool"] = None
+        if not discovery:
+            # DOM fallback selectors: defaults from extractors/rules.py, overridable per field.
+            from extractors import rules as extraction_rules
+
+            rule_overrides = settings.get("extractionRules") or None
+            extraction_rules.configure(rule_overrides)
+            if self.parse_workers > 0:
+                from extractors.parse_pool import ParsePool
+
+                self.parse_pool = ParsePool(
+                    workers=self.parse_workers, chunksize=int(settings.get("parseChunkSize", 8)), rule_overrides=rule_overrides
+                )
+
+        # Crawl-wide seen-set: SKUs fetched once are never fetched again in this
+        # run (batch mode), or across runs when persisted to seenFile.
+        self.seen_path = args.seen or settings.get("seenFile")
+        self.seen_opts = dict(
+            bloom_capacity=int(settings.get("seenBloomCapacity", 0)),
+            error_rate=float(settings.get("seenErrorRate", 0.001)),
+        )
+        self.seen: Optional[SkuSeenSet] = None
+        # Batch mode: documents written so far by SKU, so a SKU listed in several
+        # categories is fetched once but written to each of them (see run_batch).
+        self.batch_docs: Optional[Dict[str, Dict]] = None
+        if self.seen_path:
+            self.seen = SkuSeenSet.load(self.seen_path, **self.seen_opts)
+            logging.info("Loaded %d already-crawled SKUs from %s.", len(self.seen), self.seen_path)
+
+        # Price history: every written product's offers, one run per category crawled.
+        price_history_path = args.price_history or settings.get("priceHistoryFile")
+        self.price_history = None
+        if price_history_path and not discovery:
+            from outputs.price_history import PriceHistory
+
+            self.price_history = PriceHistory(price_history_path)
+        self.price_category: Optional[str] = None
+        self.price_run: Optional[int] = None
+
+    def start_price_run(self, category_url: str):
+        """Record prices from here on under a new price-history run for `category_url` (started on the first record)."""
+        self.price_category = category_url
+        self.price_run = None
+
+    def record_price(self, doc: Dict):
+        if self.price_history is None:
+            return
+        if self.price_run is None:
+            self.price_run = self.price_history.start_run(category=self.price_category)
+        self.price_history.record(doc, self.price_run)
+
+    def _emit(self, writer, key: str, doc: Optional[Dict], state=None, tag: Optional[str] = None) -> Optional[Dict]:
+        """
+        Write one product: add it to the seen-set and `batch_docs`, classify it
+        against the incremental `state` (a None `doc` is a page the state
+        already found unchanged), add `tag` as "category" and record its
+        prices. Returns the record as written, or None if it was unchanged.
+        """
+        if self.seen is not None:
+            self.seen.add(key)
+        if doc is not None and self.batch_docs is not None:
+            self.batch_docs[key] = doc
+        if state is not None:
+            change = state.classify(key, doc) if doc is not None else None
+            if change is None:
+                METRICS.inc("products_total", result="unchanged")
+                return None
+            doc = dict(doc, changeType=change)
+        if tag:
+            doc = dict(doc, category=tag)
+        with METRICS.timer("write_seconds"):
+            writer.write(doc)
+        self.record_price(doc)
+        METRICS.inc("products_total", result="written")
+        return doc
+
+    @staticmethod
+    def _emit_removed(writer, state, tag: Optional[str] = None) -> int:
+        """Write a removal record for every SKU of the previous run that this run did not see."""
+        removed = state.removed()
+        for key in removed:
+            writer.write(dict({"sku": key, "changeType": "removed"}, **({"category": tag} if tag else {})))
+        return len(removed)
+
+    def maybe_log_stats(self):
+        if self.stats_interval_s > 0 and time.monotonic() - self._last_stats >= self.stats_interval_s:
+            self._last_stats = time.monotonic()
+            log_fetch_stats(self.throttle, self.proxy_pool)
+            if METRICS.enabled:
+                logging.info(METRICS.summary())
+
+    def close(self, cancel: bool = False):
+        if self.seen is not None and self.seen_path and not self.discovery:
+            self.seen.save(self.seen_path)
+        if self.parse_pool is not None:
+            self.parse_pool.close(cancel=cancel)
+        self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.price_history is not None:
+            self.price_history.close()
+        log_fetch_stats(self.throttle, self.proxy_pool)
+        if METRICS.enabled:
+            logging.info(METRICS.summary())
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+
+    def crawl_category(
+        self,
+        category_url: str,
+        output_path: str,
+        checkpoint_path: str,
+        state_path: Optional[str] = None,
+        resume: bool = False,
+        max_products: Optional[int] = None,
+        country: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> CategoryResult:
+        """
+        Crawl one category into `output_path`. SKUs in the session's seen-set
+        are not fetched and every SKU crawled here is added to it; those
+        crawled earlier in the same batch are written again from
+        `batch_docs`. `tag` is added to every record as "category".
+        """
+        if self.listing_only:
+            if resume:
+                logging.info("Listing-only crawls are not checkpointed; restarting %s from page 1.", category_url)
+            return self.harvest_category(
+                category_url, output_path, state_path=state_path, max_products=max_products, country=country, tag=tag
+            )
+
+        from outputs.checkpoint import Checkpoint
+        from outputs.state_store import CrawlState
+
+        from .paginator import BestBuyPaginator
+        from .prefetch import PrefetchingPaginator
+
+        self.start_price_run(category_url)
+
+        client = self.client
+        seen = self.seen
+        paginator = BestBuyPaginator(client=client, category_url=category_url, country=country or self.country)
+
+        scraped = 0
+        max_products = self.max_products if max_products is None else max_products
+        checkpoint_every = self.checkpoint_every
+        checkpoint = None
+        completed_keys: Set[str] = set()
+        start_page = 1
+        ensure_parent_dir(output_path)
+        if resume:
+            checkpoint = Checkpoint.load(checkpoint_path, category_url, output_path)
+            completed_keys = set(checkpoint.completed)
+            start_page = checkpoint.page
+            scraped = checkpoint.scraped
+            writer = open_writer(output_path, self.output_format, append=True, truncate_at=checkpoint.offset, **self.writer_opts)
+            logging.info("Resuming at listing page %d with %d products already done.", start_page, len(completed_keys))
+        else:
+            writer = open_writer(output_path, self.output_format, **self.writer_opts)
+            if checkpoint_every > 0 and writer.resumable:
+                checkpoint = Checkpoint(checkpoint_path, category_url, output_path)
+
+        remaining = max(0, max_products - len(completed_keys)) if max_products else 0
+        if max_products and not remaining:
+            logging.info("maxProducts already reached by the resumed crawl.")
+        if self.prefetch_pages > 0:
+            # Listing pages are fetched ahead on a background thread while PDP workers run.
+            # On resume the cap is left to iter_product_urls, since completed URLs are skipped there.
+            paginator = PrefetchingPaginator(
+                paginator,
+                max_pages=self.prefetch_pages,
+                max_products=None if completed_keys or seen else max_products,
+                start_page=start_page,
+            )
+
+        # Incremental mode: only new/changed products (and removals) are written.
+        state = CrawlState(state_path) if state_path else None
+        unchanged = (lambda u, body: state.html_unchanged(state_key(u), body)) if state else None
+        if state:
+            # Products finished before a resume count as seen in this run.
+            for key in completed_keys:
+                state.keep(key)
+
+        # A SKU crawled under another category is still part of this one: its
+        # document is written here too (batch mode), or it is at least kept in the state.
+        reused: List[str] = []
+
+        def on_seen(key: str):
+            if self.batch_docs is not None and key in self.batch_docs:
+                reused.append(key)
+            elif state:
+                state.keep(key)
+
+        current_page = start_page
+        interrupted = False
+        completed = False
+        visited = 0
+        skipped = 0
+
+        def emit(key: str, doc: Optional[Dict], label: str):
+            nonlocal scraped, skipped
+            completed_keys.add(key)
+            written = self._emit(writer, key, doc, state, tag)
+            if written is None:
+                skipped += 1
+                return
+            scraped += 1
+            logging.info("Scraped %d → %s", scraped, written.get("sku") or label)
+
+        def emit_reused():
+            while reused:
+                key = reused.pop(0)
+                emit(key, self.batch_docs[key], key)
+
+        def save_checkpoint():
+            checkpoint.save(current_page, writer.tell(), scraped, completed_keys)
+            if state:
+                # Saved after the checkpoint, so a hard kill in between leaves older
+                # state, never hashes for records that the resume truncates away.
+                state.save(carry_forward=True)
+
+        logging.info("Starting crawl: %s (concurrency=%d, parse workers=%d)", category_url, self.concurrency, self.parse_workers)
+        # Results come back in listing order regardless of concurrency.
+        url_pages: Dict[str, int] = {}
+        capped = bool(max_products) and not remaining
+        if capped:
+            urls: Iterable[str] = iter(())
+        else:
+            urls = iter_product_urls(
+                paginator,
+                max_products=remaining,
+                start_page=start_page,
+                skip=completed_keys,
+                pages=url_pages,
+                seen=seen,
+                on_seen=on_seen,
+            )
+        try:
+            for product_url, doc, err in iter_scraped(
+                client,
+                urls,
+                concurrency=self.concurrency,
+                parse_pool=self.parse_pool,
+                unchanged=unchanged,
+                max_page_bytes=self.max_page_bytes,
+                stream_pages=self.stream_pages,
+            ):
+                if checkpoint and checkpoint_every > 0 and visited and visited % checkpoint_every == 0:
+                    save_checkpoint()
+                visited += 1
+                current_page = url_pages.pop(product_url, current_page)
+                self.maybe_log_stats()
+                emit_reused()
+                if err is not None:
+                    METRICS.inc("products_total", result="error")
+                    logging.error("Failed to process %s: %s", product_url, err, exc_info=err)
+                    if state:
+                        state.keep(state_key(product_url))
+                    continue
+                emit(state_key(product_url), doc, product_url)
+            emit_reused()
+            completed = True
+            capped = capped or bool(max_products) and visited >= remaining
+            if state and capped:
+                logging.info("Crawl capped at %d products; not reporting removed SKUs.", max_products)
+            elif state:
+                scraped += self._emit_removed(writer, state, tag)
+        except KeyboardInterrupt:
+            interrupted = True
+            logging.warning("Interrupted; shutting down.")
+        finally:
+            if isinstance(paginator, PrefetchingPaginator):
+                paginator.close()
+            if checkpoint and not completed:
+                save_checkpoint()
+                logging.info("Checkpoint written to %s; rerun with --resume to continue.", checkpoint.path)
+            elif checkpoint:
+                checkpoint.remove()
+            writer.close()
+            if state:
+                state.save(carry_forward=not completed or capped)
+        if state:
+            logging.info("Done. Wrote %d changes to %s (%d unchanged)", scraped, output_path, skipped)
+        else:
+            logging.info("Done. Wrote %d products to %s", scraped, output_path)
+        return CategoryResult(completed, interrupted, scraped)
+
+    def harvest_category(
+        self,
+        category_url: str,
+        output_path: str,
+        state_path: Optional[str] = None,
+        max_products: Optional[int] = None,
+        country: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> CategoryResult:
+        """
+        Listing-only crawl (--listing-only): one record per listing card, built
+        from the card markup and the page's ItemList JSON-LD, so a category
+        costs one request per listing page instead of one per product as well.
+        With `listing_follow_up` a card missing any of `listing_fields`
+        (default: sku, name, offers) is replaced by its PDP; if that fetch
+        fails the card is written as it is. Seen-set, incremental state and
+        `tag` work as in `crawl_category`. Nothing is checkpointed, since a
+        rerun only repeats the listing pages.
+        """
+        from extractors.schema_normalizer import normalize_product
+        from outputs.state_store import CrawlState
+
+        from .paginator import CARD_FIELDS, BestBuyPaginator
+
+        self.start_price_run(category_url)
+
+        seen = self.seen
+        paginator = BestBuyPaginator(client=self.client, category_url=category_url, country=country or self.country)
+        max_products = self.max_products if max_products is None else max_products
+        required = tuple(self.listing_fields or CARD_FIELDS)
+        ensure_parent_dir(output_path)
+        writer = open_writer(output_path, self.output_format, **self.writer_opts)
+        state = CrawlState(state_path) if state_path else None
+
+        logging.info("Harvesting listing cards: %s (PDP follow-up %s)", category_url, "on" if self.listing_follow_up else "off")
+        scraped = 0
+        visited = 0
+        skipped = 0
+        followed = 0
+        completed = False
+        interrupted = False
+        capped = False
+        try:
+            for page, cards in paginator.iter_card_pages():
+                docs: List[Tuple[str, Dict]] = []
+                reused: Set[int] = set()
+                for raw in cards:
+                    key = str(raw["sku"])
+                    if seen is not None and key in seen:
+                        if self.batch_docs is not None and key in self.batch_docs:
+                            reused.add(len(docs))
+                            docs.append((key, self.batch_docs[key]))
+                        elif state:
+                            state.keep(key)
+                        continue
+                    with METRICS.timer("normalize_seconds"):
+                        docs.append((key, normalize_product(raw)))
+                    if max_products and visited + len(docs) >= max_products:
+                        capped = True
+                        break
+                visited += len(docs)
+                incomplete = {
+                    doc["url"]: i
+                    for i, (_, doc) in enumerate(docs)
+                    if i not in reused and doc.get("url") and not all(doc.get(f) for f in required)
+                }
+                if self.listing_follow_up and incomplete:
+                    for product_url, doc, err in iter_scraped(
+                        self.client,
+                        list(incomplete),
+                        concurrency=self.concurrency,
+                        parse_pool=self.parse_pool,
+                        max_page_bytes=self.max_page_bytes,
+                        stream_pages=self.stream_pages,
+                    ):
+                        if err is not None:
+                            logging.warning("PDP follow-up for %s failed (%s); keeping the listing card.", product_url, err)
+                            continue
+                        index = incomplete[product_url]
+                        docs[index] = (docs[index][0], doc)
+                        followed += 1
+                for key, doc in docs:
+                    self.maybe_log_stats()
+                    if self._emit(writer, key, doc, state, tag) is None:
+                        skipped += 1
+                    else:
+                        scraped += 1
+                logging.info(
+                    "Listing page %d: %d cards, %d incomplete%s", page, len(docs), len(incomplete),
+                    f", {followed} completed from PDPs so far" if self.listing_follow_up else "",
+                )
+                if capped:
+                    break
+            completed = True
+            if state and capped:
+                logging.info("Crawl capped at %d products; not reporting removed SKUs.", max_products)
+            elif state:
+                scraped += self._emit_removed(writer, state, tag)
+        except KeyboardInterrupt:
+            interrupted = True
+            logging.warning("Interrupted; shutting down.")
+        finally:
+            writer.close()
+            if state:
+                state.save(carry_forward=not completed or capped)
+        if state:
+            logging.info("Done. Wrote %d changes to %s (%d unchanged)", scraped, output_path, skipped)
+        else:
+            logging.info("Done. Wrote %d products to %s", scraped, output_path)
+        return CategoryResult(completed, interrupted, scraped)
@@ -0,0 +1,104 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+
+from .rate_limiter import TokenBucket
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt: int, backoff: float, throttle: Optional["AdaptiveThrottle"] = None, retry_after: Optional[float] = None) -> float:
+    """
+    How long a worker sleeps before retrying.
+
+    Without a throttle this is the classic linear backoff (or the server's
+    Retry-After). With one, the shared rate limiter already slows everyone
+    down, so workers only add full jitter to avoid retrying in lockstep.
+    """
+    if throttle is not None:
+        return random.uniform(0, backoff * attempt)
+    if retry_after is not None:
+        return retry_after
+    return backoff * attempt + random.uniform(0, 0.5)
+
+class AdaptiveThrottle:
+    """
+    AIMD controller for the shared TokenBucket.
+
+    Every block response (403/429) multiplies the request rate by `decrease`
+    (at most once per `decrease_interval_s`, so a burst of blocks seen by many
+    workers counts as one congestion event). Every success adds `increase`
+    times the configured rate back, up to that configured rate.
+    """
+
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        min_rate: Optional[float] = None,
+        decrease: float = 0.5,
+        increase: float = 0.02,
+        decrease_interval_s: float = 2.0,
+    ):
+        self.limiter = limiter
+        self.max_rate = limiter.rate
+        self.min_rate = min_rate if min_rate is not None else self.max_rate / 20.0
+        self.decrease = decrease
+        self.increase = increase
+        self.decrease_interval_s = decrease_interval_s
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._blocks: Deque[float] = deque()
+        self.requests = 0
+        self.retries = 0
+        self.block_total = 0
+
+    def on_success(self):
+        with self._lock:
+            self.requests += 1
+            if self.limiter.rate < self.max_rate:
+                self.limiter.set_rate(min(self.max_rate, self.limiter.rate + self.max_rate * self.increase))
+
+    def on_block(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.block_total += 1
+            self._blocks.append(now)
+            if now - self._last_decrease >= self.decrease_interval_s:
+                self._last_decrease = now
+                self.limiter.set_rate(max(self.min_rate, self.limiter.rate * self.decrease))
+        if retry_after:
+            # The server asked everyone using this identity to wait.
+            self.limiter.pause(retry_after)
+
+    def on_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            while self._blocks and now - self._blocks[0] > 60.0:
+                self._blocks.popleft()
+            return {
+                "rate": round(self.limiter.rate, 3),
+                "maxRate": round(self.max_rate, 3),
+                "blocksPerMin": len(self._blocks),
+                "blocks": self.block_total,
+                "retries": self.retries,
+                "requests": self.requests,
+            }
@@ -0,0 +1,56 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+from telemetry.metrics import METRICS
+
+def ordered_map(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    concurrency: int = 4,
+    window: Optional[int] = None,
+) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Run `fn` over `items` on a bounded thread pool.
+
+    Yields `(item, result, error)` tuples in the same order as `items`, so the
+    output of a concurrent crawl is identical to the serial one. At most
+    `window` items (default `2 * concurrency`) are in flight at a time, which
+    keeps the upstream iterator lazy and memory bounded.
+    """
+    concurrency = max(1, int(concurrency))
+    window = max(concurrency, int(window or concurrency * 2))
+
+    if concurrency == 1:
+        for item in items:
+            try:
+                yield item, fn(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    pending: Deque[Tuple[Any, Future]] = deque()
+    it = iter(items)
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch") as pool:
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((item, pool.submit(fn, item)))
+                if not pending:
+                    break
+                METRICS.set("queue_depth", len(pending), queue="fetch")
+                item, fut = pending.popleft()
+                try:
+                    yield item, fut.result(), None
+                except Exception as e:
+                    yield item, None, e
+        finally:
+            # Consumer stopped early (or crashed): drop work that has not started.
+            for _, fut in pending:
+                fut.cancel()
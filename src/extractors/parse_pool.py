@@ -0,0 +1,175 @@
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from telemetry.metrics import METRICS
+
+from . import rules as extraction_rules
+from .product_parser import parse_product_from_html
+from .schema_normalizer import normalize_product
+
+def _init_worker(rule_overrides: Optional[Mapping[str, Any]] = None):
+    # Ctrl-C is handled by the parent, which cancels pending chunks and shuts the pool down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if rule_overrides:
+        extraction_rules.configure(rule_overrides)
+
+def parse_and_normalize(html: Union[str, bytes], url: Optional[str] = None) -> Dict[str, Any]:
+    return normalize_product(parse_product_from_html(html, url=url))
+
+def _parse_chunk(
+    chunk: List[Tuple[Optional[str], Union[str, bytes]]]
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str], float, float]]:
+    """Returns `(doc, error, parse_seconds, normalize_seconds)` per page; timings feed the parent's metrics."""
+    out = []
+    for url, html in chunk:
+        t0 = time.perf_counter()
+        try:
+            raw = parse_product_from_html(html, url=url)
+            t1 = time.perf_counter()
+            out.append((normalize_product(raw), None, t1 - t0, time.perf_counter() - t1))
+        except Exception as e:
+            out.append((None, f"{type(e).__name__}: {e}", time.perf_counter() - t0, 0.0))
+    return out
+
+# Marks the end of the input on the feeder queue; carries the input's exception, if any.
+_END = object()
+
+class ParsePool:
+    """
+    Process pool for the CPU-bound parse + normalize stage.
+
+    Pages are submitted in chunks of `chunksize` to amortize pickling, with at
+    most `max_pending` chunks in flight so the fetchers cannot run arbitrarily
+    far ahead. A partial chunk is submitted once no page has arrived for
+    `linger_s`, and finished chunks are yielded as soon as they are done, so a
+    slow producer never holds parsed pages back. Results are yielded in
+    submission order. `rule_overrides` are installed in every worker with
+    extractors.rules.configure.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunksize: int = 8,
+        max_pending: Optional[int] = None,
+        rule_overrides: Optional[Mapping[str, Any]] = None,
+        linger_s: float = 0.05,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self.max_pending = max_pending or self.workers * 2
+        self.linger_s = linger_s
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(rule_overrides,))
+
+    def imap(
+        self, items: Iterable[Tuple[Any, Optional[str], Optional[Union[str, bytes]]]]
+    ) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[BaseException]]]:
+        """
+        Consume `(item, url, html)` triples and yield `(item, doc, error)`.
+
+        `item` never leaves this process; only `url` and `html` are pickled.
+        A triple whose `html` is None is not parsed and comes back as
+        `(item, None, None)` in its place in the order. `items` is read on a
+        feeder thread, so it may block (e.g. on fetches) without holding back
+        results that are already parsed.
+        """
+        feed: "queue.Queue" = queue.Queue(maxsize=self.chunksize * 2)
+        stop = threading.Event()
+
+        def put(entry) -> bool:
+            while not stop.is_set():
+                try:
+                    feed.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feeder():
+            error = None
+            try:
+                for entry in items:
+                    if not put(entry):
+                        break
+            except BaseException as e:
+                error = e
+            finally:
+                close = getattr(items, "close", None)
+                if close is not None:
+                    close()
+            put((_END, error))
+
+        # Each pending entry is the chunk's `(item, parsed)` keys and its future (None when nothing in it is parsed).
+        pending: Deque[Tuple[List[Tuple[Any, bool]], Optional[Future]]] = deque()
+        keys: List[Tuple[Any, bool]] = []
+        chunk: List[Tuple[Optional[str], Union[str, bytes]]] = []
+
+        def submit():
+            nonlocal keys, chunk
+            if keys:
+                pending.append((keys, self._pool.submit(_parse_chunk, chunk) if chunk else None))
+                keys, chunk = [], []
+
+        def drain_one():
+            chunk_keys, fut = pending.popleft()
+            METRICS.set("queue_depth", len(pending), queue="parse")
+            results = iter(fut.result() if fut is not None else ())
+            for key, parsed in chunk_keys:
+                if not parsed:
+                    yield key, None, None
+                    continue
+                doc, err, parse_s, normalize_s = next(results)
+                if METRICS.enabled:
+                    METRICS.observe("parse_seconds", parse_s)
+                    if err is None:
+                        METRICS.observe("normalize_seconds", normalize_s)
+                yield key, doc, (RuntimeError(err) if err else None)
+
+        thread = threading.Thread(target=feeder, name="parse-feed", daemon=True)
+        thread.start()
+        try:
+            while True:
+                try:
+                    entry = feed.get(timeout=self.linger_s if keys or pending else None)
+                except queue.Empty:
+                    # The input stalled: send what we have instead of waiting for a full chunk.
+                    submit()
+                else:
+                    if entry[0] is _END:
+                        if entry[1] is not None:
+                            raise entry[1]
+                        break
+                    item, url, html = entry
+                    keys.append((item, html is not None))
+                    if html is not None:
+                        chunk.append((url, html))
+                    if len(chunk) >= self.chunksize or len(keys) >= self.chunksize * 4:
+                        submit()
+                while pending and (pending[0][1] is None or pending[0][1].done()):
+                    yield from drain_one()
+                while len(pending) >= self.max_pending:
+                    yield from drain_one()
+            submit()
+            while pending:
+                yield from drain_one()
+        finally:
+            # Consumer stopped early (or crashed): the feeder stops reading and closes the input.
+            stop.set()
+
+    def close(self, cancel: bool = False):
+        if cancel:
+            logging.info("Cancelling pending parse chunks.")
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
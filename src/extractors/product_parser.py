@@ -1,17 +1,41 @@
 import json
 import re
-from typing import Any, Dict, Optional
+from html import unescape
+from typing import Any, Dict, Iterable, List, Optional, Union
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
-def _parse_ld_json(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
-    """Extract the most relevant product JSON-LD block."""
+from .rules import ExtractionRules, active_rules
+
+# Cheap pre-DOM scanners. PDPs are 1-2 MB and the JSON-LD block usually carries
+# everything we need, so these run first and the DOM is only built when a
+# field is still missing afterwards.
+_LD_SCRIPT_RE = re.compile(r"<script\b[^>]*\btype\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script\s*>", re.I | re.S)
+_IMG_SRC_RE = re.compile(r"<img\b[^>]*?\bsrc\s*=\s*[\"']([^\"']+)[\"']", re.I)
+_LD_SCRIPT_RE_B = re.compile(_LD_SCRIPT_RE.pattern.encode(), re.I | re.S)
+_IMG_SRC_RE_B = re.compile(_IMG_SRC_RE.pattern.encode(), re.I)
+
+_SKU_ID_RE = re.compile(r"skuId=(\d+)")
+_META_CHARSET_RE_B = re.compile(rb"<meta\b[^>]*charset", re.I)
+
+# libxml2 assumes Latin-1 for bytes without a declared charset; BestBuy serves UTF-8.
+_UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# Fields that, once present, make the DOM fallback unnecessary.
+_COMPLETE_FIELDS = ("name", "sku", "image", "aggregateRating", "offers", "description")
+
+def sku_from_url(url: Optional[str]) -> Optional[str]:
+    """SKU from a PDP URL such as ... .p?skuId=6452968"""
+    if not url:
+        return None
+    m = _SKU_ID_RE.search(url)
+    return m.group(1) if m else None
+
+def _select_ld(blocks: Iterable[Any]) -> Optional[Dict[str, Any]]:
+    """Pick the most relevant product block out of decoded JSON-LD payloads."""
     candidates = []
-    for script in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(script.text.strip())
-        except Exception:
-            continue
+    for data in blocks:
         # Sometimes wrapped in a list
         if isinstance(data, list):
             for item in data:
@@ -30,64 +54,77 @@ def _parse_ld_json(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
             return c
     return candidates[0] if candidates else None
 
-def _text(soup: BeautifulSoup, selector: str) -> Optional[str]:
-    el = soup.select_one(selector)
-    return el.get_text(strip=True) if el else None
+def _load_ld_blocks(texts: Iterable[Union[str, bytes]]) -> List[Any]:
+    blocks = []
+    for text in texts:
+        try:
+            blocks.append(json.loads(text.strip()))
+        except Exception:
+            continue
+    return blocks
+
+def _scan_ld_json(html: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Extract the product JSON-LD block without building a DOM."""
+    pattern = _LD_SCRIPT_RE_B if isinstance(html, bytes) else _LD_SCRIPT_RE
+    return _select_ld(_load_ld_blocks(pattern.findall(html)))
+
+def _scan_gallery(html: Union[str, bytes]) -> List[str]:
+    """Collect bbystatic.com image URLs from <img src> attributes, in page order."""
+    if isinstance(html, bytes):
+        found = (unescape(m.decode("utf-8", "replace")) for m in _IMG_SRC_RE_B.findall(html) if b"bbystatic.com" in m)
+    else:
+        found = (unescape(m) for m in _IMG_SRC_RE.findall(html) if "bbystatic.com" in m)
+    return list(dict.fromkeys(found))
 
-def parse_product_from_html(html: str, url: Optional[str] = None) -> Dict[str, Any]:
+class LdProductWatch:
     """
-    Parse raw product details from a BestBuy PDP HTML.
-    Attempts JSON-LD first; falls back to DOM extraction heuristics.
+    Stop condition for streamed PDP fetches: called with the growing body,
+    returns True once it holds a JSON-LD Product block that has every field
+    the DOM fallback would otherwise look for. Only the bytes after the last
+    closed block are rescanned on each call.
     """
-    soup = BeautifulSoup(html, "lxml")
-    data: Dict[str, Any] = {"url": url} if url else {}
 
-    ld = _parse_ld_json(soup)
-    if ld:
-        data.update(ld)
+    def __init__(self):
+        self._buf: Optional[bytearray] = None
+        self._pos = 0
 
-    # Fallback / enrichments
-    name = data.get("name") or _text(soup, "h1, h1.sku-title, div.sku-title h1")
-    if name:
-        data["name"] = name
-
-    # Extract SKU from URL or page
-    if "sku" not in data or not data.get("sku"):
-        # URL pattern ... .p?skuId=6452968
-        if url:
-            m = re.search(r"skuId=(\d+)", url)
-            if m:
-                data["sku"] = m.group(1)
-        if "sku" not in data:
-            # try DOM
-            sku_dom = _text(soup, '[data-sku-id], .sku.product-data, .sku-value')
-            if sku_dom:
-                m = re.search(r"(\d{6,})", sku_dom)
-                if m:
-                    data["sku"] = m.group(1)
-
-    # Primary image
-    if not data.get("image"):
-        img = soup.select_one('img.primary-image, img#main-image, img[src*="bbystatic.com"]')
-        if img and img.get("src"):
-            data["image"] = img["src"]
+    def __call__(self, buf: bytearray) -> bool:
+        if buf is not self._buf:
+            # A retried request starts a new buffer.
+            self._buf, self._pos = buf, 0
+        for m in _LD_SCRIPT_RE_B.finditer(buf, self._pos):
+            self._pos = m.end()
+            ld = _select_ld(_load_ld_blocks([m.group(1)]))
+            if ld and ld.get("@type") == "Product" and all(ld.get(f) for f in _COMPLETE_FIELDS):
+                return True
+        return False
 
-    # Gallery images
-    images = set()
-    for img in soup.select("img[src]"):
-        src = img["src"]
-        if "bbystatic.com" in src:
-            images.add(src)
-    if images:
-        existing = data.get("image")
-        if existing:
-            images.add(existing)
-        data["images"] = list(images)
+def _parse_dom(html: Union[str, bytes]):
+    """lxml tree for the DOM fallback, parsed straight from bytes when possible; None for an empty page."""
+    if not html or not html.strip():
+        return None
+    try:
+        if isinstance(html, bytes) and not _META_CHARSET_RE_B.search(html, 0, 4096):
+            return lxml.html.document_fromstring(html, parser=_UTF8_PARSER)
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"), parser=_UTF8_PARSER)
+    except etree.ParserError:
+        return None
+
+def _fill_from_dom(tree, data: Dict[str, Any], rules: ExtractionRules):
+    """DOM extraction rules (see extractors.rules) for fields the JSON-LD block did not provide."""
+    for field in ("name", "sku", "image", "description"):
+        if not data.get(field):
+            value = rules.first(tree, field)
+            if value:
+                data[field] = value
 
     # Ratings
     if not data.get("aggregateRating"):
-        rating_value = _text(soup, '[itemprop="ratingValue"], .c-reviews-v4 .average-rating')
-        review_count = _text(soup, '[itemprop="reviewCount"], .c-reviews-v4 .count')
+        rating_value = rules.first(tree, "ratingValue")
+        review_count = rules.first(tree, "reviewCount")
         if rating_value or review_count:
             data["aggregateRating"] = {
                 "ratingValue": rating_value,
@@ -96,34 +133,54 @@ def parse_product_from_html(html: str, url: Optional[str] = None) -> Dict[str, A
 
     # Offers (fallback if LD missing)
     if not data.get("offers"):
-        price_text = _text(soup, ".priceView-hero-price span, .priceView-customer-price span, [itemprop='price']")
-        orig_text = _text(soup, ".pricing-price__regular-price, .priceView-hero-price__regular-price")
+        price = rules.first(tree, "price")
+        original = rules.first(tree, "regularPrice")
         offers = {
             "priceCurrency": "USD",
             "seller": {"name": "Best Buy"},
         }
-        if price_text:
-            # keep numeric with dot
-            m = re.search(r"([0-9]+\.[0-9]{2})", price_text.replace(",", ""))
-            if m:
-                offers["lowPrice"] = m.group(1)
-                offers["highPrice"] = m.group(1)
-        if orig_text:
-            m = re.search(r"([0-9]+\.[0-9]{2})", orig_text.replace(",", ""))
-            if m:
-                offers.setdefault("offers", [])
-                offers["offers"].append(
-                    {"priceCurrency": "USD", "price": m.group(1), "itemCondition": "NewCondition", "description": "Original"}
-                )
+        if price:
+            offers["lowPrice"] = price
+            offers["highPrice"] = price
+        if original:
+            offers["offers"] = [
+                {"priceCurrency": "USD", "price": original, "itemCondition": "NewCondition", "description": "Original"}
+            ]
         if offers.keys() - {"priceCurrency", "seller"}:
             data["offers"] = offers
 
-    # Description
-    if not data.get("description"):
-        desc = _text(soup, "meta[name='description']") or _text(soup, "div.shop-product-description")
-        if not desc and (meta := soup.find("meta", {"name": "description"})):
-            desc = meta.get("content")
-        if desc:
-            data["description"] = desc
+def parse_product_from_html(
+    html: Union[str, bytes], url: Optional[str] = None, rules: Optional[ExtractionRules] = None
+) -> Dict[str, Any]:
+    """
+    Parse raw product details from a BestBuy PDP HTML.
+    Attempts JSON-LD first; falls back to the DOM extraction rules (`rules`,
+    default: the table installed with extractors.rules.configure) only for
+    the fields JSON-LD left empty.
+    """
+    data: Dict[str, Any] = {"url": url} if url else {}
+
+    ld = _scan_ld_json(html)
+    if ld:
+        data.update(ld)
+
+    if not data.get("sku"):
+        sku = sku_from_url(url)
+        if sku:
+            data["sku"] = sku
+
+    # Gallery images
+    images = _scan_gallery(html)
+
+    if any(not data.get(f) for f in _COMPLETE_FIELDS):
+        tree = _parse_dom(html)
+        if tree is not None:
+            _fill_from_dom(tree, data, rules or active_rules())
+
+    if images:
+        existing = data.get("image")
+        if isinstance(existing, str) and existing not in images:
+            images.append(existing)
+        data["images"] = images
 
-    return data
\ No newline at end of file
+    return data
@@ -0,0 +1,109 @@
+import re
+from typing import Any, Dict, List, Mapping, Optional, Pattern, Tuple
+
+from lxml import etree
+
+RuleSpec = Mapping[str, Any]
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# DOM fallback rules: field -> XPath candidates tried in order (a `|` union
+# inside one candidate matches in document order), plus an optional regex
+# whose first group becomes the value. Element matches yield their stripped
+# text, attribute or text() matches yield the string itself. Equivalent to
+# the CSS selectors
+#   h1, h1.sku-title, div.sku-title h1
+#   [data-sku-id], .sku.product-data, .sku-value
+#   img.primary-image, img#main-image, img[src*="bbystatic.com"]
+#   [itemprop="ratingValue"], .c-reviews-v4 .average-rating
+#   [itemprop="reviewCount"], .c-reviews-v4 .count
+#   .priceView-hero-price span, .priceView-customer-price span, [itemprop='price']
+#   .pricing-price__regular-price, .priceView-hero-price__regular-price
+#   div.shop-product-description, meta[name='description'][content]
+DEFAULT_RULES: Dict[str, Dict[str, Any]] = {
+    "name": {"xpath": f"//h1 | //h1[{_has_class('sku-title')}] | //div[{_has_class('sku-title')}]//h1"},
+    "sku": {
+        "xpath": f"//*[@data-sku-id] | //*[{_has_class('sku')} and {_has_class('product-data')}] | //*[{_has_class('sku-value')}]",
+        "regex": r"(\d{6,})",
+    },
+    "image": {
+        "xpath": f"(//img[{_has_class('primary-image')}] | //img[@id='main-image'] | //img[contains(@src, 'bbystatic.com')])/@src",
+    },
+    "ratingValue": {
+        "xpath": f"//*[@itemprop='ratingValue'] | //*[{_has_class('c-reviews-v4')}]//*[{_has_class('average-rating')}]",
+    },
+    "reviewCount": {"xpath": f"//*[@itemprop='reviewCount'] | //*[{_has_class('c-reviews-v4')}]//*[{_has_class('count')}]"},
+    "price": {
+        "xpath": f"//*[{_has_class('priceView-hero-price')}]//span | //*[{_has_class('priceView-customer-price')}]//span | //*[@itemprop='price']",
+        "regex": r"([0-9]+\.[0-9]{2})",
+    },
+    "regularPrice": {
+        "xpath": f"//*[{_has_class('pricing-price__regular-price')}] | //*[{_has_class('priceView-hero-price__regular-price')}]",
+        "regex": r"([0-9]+\.[0-9]{2})",
+    },
+    "description": {
+        "xpath": [f"//div[{_has_class('shop-product-description')}]", "//meta[@name='description']/@content"],
+    },
+}
+
+def _element_text(el: Any) -> str:
+    # Same as BeautifulSoup's get_text(strip=True): every text node stripped, then joined.
+    return "".join(t.strip() for t in el.itertext())
+
+class ExtractionRules:
+    """
+    The DOM fallback's field rules with every XPath and regex compiled once.
+
+    `overrides` (e.g. settings.extractionRules) replace the default rule of
+    the fields they name; `{"xpath": ..., "regex": ...}` with `xpath` a string
+    or a list of candidates. A regex is matched against the value with
+    thousands separators removed.
+    """
+
+    def __init__(self, overrides: Optional[Mapping[str, RuleSpec]] = None):
+        specs = dict(DEFAULT_RULES)
+        specs.update(overrides or {})
+        self.specs = specs
+        self._compiled: Dict[str, Tuple[List[etree.XPath], Optional[Pattern]]] = {}
+        for field, spec in specs.items():
+            xpaths = spec.get("xpath") or []
+            if isinstance(xpaths, str):
+                xpaths = [xpaths]
+            try:
+                compiled = [etree.XPath(x) for x in xpaths]
+            except etree.XPathSyntaxError as e:
+                raise ValueError(f"Invalid XPath for extraction rule {field!r}: {e}") from None
+            regex = re.compile(spec["regex"]) if spec.get("regex") else None
+            self._compiled[field] = (compiled, regex)
+
+    def first(self, tree: Any, field: str) -> Optional[str]:
+        """Value of the first candidate that matches `tree`, or None."""
+        rule = self._compiled.get(field)
+        if rule is None or tree is None:
+            return None
+        xpaths, regex = rule
+        for xpath in xpaths:
+            for match in xpath(tree):
+                value = match.strip() if isinstance(match, str) else _element_text(match)
+                if not value:
+                    # Like select_one(): the first match decides, even when it is empty.
+                    break
+                if regex is None:
+                    return value
+                m = regex.search(value.replace(",", ""))
+                if m:
+                    return m.group(1)
+                break
+        return None
+
+_ACTIVE = ExtractionRules()
+
+def configure(overrides: Optional[Mapping[str, RuleSpec]] = None) -> ExtractionRules:
+    """Install the rule table used by parse_product_from_html (defaults plus `overrides`)."""
+    global _ACTIVE
+    _ACTIVE = ExtractionRules(overrides)
+    return _ACTIVE
+
+def active_rules() -> ExtractionRules:
+    return _ACTIVE
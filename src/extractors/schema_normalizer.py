@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 def _as_float(val) -> Optional[float]:
     try:
@@ -25,7 +25,22 @@ def _norm_aggregate_rating(obj: Any) -> Dict[str, Any]:
     count = obj.get("reviewCount") or obj.get("ratingCount") or obj.get("reviewcount")
     return {"ratingValue": str(rating) if rating is not None else None, "reviewCount": str(count) if count is not None else None}
 
-def _norm_offers(obj: Any) -> Dict[str, Any]:
+# Raw price value → "%.2f" text, or None when unparseable.
+PriceMemo = Dict[Any, Optional[str]]
+
+_MISSING = object()
+
+def _price(val: Any, memo: PriceMemo) -> Optional[str]:
+    """Parse and format a price once; repeats (carrier plans often share prices) hit `memo`."""
+    if not isinstance(val, (str, int, float)):
+        return None
+    text = memo.get(val, _MISSING)
+    if text is _MISSING:
+        num = _as_float(val)
+        text = memo[val] = f"{num:.2f}" if num is not None else None
+    return text
+
+def _norm_offers(obj: Any, memo: PriceMemo) -> Dict[str, Any]:
     """
     Normalize offers to:
     {
@@ -37,31 +52,38 @@ def _norm_offers(obj: Any) -> Dict[str, Any]:
     """
     if not obj:
         return {}
+    memo_get = memo.get
     result: Dict[str, Any] = {"priceCurrency": "USD", "seller": {"name": "Best Buy"}}
     if isinstance(obj, dict):
-        result["priceCurrency"] = obj.get("priceCurrency") or obj.get("pricecurrency") or result["priceCurrency"]
+        currency = obj.get("priceCurrency") or obj.get("pricecurrency") or result["priceCurrency"]
+        result["priceCurrency"] = currency
         seller = obj.get("seller")
         if seller:
             if isinstance(seller, dict):
                 result["seller"] = {"name": seller.get("name")}
             elif isinstance(seller, str):
                 result["seller"] = {"name": seller}
-        low = _as_float(obj.get("lowPrice") or obj.get("lowprice") or obj.get("price"))
-        high = _as_float(obj.get("highPrice") or obj.get("highprice") or obj.get("price"))
+        low = _price(obj.get("lowPrice") or obj.get("lowprice") or obj.get("price"), memo)
+        high = _price(obj.get("highPrice") or obj.get("highprice") or obj.get("price"), memo)
         if low is not None:
-            result["lowPrice"] = f"{low:.2f}"
+            result["lowPrice"] = low
         if high is not None:
-            result["highPrice"] = f"{high:.2f}"
+            result["highPrice"] = high
         items: List[Dict[str, Any]] = []
+        # Item prices as rounded to cents, for tightening the bounds below.
+        prices: List[float] = []
         raw_items = obj.get("offers") or obj.get("items") or []
         if isinstance(raw_items, dict):
             raw_items = [raw_items]
         for it in raw_items:
             if not isinstance(it, dict):
                 continue
+            price = _price(it.get("price"), memo)
+            if price is not None:
+                prices.append(float(price))
             item = {
-                "priceCurrency": it.get("priceCurrency") or result["priceCurrency"],
-                "price": f"{_as_float(it.get('price')):.2f}" if _as_float(it.get("price")) is not None else None,
+                "priceCurrency": it.get("priceCurrency") or currency,
+                "price": price,
                 "availability": it.get("availability") or it.get("availabilityStatus"),
                 "itemCondition": it.get("itemCondition"),
                 "description": it.get("description") or it.get("name"),
@@ -69,24 +91,29 @@ def _norm_offers(obj: Any) -> Dict[str, Any]:
             nested = it.get("offers")
             if nested and isinstance(nested, list):
                 # Nested carrier/plan breakdowns
-                item["offers"] = []
+                # Hottest loop (phones carry dozens of plans): memo lookup inlined.
+                sub: List[Dict[str, Any]] = []
                 for n in nested:
                     if not isinstance(n, dict):
                         continue
-                    item["offers"].append(
+                    n_price = n.get("price")
+                    text = memo_get(n_price, _MISSING) if isinstance(n_price, (str, int, float)) else None
+                    if text is _MISSING:
+                        text = _price(n_price, memo)
+                    sub.append(
                         {
-                            "priceCurrency": n.get("priceCurrency") or result["priceCurrency"],
-                            "price": f"{_as_float(n.get('price')):.2f}" if _as_float(n.get("price")) is not None else None,
+                            "priceCurrency": n.get("priceCurrency") or currency,
+                            "price": text,
                             "itemCondition": n.get("itemCondition"),
                             "description": n.get("description") or n.get("name"),
                         }
                     )
+                item["offers"] = sub
             items.append(item)
         if items:
             result["offers"] = items
             result["offercount"] = len(items)
             # tighten bounds if possible
-            prices = [_as_float(i.get("price")) for i in items if _as_float(i.get("price")) is not None]
             if prices:
                 result["lowPrice"] = f"{min(prices):.2f}"
                 result["highPrice"] = f"{max(prices):.2f}"
@@ -120,12 +147,15 @@ def normalize_product(raw: Dict[str, Any]) -> Dict[str, Any]:
     """
     Map a raw product dict (from parser) into the target schema.
     """
+    return _normalize(raw, {})
+
+def _normalize(raw: Dict[str, Any], memo: PriceMemo) -> Dict[str, Any]:
     if not isinstance(raw, dict):
         return {}
 
     brand = _norm_brand(raw.get("brand"))
     aggregate = _norm_aggregate_rating(raw.get("aggregateRating"))
-    offers = _norm_offers(raw.get("offers"))
+    offers = _norm_offers(raw.get("offers"), memo)
 
     # Prefer explicit fields if present; else try common alternatives.
     name = raw.get("name")
@@ -155,4 +185,14 @@ def normalize_product(raw: Dict[str, Any]) -> Dict[str, Any]:
     }
 
     # Remove empty keys to keep output clean
-    return {k: v for k, v in doc.items() if v not in (None, "", [], {})}
\ No newline at end of file
+    return {k: v for k, v in doc.items() if v not in (None, "", [], {})}
+
+def normalize_products(batch: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize many raw products at once; output matches `normalize_product`
+    record for record. One price memo serves the whole batch, so each
+    distinct price is parsed once per batch rather than once per record.
+    """
+    memo: PriceMemo = {}
+    normalize = _normalize
+    return [normalize(raw, memo) for raw in batch]
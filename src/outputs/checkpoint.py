@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .dataset_adapter import ensure_parent_dir
+
+CHECKPOINT_VERSION = 1
+
+class Checkpoint:
+    """
+    Periodic crawl checkpoint: listing page, completed product keys and the
+    output byte offset that corresponds to them.
+
+    Saved atomically (write + rename) so a crash mid-save leaves the previous
+    checkpoint intact.
+    """
+
+    def __init__(self, path: str, category_url: str, output_path: str):
+        self.path = path
+        self.category_url = category_url
+        self.output_path = output_path
+        self.page = 1
+        self.completed: Set[str] = set()
+        self.offset: Optional[int] = None
+        self.scraped = 0
+
+    @classmethod
+    def load(cls, path: str, category_url: str, output_path: str) -> "Checkpoint":
+        ckpt = cls(path, category_url, output_path)
+        with open(path, "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {data.get('version')!r} in {path}")
+        if data.get("categoryUrl") != category_url or data.get("outputPath") != output_path:
+            raise ValueError(f"Checkpoint {path} belongs to a different crawl ({data.get('categoryUrl')} → {data.get('outputPath')})")
+        ckpt.page = int(data.get("page", 1))
+        ckpt.completed = set(data.get("completed", []))
+        ckpt.offset = data.get("offset")
+        ckpt.scraped = int(data.get("scraped", 0))
+        return ckpt
+
+    def save(self, page: int, offset: int, scraped: int, completed: Optional[Iterable[str]] = None):
+        self.page = page
+        self.offset = offset
+        self.scraped = scraped
+        if completed is not None:
+            self.completed = set(completed)
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "categoryUrl": self.category_url,
+            "outputPath": self.output_path,
+            "page": self.page,
+            "offset": self.offset,
+            "scraped": self.scraped,
+            "completed": sorted(self.completed),
+            "savedAt": time.time(),
+        }
+        ensure_parent_dir(self.path)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        logging.debug("Checkpoint saved: page %d, %d completed, offset %d", page, len(self.completed), offset)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class BatchCheckpoint:
+    """
+    Progress of a multi-category batch: categories already finished and the
+    serialized seen-set of SKUs crawled so far (so a resumed batch still
+    fetches each PDP once).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.seen: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "BatchCheckpoint":
+        ckpt = cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {data.get('version')!r} in {path}")
+        ckpt.done = set(data.get("done", []))
+        ckpt.seen = data.get("seen")
+        return ckpt
+
+    def save(self):
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "done": sorted(self.done),
+            "seen": self.seen,
+            "savedAt": time.time(),
+        }
+        ensure_parent_dir(self.path)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,6 +1,40 @@
 import os
+from typing import Any, Optional
+
+OUTPUT_FORMATS = ("jsonl", "parquet")
 
 def ensure_parent_dir(path: str):
     parent = os.path.dirname(os.path.abspath(path))
     if parent and not os.path.exists(parent):
-        os.makedirs(parent, exist_ok=True)
\ No newline at end of file
+        os.makedirs(parent, exist_ok=True)
+
+def output_format_for(path: str, fmt: Optional[str] = None) -> str:
+    """Explicit `fmt` wins; otherwise .parquet/.pq means Parquet and anything else JSONL."""
+    if fmt:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}; expected one of {OUTPUT_FORMATS}")
+        return fmt
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "jsonl"
+
+def open_writer(path: str, fmt: Optional[str] = None, append: bool = False, truncate_at: Optional[int] = None, **opts: Any):
+    """
+    Open the output writer for `path`. JSONL options (flush_every, fsync,
+    encoder) and Parquet options (row_group_size) are picked from `opts`.
+    """
+    ensure_parent_dir(path)
+    if output_format_for(path, fmt) == "parquet":
+        if append:
+            raise ValueError("Parquet outputs cannot be appended to or resumed")
+        from .writer_parquet import ParquetWriter
+
+        return ParquetWriter(path, row_group_size=int(opts.get("row_group_size", 5000)))
+    from .writer_jsonl import JsonlWriter
+
+    return JsonlWriter(
+        path,
+        append=append,
+        truncate_at=truncate_at,
+        flush_every=int(opts.get("flush_every", 100)),
+        fsync=bool(opts.get("fsync", False)),
+        encoder=opts.get("encoder", "json"),
+    )
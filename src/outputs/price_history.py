@@ -0,0 +1,283 @@
+"""
+Embedded price history: every crawl's normalized offers, keyed by (sku, ts).
+
+    python src/outputs/price_history.py data/prices.sqlite latest 6452968 6501234
+    python src/outputs/price_history.py data/prices.sqlite at 6452968 2024-11-29T00:00
+    python src/outputs/price_history.py data/prices.sqlite history 6452968 [--since 2024-11-01]
+    python src/outputs/price_history.py data/prices.sqlite drops [--run 12] [--limit 20] [--by percent]
+
+Query output is one JSON object per line.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    category TEXT,
+    invocation INTEGER
+);
+CREATE TABLE IF NOT EXISTS prices (
+    sku TEXT NOT NULL,
+    ts REAL NOT NULL,
+    run_id INTEGER NOT NULL,
+    currency TEXT,
+    low_price REAL,
+    high_price REAL,
+    availability TEXT,
+    offers TEXT,
+    PRIMARY KEY (sku, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_run ON prices (run_id);
+"""
+
+_COLUMNS = "sku, ts, run_id, currency, low_price, high_price, availability, offers"
+
+class PricePoint(NamedTuple):
+    sku: str
+    ts: float
+    run_id: int
+    currency: Optional[str]
+    low_price: Optional[float]
+    high_price: Optional[float]
+    availability: Optional[str]
+    # Per-condition offers: [{"description", "itemCondition", "price", "availability"}]
+    offers: List[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._asdict(), time=_iso(self.ts))
+
+class PriceDrop(NamedTuple):
+    sku: str
+    previous: float
+    current: float
+    drop: float
+    percent: float
+    previous_ts: float
+    ts: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._asdict(), previousTime=_iso(self.previous_ts), time=_iso(self.ts))
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).astimezone().isoformat(timespec="seconds")
+
+def _price(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def _point(row) -> PricePoint:
+    return PricePoint(*row[:7], json.loads(row[7]) if row[7] else [])
+
+class PriceHistory:
+    """
+    Append-only price observations in SQLite, clustered on (sku, ts) so
+    "latest" and "as of T" are single index seeks regardless of how many
+    observations are stored.
+
+    Each category crawl is a run (`start_run()`); `record()` stores one
+    normalized product's offers. The runs started through one PriceHistory
+    (one runner invocation, e.g. a whole batch) share an invocation id: the
+    id of its first run. Writes are committed every `commit_every` records
+    and on `close()`.
+    """
+
+    def __init__(self, path: str, commit_every: int = 500):
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self._pending = 0
+        self._last_ts = 0.0
+        self._invocation: Optional[int] = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        if "invocation" not in {row[1] for row in self._db.execute("PRAGMA table_info(runs)")}:
+            # Databases from before invocations: each old run counts as its own.
+            self._db.execute("ALTER TABLE runs ADD COLUMN invocation INTEGER")
+
+    def start_run(self, category: Optional[str] = None, started_at: Optional[float] = None) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO runs (started_at, category, invocation) VALUES (?, ?, ?)",
+                (started_at or time.time(), category, self._invocation),
+            )
+            if self._invocation is None:
+                self._invocation = cur.lastrowid
+                self._db.execute("UPDATE runs SET invocation = id WHERE id = ?", (cur.lastrowid,))
+            self._db.commit()
+            return cur.lastrowid
+
+    def record(self, doc: Dict[str, Any], run_id: int, ts: Optional[float] = None) -> bool:
+        """Store the offers of a normalized product; False if it has no SKU or offers."""
+        sku = doc.get("sku")
+        offers = doc.get("offers")
+        if not sku or not isinstance(offers, dict):
+            return False
+        items = [o for o in offers.get("offers") or [] if isinstance(o, dict)]
+        conditions = [
+            {k: o[k] for k in ("description", "itemCondition", "price", "availability") if o.get(k) is not None} for o in items
+        ]
+        availability = next((o["availability"] for o in items if o.get("availability")), None)
+        with self._lock:
+            if ts is None:
+                # Strictly increasing, so two records in the same clock tick keep distinct keys.
+                ts = self._last_ts = max(time.time(), self._last_ts + 1e-6)
+            self._db.execute(
+                f"INSERT OR REPLACE INTO prices ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(sku),
+                    ts,
+                    run_id,
+                    offers.get("priceCurrency"),
+                    _price(offers.get("lowPrice")),
+                    _price(offers.get("highPrice")),
+                    availability,
+                    json.dumps(conditions, ensure_ascii=False, separators=(",", ":")) if conditions else None,
+                ),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+        return True
+
+    def record_many(self, docs: Iterable[Dict[str, Any]], run_id: int) -> int:
+        return sum(self.record(doc, run_id) for doc in docs)
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def latest(self, sku: str) -> Optional[PricePoint]:
+        rows = self._query(f"SELECT {_COLUMNS} FROM prices WHERE sku = ? ORDER BY ts DESC LIMIT 1", (sku,))
+        return _point(rows[0]) if rows else None
+
+    def at(self, sku: str, ts: float) -> Optional[PricePoint]:
+        """The observation in effect at `ts`: the last one at or before it."""
+        rows = self._query(f"SELECT {_COLUMNS} FROM prices WHERE sku = ? AND ts <= ? ORDER BY ts DESC LIMIT 1", (sku, ts))
+        return _point(rows[0]) if rows else None
+
+    def history(self, sku: str, since: Optional[float] = None, until: Optional[float] = None) -> List[PricePoint]:
+        rows = self._query(
+            f"SELECT {_COLUMNS} FROM prices WHERE sku = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (sku, since if since is not None else float("-inf"), until if until is not None else float("inf")),
+        )
+        return [_point(row) for row in rows]
+
+    def last_run_id(self) -> Optional[int]:
+        """The most recent run that recorded at least one price."""
+        rows = self._query("SELECT MAX(run_id) FROM prices")
+        return rows[0][0] if rows else None
+
+    def last_invocation_runs(self) -> List[int]:
+        """Every run of the invocation that recorded the most recent run's prices."""
+        last = self.last_run_id()
+        if last is None:
+            return []
+        rows = self._query(
+            "SELECT id FROM runs WHERE COALESCE(invocation, id) = (SELECT COALESCE(invocation, id) FROM runs WHERE id = ?) ORDER BY id",
+            (last,),
+        )
+        return [row[0] for row in rows] or [last]
+
+    def drops(self, run_id: Optional[int] = None, limit: int = 20, by: str = "amount") -> List[PriceDrop]:
+        """
+        SKUs whose lowPrice in `run_id` (default: every run of the last
+        invocation, so all categories of a batch) is below their previous
+        observation, biggest drop first (`by` "amount" or "percent"). Only
+        those runs' own rows are scanned, each with one index seek for its
+        predecessor.
+        """
+        if by not in ("amount", "percent"):
+            raise ValueError("by must be 'amount' or 'percent'")
+        run_ids = [run_id] if run_id is not None else self.last_invocation_runs()
+        if not run_ids:
+            return []
+        order = "prev.low_price - cur.low_price" if by == "amount" else "(prev.low_price - cur.low_price) / prev.low_price"
+        rows = self._query(
+            f"""
+            SELECT cur.sku, prev.low_price, cur.low_price, prev.ts, cur.ts
+            FROM prices AS cur
+            JOIN prices AS prev ON prev.sku = cur.sku
+             AND prev.ts = (SELECT p.ts FROM prices AS p WHERE p.sku = cur.sku AND p.ts < cur.ts ORDER BY p.ts DESC LIMIT 1)
+            WHERE cur.run_id IN ({", ".join("?" * len(run_ids))}) AND prev.low_price > cur.low_price
+            ORDER BY {order} DESC, cur.sku
+            LIMIT ?
+            """,
+            (*run_ids, limit),
+        )
+        return [
+            PriceDrop(sku, prev, cur, round(prev - cur, 2), round((prev - cur) / prev * 100, 2), prev_ts, ts)
+            for sku, prev, cur, prev_ts, ts in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+def parse_time(value: str) -> float:
+    """Epoch seconds, or an ISO 8601 date/time (local time unless it has an offset)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("db", help="Price history database (settings.priceHistoryFile)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("latest", help="Latest observation per SKU")
+    p.add_argument("skus", nargs="+")
+    p = sub.add_parser("at", help="Observation in effect at a point in time")
+    p.add_argument("sku")
+    p.add_argument("time", type=parse_time)
+    p = sub.add_parser("history", help="All observations of a SKU")
+    p.add_argument("sku")
+    p.add_argument("--since", type=parse_time, default=None)
+    p.add_argument("--until", type=parse_time, default=None)
+    p = sub.add_parser("drops", help="Biggest lowPrice drops in a run versus each SKU's previous observation")
+    p.add_argument("--run", type=int, default=None, help="Run id (default: every run of the last invocation)")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--by", choices=("amount", "percent"), default="amount")
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        ap.error(f"{args.db} does not exist")
+    store = PriceHistory(args.db)
+    try:
+        if args.command == "latest":
+            found = [store.latest(sku) for sku in args.skus]
+        elif args.command == "at":
+            found = [store.at(args.sku, args.time)]
+        elif args.command == "history":
+            found = store.history(args.sku, since=args.since, until=args.until)
+        else:
+            found = store.drops(run_id=args.run, limit=args.limit, by=args.by)
+        for item in found:
+            if item is not None:
+                sys.stdout.write(json.dumps(item.to_dict(), ensure_ascii=False) + "\n")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .dataset_adapter import ensure_parent_dir
+
+STATE_VERSION = 1
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def doc_hash(doc: Dict[str, Any]) -> str:
+    return _digest(json.dumps(doc, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+class CrawlState:
+    """
+    Compact per-SKU state carried between incremental runs.
+
+    Maps SKU -> [normalized doc hash, raw HTML hash]. A page whose HTML hash
+    matches the previous run is skipped before parsing; a page whose
+    normalized document hash matches is parsed but not re-emitted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.previous: Dict[str, List[str]] = {}
+        self.current: Dict[str, List[str]] = {}
+        self._html: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self.previous = data.get("skus", {})
+            else:
+                logging.warning("Ignoring state file %s with unknown version %r.", path, data.get("version"))
+
+    def html_unchanged(self, key: str, body: bytes) -> bool:
+        """Record the raw page hash; True when it matches the previous run."""
+        h = _digest(body)
+        with self._lock:
+            prev = self.previous.get(key)
+            if prev and prev[1] == h:
+                self.current[key] = prev
+                return True
+            self._html[key] = h
+            return False
+
+    def classify(self, key: str, doc: Dict[str, Any]) -> Optional[str]:
+        """Return "new", "changed", or None when the document is unchanged."""
+        h = doc_hash(doc)
+        with self._lock:
+            self.current[key] = [h, self._html.pop(key, "")]
+            prev = self.previous.get(key)
+        if prev is None:
+            return "new"
+        return None if prev[0] == h else "changed"
+
+    def keep(self, key: str):
+        """Carry the previous entry forward, e.g. when this run failed to fetch the page."""
+        with self._lock:
+            if key in self.previous and key not in self.current:
+                self.current[key] = self.previous[key]
+
+    def removed(self) -> List[str]:
+        return [k for k in self.previous if k not in self.current]
+
+    def save(self, carry_forward: bool = False):
+        """
+        Persist this run's entries. With `carry_forward`, SKUs not visited this
+        run (e.g. a --max capped crawl) keep their previous entry.
+        """
+        skus = dict(self.previous, **self.current) if carry_forward else self.current
+        ensure_parent_dir(self.path)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "skus": skus}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
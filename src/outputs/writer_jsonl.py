@@ -1,18 +1,120 @@
+import gzip
 import io
 import json
-from typing import Any
+import os
+from typing import Any, Callable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def get_encoder(name: str = "json") -> Callable[[Any], bytes]:
+    """
+    JSON encoder returning UTF-8 bytes: "json" (stdlib, the default) or
+    "orjson". orjson is faster but not byte-identical: it omits the
+    whitespace after separators and writes NaN as null, so it is opt-in.
+    """
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("jsonEncoder 'orjson' requires: pip install orjson")
+        return orjson.dumps
+    if name != "json":
+        raise ValueError(f"Unknown JSON encoder {name!r}")
+    return _stdlib_dumps
+
+def compression_for(path: str) -> Optional[str]:
+    lower = path.lower()
+    if lower.endswith(".gz"):
+        return "gzip"
+    if lower.endswith(".zst") or lower.endswith(".zstd"):
+        return "zstd"
+    return None
 
 class JsonlWriter:
-    def __init__(self, path: str):
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        truncate_at: Optional[int] = None,
+        flush_every: int = 100,
+        buffer_bytes: int = 1 << 20,
+        fsync: bool = False,
+        encoder: str = "json",
+    ):
+        """
+        `append` continues an existing file. `truncate_at` first cuts the file
+        back to a known-good byte offset (e.g. from a checkpoint), dropping any
+        partially written lines after it.
+
+        Records are buffered and written in batches: every `flush_every`
+        records (or `buffer_bytes` of pending output) the batch is written and
+        flushed to the OS, and with `fsync` also to disk, so a crash loses at
+        most `flush_every` records. Output is gzip/zstd-compressed when the
+        path ends in .gz / .zst.
+        """
         self.path = path
-        self.fh = io.open(self.path, "w", encoding="utf-8")
+        self.compression = compression_for(path)
+        self.flush_every = max(1, flush_every)
+        self.buffer_bytes = buffer_bytes
+        self.fsync = fsync
+        self._dumps = get_encoder(encoder)
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        if truncate_at is not None and self.compression:
+            raise ValueError("Compressed outputs cannot be resumed at a byte offset")
+        if append and truncate_at is not None and os.path.exists(self.path):
+            with io.open(self.path, "r+b") as f:
+                f.truncate(truncate_at)
+        self._raw = io.open(self.path, "ab" if append else "wb")
+        if self.compression == "gzip":
+            # Appending adds a new gzip member; multi-member files read back as one stream.
+            self.fh = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        elif self.compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                self._raw.close()
+                raise ImportError("Writing .zst output requires: pip install zstandard")
+            self.fh = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self.fh = self._raw
+
+    @property
+    def resumable(self) -> bool:
+        """Whether byte offsets from tell() can be used to resume this output."""
+        return self.compression is None
 
     def write(self, obj: Any):
-        line = json.dumps(obj, ensure_ascii=False)
-        self.fh.write(line + "\n")
+        line = self._dumps(obj) + b"\n"
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        if len(self._pending) >= self.flush_every or self._pending_bytes >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.fh.write(b"".join(self._pending))
+            self._pending = []
+            self._pending_bytes = 0
+        self.fh.flush()
+        if self.fh is not self._raw:
+            self._raw.flush()
+        if self.fsync:
+            os.fsync(self._raw.fileno())
+
+    def tell(self) -> int:
+        """Byte offset of everything written so far (flushes first)."""
+        self.flush()
+        return self._raw.tell()
 
     def close(self):
         try:
-            self.fh.flush()
+            self.flush()
+            if self.fh is not self._raw:
+                self.fh.close()
         finally:
-            self.fh.close()
\ No newline at end of file
+            self._raw.close()
@@ -0,0 +1,147 @@
+import logging
+from typing import Any, Dict, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+def product_schema() -> "pa.Schema":
+    """Arrow schema mirroring normalize_product's document (plus the incremental changeType and batch category tag)."""
+    nested_offer = pa.struct(
+        [
+            ("priceCurrency", pa.string()),
+            ("price", pa.string()),
+            ("itemCondition", pa.string()),
+            ("description", pa.string()),
+        ]
+    )
+    offer = pa.struct(
+        [
+            ("priceCurrency", pa.string()),
+            ("price", pa.string()),
+            ("availability", pa.string()),
+            ("itemCondition", pa.string()),
+            ("description", pa.string()),
+            ("offers", pa.list_(nested_offer)),
+        ]
+    )
+    return pa.schema(
+        [
+            ("name", pa.string()),
+            ("image", pa.string()),
+            ("url", pa.string()),
+            ("description", pa.string()),
+            ("sku", pa.string()),
+            ("gtin13", pa.string()),
+            ("model", pa.string()),
+            ("color", pa.string()),
+            ("brand", pa.struct([("name", pa.string())])),
+            ("aggregateRating", pa.struct([("ratingValue", pa.string()), ("reviewCount", pa.string())])),
+            (
+                "offers",
+                pa.struct(
+                    [
+                        ("priceCurrency", pa.string()),
+                        ("seller", pa.struct([("name", pa.string())])),
+                        ("lowPrice", pa.string()),
+                        ("highPrice", pa.string()),
+                        ("offercount", pa.int32()),
+                        ("offers", pa.list_(offer)),
+                    ]
+                ),
+            ),
+            ("images", pa.list_(pa.string())),
+            ("changeType", pa.string()),
+            ("category", pa.string()),
+        ]
+    )
+
+_SCALARS = (str, int, float, bool)
+
+def _coerce(value: Any, typ: "pa.DataType") -> Any:
+    """
+    Fit one value to `typ`: scalars are stringified for string columns, a
+    list given for a scalar column is reduced to its first element, nested
+    lists are flattened and nulls dropped from list columns. Raises
+    TypeError/ValueError for values that cannot fit (e.g. a dict for a string).
+    """
+    if value is None:
+        return None
+    if pa.types.is_list(typ):
+        items = value if isinstance(value, (list, tuple)) else [value]
+        flat = []
+        for item in items:
+            if isinstance(item, (list, tuple)) and not pa.types.is_list(typ.value_type):
+                flat.extend(item)
+            else:
+                flat.append(item)
+        coerced = (_coerce(item, typ.value_type) for item in flat)
+        return [item for item in coerced if item is not None]
+    if isinstance(value, (list, tuple)):
+        return _coerce(value[0], typ) if value else None
+    if pa.types.is_struct(typ):
+        if not isinstance(value, dict):
+            raise TypeError(f"expected an object, got {type(value).__name__}")
+        return {f.name: _coerce(value.get(f.name), f.type) for f in typ}
+    if pa.types.is_string(typ):
+        if not isinstance(value, _SCALARS):
+            raise TypeError(f"expected a string, got {type(value).__name__}")
+        return value if isinstance(value, str) else str(value)
+    if pa.types.is_integer(typ):
+        if isinstance(value, bool) or not isinstance(value, _SCALARS):
+            raise TypeError(f"expected an integer, got {type(value).__name__}")
+        number = int(value)
+        if not -(2 ** 31) <= number < 2 ** 31:
+            raise ValueError(f"{number} is out of range")
+        return number
+    return value
+
+def coerce_record(obj: Dict[str, Any], schema: "pa.Schema") -> Dict[str, Any]:
+    """`obj` reduced to `schema`'s columns and types; unknown keys are dropped."""
+    return {f.name: _coerce(obj.get(f.name), f.type) for f in schema}
+
+class ParquetWriter:
+    """
+    Stream normalized products into a Parquet file, one row group per
+    `row_group_size` records, so memory stays bounded by the row group.
+    `offers.offers[]` is a nested list column. Each record is fitted to the
+    schema as it is written; one that cannot fit is logged and skipped rather
+    than failing the row group it would land in.
+    """
+
+    resumable = False
+
+    def __init__(self, path: str, row_group_size: int = 5000, compression: str = "zstd"):
+        if pa is None:
+            raise ImportError("Parquet output requires: pip install pyarrow")
+        self.path = path
+        self.row_group_size = max(1, row_group_size)
+        self.schema = product_schema()
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, obj: Dict[str, Any]):
+        try:
+            row = coerce_record(obj, self.schema)
+        except (TypeError, ValueError) as e:
+            logging.warning("Skipping record %s: does not fit the Parquet schema (%s)", obj.get("sku") or obj.get("url"), e)
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        table = pa.Table.from_pylist(self._rows, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._rows = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._writer.close()
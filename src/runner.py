@@ -3,15 +3,12 @@ import json
 import logging
 import os
 import sys
-import time
-from typing import Dict, Iterable, Optional
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
 
-from crawler.fetch import HttpClient
-from crawler.paginator import BestBuyPaginator
-from extractors.product_parser import parse_product_from_html
-from extractors.schema_normalizer import normalize_product
-from outputs.writer_jsonl import JsonlWriter
-from outputs.dataset_adapter import ensure_parent_dir
+from crawler.dedupe import SkuSeenSet
+from crawler.session import CrawlSession, iter_product_urls, state_key
+from outputs.dataset_adapter import OUTPUT_FORMATS, output_format_for
 
 LOG_FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
 
@@ -19,32 +16,116 @@ def load_settings(path: str) -> Dict:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def load_proxies(path: Optional[str]) -> Optional[Dict[str, str]]:
-    if not path:
-        return None
-    if not os.path.exists(path):
-        logging.warning("Proxies file '%s' not found. Continuing without proxies.", path)
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    # requests expects {"http": "...", "https": "..."}
-    if isinstance(data, dict):
-        return data
-    if isinstance(data, list) and data:
-        # pick first proxy as default
-        proxy = data[0]
-        return {"http": proxy, "https": proxy}
-    return None
-
-def iter_product_urls(paginator: BestBuyPaginator, max_products: int) -> Iterable[str]:
-    count = 0
-    for url in paginator.iter_product_urls():
-        yield url
-        count += 1
-        if max_products and count >= max_products:
-            break
-
-def main():
+# Keys that belong to one category; everything else in a batch is shared and read from the first entry.
+CATEGORY_KEYS = ("categoryUrl", "outputPath", "maxProducts", "stateFile", "checkpointFile", "country", "tag")
+
+def category_configs(settings: Union[Dict, List[Dict]]) -> Tuple[Dict, List[Dict]]:
+    """
+    Split a settings file into shared settings and per-category entries. A
+    settings file is either one category object or an array of them (batch mode).
+    """
+    if isinstance(settings, dict):
+        return settings, [settings]
+    if not settings:
+        return {}, []
+    return settings[0], [{k: v for k, v in entry.items() if k in CATEGORY_KEYS} for entry in settings]
+
+def category_output_path(base: str, category_url: str, index: int) -> str:
+    """Per-category variant of `base`: data/out/products.jsonl → data/out/products.<category id>.jsonl"""
+    cat_id = (parse_qs(urlparse(category_url).query).get("id") or [f"category{index + 1}"])[0]
+    head, name = os.path.split(base)
+    stem, dot, ext = name.partition(".")
+    return os.path.join(head, f"{stem}.{cat_id}{dot}{ext}")
+
+def run_batch(session: CrawlSession, shared: Dict, categories: List[Dict], args: argparse.Namespace) -> bool:
+    """
+    Crawl several categories one after another through the same session.
+    Each PDP is fetched at most once per run: a SKU already crawled for an
+    earlier category is not fetched again, but its document is written to
+    this category's output too, with this category's tag. Progress across
+    categories is kept in a batch checkpoint so --resume skips finished
+    categories; documents from before a restart are not kept, so SKUs crawled
+    then are left out of the remaining categories.
+    """
+    from outputs.checkpoint import BatchCheckpoint
+
+    base_output = args.output or shared.get("outputPath", "data/out/bestbuy_products.jsonl")
+    batch_path = args.checkpoint or os.path.join(os.path.dirname(base_output) or ".", "batch.checkpoint.json")
+    if args.resume and os.path.exists(batch_path):
+        batch = BatchCheckpoint.load(batch_path)
+        logging.info("Resuming batch: %d of %d categories already done.", len(batch.done), len(categories))
+    else:
+        batch = BatchCheckpoint(batch_path)
+    if batch.seen is not None:
+        session.seen = SkuSeenSet.from_dict(batch.seen)
+    elif session.seen is None:
+        session.seen = SkuSeenSet(**session.seen_opts)
+    session.batch_docs = {}
+
+    total = 0
+    carried = len(session.seen)
+    for index, cat in enumerate(categories):
+        category_url = cat.get("categoryUrl")
+        if not category_url:
+            logging.error("Batch entry %d has no categoryUrl; skipping.", index + 1)
+            continue
+        if category_url in batch.done:
+            continue
+        output_path = cat.get("outputPath") or category_output_path(base_output, category_url, index)
+        checkpoint_path = cat.get("checkpointFile") or output_path + ".checkpoint.json"
+        state_path = cat.get("stateFile") or (category_output_path(args.state, category_url, index) if args.state else None)
+        result = session.crawl_category(
+            category_url,
+            output_path,
+            checkpoint_path,
+            state_path=state_path,
+            resume=args.resume and os.path.exists(checkpoint_path),
+            max_products=args.max if args.max is not None else int(cat.get("maxProducts", session.max_products)),
+            country=cat.get("country"),
+            tag=cat.get("tag"),
+        )
+        total += result.written
+        if result.completed:
+            batch.done.add(category_url)
+        batch.seen = session.seen.to_dict()
+        batch.save()
+        if result.interrupted:
+            logging.info("Batch progress written to %s; rerun with --resume to continue.", batch.path)
+            return False
+    batch.remove()
+    logging.info(
+        "Batch done: %d categories, %d records written, %d unique SKUs (%d known before this run).",
+        len(categories), total, len(session.seen), carried,
+    )
+    return True
+
+def list_urls(session: CrawlSession, categories: List[Dict], max_override: Optional[int] = None) -> int:
+    """
+    Discovery only (--list-urls / --dry-run): print every category's product
+    URLs to stdout, one per line, as a crawl would visit them (capped, and
+    skipping SKUs in the seen-set or already listed for an earlier category).
+    Product pages are never fetched, so the parsing stack is never imported.
+    """
+    from crawler.paginator import BestBuyPaginator
+
+    if session.seen is None:
+        session.seen = SkuSeenSet(**session.seen_opts)
+    total = 0
+    for cat in categories:
+        category_url = cat.get("categoryUrl")
+        if not category_url:
+            continue
+        paginator = BestBuyPaginator(client=session.client, category_url=category_url, country=cat.get("country") or session.country)
+        max_products = max_override if max_override is not None else int(cat.get("maxProducts", session.max_products))
+        for product_url in iter_product_urls(paginator, max_products=max_products, seen=session.seen):
+            session.seen.add(state_key(product_url))
+            sys.stdout.write(product_url + "\n")
+            total += 1
+        sys.stdout.flush()
+    logging.info("Listed %d product URLs.", total)
+    return total
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="BestBuy category scraper → normalized JSONL",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -53,25 +134,126 @@ def main():
         "--settings",
         "-s",
         required=True,
-        help="Path to settings JSON (see src/config/settings.example.json)",
+        help="Path to settings JSON (see src/config/settings.example.json); an array of category settings runs a batch",
     )
     parser.add_argument(
         "--output",
         "-o",
         default=None,
-        help="Output JSONL path (overrides settings.outputPath if provided)",
+        help="Output path (overrides settings.outputPath if provided)",
     )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None, help="Output format (default: from the output extension)")
     parser.add_argument("--max", type=int, default=None, help="Max products to scrape")
     parser.add_argument("--delay", type=float, default=None, help="Delay between requests (seconds)")
+    parser.add_argument("--concurrency", "-c", type=int, default=None, help="Parallel product page fetches")
+    parser.add_argument("--prefetch", type=int, default=None, help="Listing pages to fetch ahead of product workers (0 disables)")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Worker processes for parsing (0 parses on fetch threads)")
+    parser.add_argument("--stream-pages", action="store_true", help="Stop reading a product page once its JSON-LD Product block is complete")
+    parser.add_argument("--max-page-kb", type=float, default=None, help="Read at most this many KB of each product page (0 = no cap)")
+    parser.add_argument("--cache-dir", default=None, help="Persistent HTTP response cache directory (overrides settings.cacheDir)")
+    parser.add_argument("--offline", action="store_true", help="Replay responses from --cache-dir only; never touch the network")
+    parser.add_argument("--state", default=None, help="Incremental mode: state file from the previous run; output becomes a delta")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint.json; batch: <output dir>/batch.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted crawl from its checkpoint")
+    parser.add_argument("--seen", default=None, help="Persisted SKU seen-set; SKUs crawled by earlier runs are skipped (overrides settings.seenFile)")
+    parser.add_argument("--price-history", default=None, help="Record every product's prices in this SQLite price history (overrides settings.priceHistoryFile)")
+    parser.add_argument("--http-backend", choices=("requests", "async"), default=None, help="HTTP client: requests (default) or async (httpx, pooled per proxy)")
+    parser.add_argument("--listing-only", action="store_true", help="Build records from listing cards only; product pages are not fetched")
+    parser.add_argument("--pdp-follow-up", action="store_true", help="With --listing-only, fetch the product page of cards missing required fields")
+    parser.add_argument("--list-urls", "--dry-run", dest="list_urls", action="store_true", help="Only walk the listing and print product URLs; nothing is fetched or written")
+    parser.add_argument("--role", choices=("coordinator", "worker"), default=None, help="Distributed mode: walk the listing into --queue, or process URLs from it")
+    parser.add_argument("--queue", default=None, help="Job queue (SQLite) shared by the coordinator and workers (overrides settings.queueFile)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable debug logs")
-    args = parser.parse_args()
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
 
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format=LOG_FORMAT)
 
-    settings = load_settings(args.settings)
-    category_url = settings.get("categoryUrl")
-    if not category_url:
+    raw_settings = load_settings(args.settings)
+    settings, categories = category_configs(raw_settings)
+    batch = isinstance(raw_settings, list)
+    if not categories or not batch and not settings.get("categoryUrl"):
         logging.error("categoryUrl missing in settings.")
         sys.exit(2)
 
-    output_path = args.output or settings.get("outputPath", "data/out/bestbuy_products.jsonl")
\ No newline at end of file
+    if args.list_urls:
+        session = CrawlSession(settings, args, discovery=True)
+        try:
+            list_urls(session, categories, max_override=args.max)
+        except KeyboardInterrupt:
+            logging.warning("Interrupted.")
+        finally:
+            session.close()
+        return
+
+    queue_path = args.queue or settings.get("queueFile")
+    listing_only = args.listing_only or bool(settings.get("listingOnly", False))
+    if args.role and (batch or not queue_path or args.state or listing_only):
+        logging.error("--role needs --queue (or settings.queueFile), a single category, no --state and no --listing-only.")
+        sys.exit(2)
+    if args.role == "coordinator" and not args.resume and os.path.exists(queue_path):
+        from crawler.jobqueue import JobQueue
+
+        # Workers may create the file first; only queued work from an earlier run is a conflict.
+        probe = JobQueue(queue_path)
+        stale = bool(probe.counts()) or probe.listing_done()
+        probe.close()
+        if stale:
+            logging.error("Queue '%s' holds an earlier crawl; pass --resume to continue it or remove it.", queue_path)
+            sys.exit(2)
+
+    output_path = args.output or settings.get("outputPath", "data/out/bestbuy_products.jsonl")
+    checkpoint_path = args.checkpoint or settings.get("checkpointFile") or output_path + ".checkpoint.json"
+    if not batch and not args.role and not listing_only and args.resume and not os.path.exists(checkpoint_path):
+        logging.error("--resume: checkpoint '%s' not found.", checkpoint_path)
+        sys.exit(2)
+    if args.role == "coordinator":
+        from outputs.writer_jsonl import compression_for
+
+        # Resuming cuts the output back to the last acknowledged byte offset.
+        if output_format_for(output_path, args.format or settings.get("outputFormat")) != "jsonl" or compression_for(output_path):
+            logging.error("--role coordinator writes uncompressed JSONL only; '%s' cannot be resumed.", output_path)
+            sys.exit(2)
+
+    session = CrawlSession(settings, args)
+    interrupted = False
+    try:
+        if args.role:
+            from crawler.distributed import run_coordinator, run_worker
+            from crawler.jobqueue import JobQueue
+
+            queue = JobQueue(
+                queue_path,
+                lease_s=float(settings.get("queueLeaseS", 300)),
+                max_attempts=int(settings.get("queueMaxAttempts", 3)),
+            )
+            try:
+                if args.role == "coordinator":
+                    interrupted = not run_coordinator(session, settings, queue, output_path, resume=args.resume)
+                else:
+                    interrupted = not run_worker(session, settings, queue)
+            finally:
+                queue.close()
+        elif batch:
+            interrupted = not run_batch(session, settings, categories, args)
+        else:
+            result = session.crawl_category(
+                settings["categoryUrl"],
+                output_path,
+                checkpoint_path,
+                state_path=args.state or settings.get("stateFile"),
+                resume=args.resume,
+                tag=settings.get("tag"),
+            )
+            interrupted = result.interrupted
+    except KeyboardInterrupt:
+        interrupted = True
+        logging.warning("Interrupted; shutting down.")
+    finally:
+        session.close(cancel=interrupted)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, ContextManager, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Seconds; covers a sub-millisecond normalize up to a slow, retried fetch.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the last bucket bound if beyond it)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+class Metrics:
+    """
+    Counters, histograms and gauges for the crawl pipeline, rendered in the
+    Prometheus text format.
+
+    Disabled by default: every recording method returns immediately, and hot
+    paths check `enabled` before even reading the clock, so the cost of an
+    uninstrumented run is one attribute lookup per call site.
+    """
+
+    def __init__(self, prefix: str = "bestbuy_"):
+        self.prefix = prefix
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._started = time.monotonic()
+
+    def enable(self):
+        self.enabled = True
+        self._started = time.monotonic()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(DEFAULT_BUCKETS)
+            hist.observe(value)
+
+    def set(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def timer(self, name: str, **labels) -> ContextManager:
+        """`with METRICS.timer("parse_seconds"): ...`; a shared no-op context when disabled."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def counter_total(self, name: str) -> float:
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def histogram(self, name: str) -> _Histogram:
+        """All label sets of a histogram merged into one."""
+        merged = _Histogram(DEFAULT_BUCKETS)
+        with self._lock:
+            for hist in self._histograms.get(name, {}).values():
+                merged.counts = [a + b for a, b in zip(merged.counts, hist.counts)]
+                merged.count += hist.count
+                merged.sum += hist.sum
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    full = self.prefix + name
+                    lines.append(f"# HELP {full} {self._help.get(name, (kind, name))[1]}")
+                    lines.append(f"# TYPE {full} {kind}")
+                    for key, value in sorted(series.items()):
+                        lines.append(f"{full}{_fmt_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                full = self.prefix + name
+                lines.append(f"# HELP {full} {self._help.get(name, ('histogram', name))[1]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f"{full}_bucket{_fmt_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{full}_bucket{_fmt_labels(key, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{full}_sum{_fmt_labels(key)} {hist.sum:.6f}")
+                    lines.append(f"{full}_count{_fmt_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One log line: where the time went, per stage."""
+        parts = []
+        fetch = self.histogram("http_request_seconds")
+        if fetch.count:
+            parts.append(
+                f"fetch {fetch.count} req avg {fetch.sum / fetch.count * 1000:.0f} ms p99<={fetch.quantile(0.99) * 1000:.0f} ms"
+            )
+        retries = self.counter_total("http_retries_total")
+        mb = self.counter_total("http_response_bytes_total") / 1e6
+        parts.append(f"{retries:.0f} retries, {mb:.1f} MB")
+        for stage in ("parse", "normalize", "write"):
+            hist = self.histogram(f"{stage}_seconds")
+            if hist.count:
+                parts.append(f"{stage} avg {hist.sum / hist.count * 1000:.1f} ms ({hist.sum:.1f} s total)")
+        with self._lock:
+            depths = sorted(self._gauges.get("queue_depth", {}).items())
+        if depths:
+            parts.append("queues " + ", ".join(f"{dict(key).get('queue')}={value:.0f}" for key, value in depths))
+        elapsed = time.monotonic() - self._started
+        return f"Metrics ({elapsed:.0f}s): " + "; ".join(parts)
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "t0")
+
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, object]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        return False
+
+_NULL_TIMER = nullcontext()
+
+METRICS = Metrics()
+
+METRICS.describe("http_request_seconds", "histogram", "HTTP request latency per attempt, by status code ('error' for exceptions).")
+METRICS.describe("http_retries_total", "counter", "HTTP attempts after the first one for a URL.")
+METRICS.describe("http_response_bytes_total", "counter", "Response body bytes downloaded.")
+METRICS.describe("http_cache_total", "counter", "Response cache lookups by result (hit, revalidated, miss).")
+METRICS.describe("parse_seconds", "histogram", "parse_product_from_html time per page.")
+METRICS.describe("normalize_seconds", "histogram", "normalize_product time per product.")
+METRICS.describe("write_seconds", "histogram", "Output writer time per record.")
+METRICS.describe("products_total", "counter", "Product pages processed, by result (written, unchanged, error).")
+METRICS.describe("queue_depth", "gauge", "Items waiting in a pipeline queue, by queue.")
+
+def serve_metrics(port: int, metrics: Metrics = METRICS, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve `metrics.render()` at http://host:port/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+    return server
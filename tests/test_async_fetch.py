@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from crawler import async_fetch
+from crawler.async_fetch import AsyncHttpClient
+from crawler.cache import CacheMiss, ResponseCache
+from crawler.proxy_pool import ProxyPool
+
+PROXIES = ["http://u:p@a:1", "http://u:p@b:1"]
+
+class Server:
+    """Scripted responses for httpx.MockTransport; records (proxy, request) for every call."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def transport(self, proxy: str = ""):
+        def handle(request: httpx.Request) -> httpx.Response:
+            self.calls.append((proxy, request))
+            return self.responses.pop(0)
+
+        return httpx.MockTransport(handle)
+
+def _client(server: Server, proxies=None, **kwargs) -> AsyncHttpClient:
+    client = AsyncHttpClient(proxy_pool=ProxyPool(proxies) if proxies else None, **kwargs)
+    for proxy in proxies or [""]:
+        client._clients[proxy] = httpx.AsyncClient(transport=server.transport(proxy))
+    return client
+
+@pytest.fixture(autouse=True)
+def _no_retry_sleep(monkeypatch):
+    monkeypatch.setattr(async_fetch, "retry_delay", lambda *args, **kwargs: 0)
+
+def test_fresh_entries_skip_the_network(tmp_path):
+    server = Server([httpx.Response(200, content=b"<html>one</html>", headers={"Content-Type": "text/html; charset=utf-8"})])
+    client = _client(server, cache=ResponseCache(str(tmp_path), ttl_s=60))
+    assert client.get("https://x/p").text == "<html>one</html>"
+    assert client.get("https://x/p").text == "<html>one</html>"
+    assert len(server.calls) == 1
+    client.close()
+
+def test_stale_entries_revalidate_with_etag(tmp_path):
+    server = Server([httpx.Response(200, content=b"body", headers={"ETag": '"v1"'}), httpx.Response(304)])
+    client = _client(server, cache=ResponseCache(str(tmp_path), ttl_s=0))
+    client.get("https://x/p")
+    resp = client.get("https://x/p")
+    assert server.calls[1][1].headers["If-None-Match"] == '"v1"'
+    assert resp.status_code == 200 and resp.content == b"body"
+    client.close()
+
+def test_offline_replays_cache_and_raises_on_miss(tmp_path):
+    client = _client(Server([httpx.Response(200, content=b"saved")]), cache=ResponseCache(str(tmp_path), ttl_s=0))
+    client.get("https://x/p")
+    client.close()
+    client = _client(Server([]), cache=ResponseCache(str(tmp_path), ttl_s=0, offline=True))
+    assert client.get("https://x/p").content == b"saved"
+    with pytest.raises(CacheMiss):
+        client.get("https://x/other")
+    client.close()
+
+def test_streamed_get_stops_early_and_skips_cache(tmp_path):
+    body = b"<head>" + b"x" * 200_000 + b"</head>" + b"y" * 200_000
+    cache = ResponseCache(str(tmp_path))
+    client = _client(Server([httpx.Response(200, content=body), httpx.Response(200, content=body)]), cache=cache)
+    resp = client.get("https://x/p", stop=lambda buf: b"</head>" in buf)
+    assert resp.content.startswith(b"<head>") and b"</head>" in resp.content and len(resp.content) < len(body)
+    assert cache.lookup("https://x/p") is None
+    assert len(client.get("https://x/p", max_bytes=1000).content) == 1000
+    client.close()
+
+def test_rotates_proxies_per_request():
+    server = Server([httpx.Response(200, content=b"ok"), httpx.Response(200, content=b"ok")])
+    client = _client(server, proxies=PROXIES)
+    client.get("https://x/1")
+    client.get("https://x/2")
+    assert [proxy for proxy, _ in server.calls] == PROXIES
+    client.close()
+
+def test_blocks_are_reported_to_the_proxy_and_retried():
+    server = Server([httpx.Response(429), httpx.Response(200, content=b"ok")])
+    client = _client(server, proxies=PROXIES)
+
+    async def fetch():
+        try:
+            return await client.aget("https://x/p")
+        finally:
+            await client.aclose()
+
+    resp = asyncio.run(fetch())
+    assert resp.content == b"ok"
+    blocked, ok = client.proxy_pool.proxies
+    assert blocked.blocks == 1 and ok.blocks == 0
+    assert [proxy for proxy, _ in server.calls] == PROXIES
+
+def test_server_errors_count_against_the_proxy():
+    server = Server([httpx.Response(502), httpx.Response(200, content=b"ok")])
+    client = _client(server, proxies=PROXIES)
+    assert client.get("https://x/p").content == b"ok"
+    bad, good = client.proxy_pool.proxies
+    assert bad.errors == 1 and bad.health < good.health
+    client.close()
@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from crawler.cache import CacheMiss, ResponseCache
+from crawler.fetch import HttpClient
+
+def _response(status: int, body: bytes = b"", headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers.update(headers or {})
+    return resp
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(headers or {})
+        return self.responses.pop(0)
+
+def _client(cache, responses):
+    client = HttpClient(cache=cache)
+    client._local.session = FakeSession(responses)
+    return client
+
+def test_fresh_entries_skip_the_network(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_s=60)
+    client = _client(cache, [_response(200, b"<html>one</html>", {"Content-Type": "text/html; charset=utf-8"})])
+    assert client.get("https://x/p").text == "<html>one</html>"
+    assert client.get("https://x/p").text == "<html>one</html>"
+    assert len(client.session.calls) == 1
+
+def test_stale_entries_revalidate_with_etag(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_s=0)
+    client = _client(cache, [_response(200, b"body", {"ETag": '"v1"'}), _response(304)])
+    client.get("https://x/p")
+    resp = client.get("https://x/p")
+    assert client.session.calls[1]["If-None-Match"] == '"v1"'
+    assert resp.status_code == 200 and resp.content == b"body"
+
+def test_offline_replays_cache_and_raises_on_miss(tmp_path):
+    _client(ResponseCache(str(tmp_path), ttl_s=0), [_response(200, b"saved")]).get("https://x/p")
+    client = _client(ResponseCache(str(tmp_path), ttl_s=0, offline=True), [])
+    assert client.get("https://x/p").content == b"saved"
+    with pytest.raises(CacheMiss):
+        client.get("https://x/other")
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    import os
+
+    cache = ResponseCache(str(tmp_path), max_bytes=1500)
+    for i in range(3):
+        cache.store(f"https://x/{i}", _response(200, os.urandom(600)))
+    assert cache.lookup("https://x/0") is None
+    assert cache.lookup("https://x/2") is not None
+
+def test_streamed_get_stops_early_and_skips_cache(tmp_path):
+    import io
+
+    def streamed(body: bytes) -> requests.Response:
+        resp = _response(200)
+        resp._content = False
+        resp.raw = io.BytesIO(body)
+        return resp
+
+    body = b"<head>" + b"x" * 200_000 + b"</head>" + b"y" * 200_000
+    cache = ResponseCache(str(tmp_path))
+    client = _client(cache, [streamed(body), streamed(body)])
+    resp = client.get("https://x/p", stop=lambda buf: b"</head>" in buf)
+    assert resp.content.startswith(b"<head>") and b"</head>" in resp.content and len(resp.content) < len(body)
+    assert cache.lookup("https://x/p") is None
+    assert len(client.get("https://x/p", max_bytes=1000).content) == 1000
+
+def test_streamed_blocks_and_server_errors_release_the_connection(tmp_path, monkeypatch):
+    import io
+
+    from crawler import fetch
+
+    monkeypatch.setattr(fetch, "retry_delay", lambda *args, **kwargs: 0)
+    closed = []
+
+    def streamed(status: int, body: bytes = b"") -> requests.Response:
+        resp = _response(status)
+        resp._content = False
+        resp.raw = io.BytesIO(body)
+        resp.close = lambda: closed.append(status)
+        return resp
+
+    client = _client(None, [streamed(429), streamed(503), streamed(200, b"<head></head>")])
+    assert client.get("https://x/p", stop=lambda buf: b"</head>" in buf).content == b"<head></head>"
+    assert closed == [429, 503, 200]
+    client = _client(None, [streamed(503)] * 2)
+    with pytest.raises(requests.HTTPError):
+        client.get("https://x/p", retries=2, max_bytes=1000)
+    assert closed[3:] == [503, 503]
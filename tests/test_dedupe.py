@@ -0,0 +1,34 @@
+from crawler.dedupe import SkuSeenSet, sku_key
+
+def test_sku_key_ignores_tracking_params():
+    assert sku_key("https://www.bestbuy.com/site/x/6452968.p?skuId=6452968&ref=sponsored") == "6452968"
+    assert sku_key("https://www.bestbuy.com/site/x/6452968.p?cmp=abc&skuId=6452968") == "6452968"
+    assert sku_key("https://example.com/item") == "https://example.com/item"
+
+def test_exact_seen_set_round_trips(tmp_path):
+    seen = SkuSeenSet()
+    assert seen.add("6452968")
+    assert not seen.add("6452968")
+    assert seen.add("0123") and "123" not in seen
+    assert seen.add("https://example.com/item")
+    assert len(seen) == 3
+
+    path = str(tmp_path / "seen.json")
+    seen.save(path)
+    loaded = SkuSeenSet.load(path)
+    assert all(k in loaded for k in ("6452968", "0123", "https://example.com/item"))
+    assert len(loaded) == 3 and "1" not in loaded
+
+def test_bloom_seen_set_has_no_false_negatives_and_few_false_positives(tmp_path):
+    seen = SkuSeenSet(bloom_capacity=10_000, error_rate=0.01)
+    assert seen.is_bloom
+    for i in range(10_000):
+        seen.add(str(5_000_000 + i))
+    assert all(str(5_000_000 + i) in seen for i in range(10_000))
+    false_positives = sum(str(9_000_000 + i) in seen for i in range(10_000))
+    assert false_positives < 300
+
+    path = str(tmp_path / "seen.json")
+    seen.save(path)
+    loaded = SkuSeenSet.load(path)
+    assert loaded.is_bloom and "5000042" in loaded
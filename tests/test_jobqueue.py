@@ -0,0 +1,68 @@
+import time
+
+from crawler.jobqueue import JobQueue
+
+def test_lease_complete_and_collect_results(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    assert queue.push(["u1", "u2", "u3"]) == 3
+    assert queue.push(["u2", "u4"]) == 1
+    queue.mark_listing_done()
+
+    assert queue.lease("w1", 2) == ["u1", "u2"]
+    assert queue.lease("w2", 5) == ["u3", "u4"]
+    assert queue.complete("u1", "w1", doc={"sku": "1"})
+    assert not queue.complete("u3", "w1", doc={"sku": "3"})  # leased to w2
+    assert queue.complete("u3", "w2", doc={"sku": "3"})
+    assert not queue.finished()
+
+    results = queue.take_results()
+    assert [(url, doc) for _, url, doc, _ in results] == [("u1", {"sku": "1"}), ("u3", {"sku": "3"})]
+    queue.ack_results(results[-1][0])
+    assert queue.take_results() == []
+    assert queue.counts() == {"done": 2, "leased": 2}
+
+def test_expired_leases_are_requeued_and_stale_reports_dropped(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite"), lease_s=0.05, max_attempts=2)
+    queue.push(["u1"])
+    queue.mark_listing_done()
+    assert queue.lease("crashed") == ["u1"]
+    time.sleep(0.1)
+    assert queue.requeue_expired() == 1
+    assert queue.lease("w2") == ["u1"]
+    assert not queue.complete("u1", "crashed", doc={})
+    time.sleep(0.1)
+    # Second expiry uses up max_attempts: the URL is reported as failed instead of leased again.
+    assert queue.lease("w3") == []
+    assert queue.finished()
+    [(_, url, doc, error)] = queue.take_results()
+    assert url == "u1" and doc is None and "lease expired" in error
+
+def test_failures_retry_then_fail_and_survive_reopen(tmp_path):
+    path = str(tmp_path / "q.sqlite")
+    queue = JobQueue(path, max_attempts=2)
+    queue.push(["u1"])
+    queue.lease("w1")
+    assert queue.complete("u1", "w1", error="HTTPError: 500")
+    assert queue.counts() == {"pending": 1}
+    queue.close()
+
+    queue = JobQueue(path, max_attempts=2)
+    assert queue.lease("w1") == ["u1"]
+    queue.complete("u1", "w1", error="HTTPError: 500")
+    assert queue.counts() == {"failed": 1}
+    assert queue.take_results()[0][3] == "HTTPError: 500"
+
+def test_ack_stores_the_output_offset_atomically(tmp_path):
+    path = str(tmp_path / "q.sqlite")
+    queue = JobQueue(path)
+    assert queue.output_offset() is None
+    queue.push(["u1", "u2"])
+    for url in queue.lease("w1", 2):
+        queue.complete(url, "w1", doc={"url": url})
+    first = queue.take_results()[0][0]
+    queue.ack_results(first, output_offset=120)
+    queue.close()
+
+    queue = JobQueue(path)
+    assert queue.output_offset() == 120
+    assert [r[1] for r in queue.take_results()] == ["u2"]
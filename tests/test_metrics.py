@@ -0,0 +1,35 @@
+from telemetry.metrics import Metrics
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics()
+    m.inc("http_retries_total")
+    m.observe("parse_seconds", 0.2)
+    with m.timer("write_seconds"):
+        pass
+    assert m.render() == "\n"
+
+def test_render_prometheus_text():
+    m = Metrics(prefix="t_")
+    m.enable()
+    m.describe("http_request_seconds", "histogram", "Latency.")
+    m.observe("http_request_seconds", 0.003, status=200)
+    m.observe("http_request_seconds", 0.2, status=200)
+    m.observe("http_request_seconds", 0.04, status=429)
+    m.inc("http_response_bytes_total", 1500)
+    m.inc("http_response_bytes_total", 500)
+    m.set("queue_depth", 3, queue="fetch")
+    with m.timer("parse_seconds"):
+        pass
+
+    text = m.render()
+    assert "# TYPE t_http_request_seconds histogram" in text
+    assert 't_http_request_seconds_bucket{status="200",le="0.005"} 1' in text
+    assert 't_http_request_seconds_bucket{status="200",le="+Inf"} 2' in text
+    assert 't_http_request_seconds_count{status="429"} 1' in text
+    assert "t_http_response_bytes_total 2000" in text
+    assert 't_queue_depth{queue="fetch"} 3' in text
+    assert "t_parse_seconds_count 1" in text
+
+    assert m.histogram("http_request_seconds").count == 3
+    assert m.histogram("http_request_seconds").quantile(0.5) == 0.05
+    assert "fetch 3 req" in m.summary()
@@ -1,4 +1,6 @@
-from extractors.schema_normalizer import normalize_product
+import json
+
+from extractors.schema_normalizer import normalize_product, normalize_products
 
 def test_normalize_product_shapes_fields():
     raw = {
@@ -26,4 +28,30 @@ def test_normalize_product_shapes_fields():
     assert doc["brand"]["name"] == "Acme"
     assert doc["offers"]["offercount"] == 2
     assert doc["offers"]["lowPrice"] == "219.99"
-    assert "images" in doc and len(doc["images"]) == 2
\ No newline at end of file
+    assert "images" in doc and len(doc["images"]) == 2
+
+def test_normalize_products_matches_per_record_output():
+    batch = [
+        {"sku": 1, "offers": {"lowPrice": "1,299.99", "offers": [{"price": 1299}, {"price": "N/A"}, "junk"]}},
+        {
+            "sku": "2",
+            "offers": {
+                "priceCurrency": "CAD",
+                "offers": [
+                    {"price": "899.00", "offers": [{"price": "37.46", "description": "24-month"}, {"price": 37.46}, {"price": None}]},
+                    {"price": "749.5"},
+                ],
+            },
+        },
+        {"sku": "3", "offers": [{"price": "10"}, {"price": "9.5"}]},
+        {"sku": "4", "offers": {"price": True}},
+        "not a product",
+    ]
+    single = [normalize_product(raw) for raw in batch]
+    assert json.dumps(normalize_products(batch)) == json.dumps(single)
+    assert single[0]["offers"]["lowPrice"] == "1299.00"
+    offers = single[1]["offers"]
+    assert list(offers) == ["priceCurrency", "seller", "offers", "offercount", "lowPrice", "highPrice"]
+    assert (offers["lowPrice"], offers["highPrice"]) == ("749.50", "899.00")
+    assert [o["price"] for o in offers["offers"][0]["offers"]] == ["37.46", "37.46", None]
+    assert offers["offers"][0]["offers"][0]["priceCurrency"] == "CAD"
@@ -0,0 +1,133 @@
+import json
+
+from crawler.paginator import BestBuyPaginator
+from crawler.prefetch import PrefetchingPaginator
+
+def _listing(page: int, pages: int) -> str:
+    cards = "".join(
+        f'<a class="sku-header" href="/site/item-{page}{i}/{page}00{i}.p?skuId={page}00{i}">Item</a>' for i in range(3)
+    )
+    pager = '<nav class="pagination"></nav>' if page < pages else ""
+    return f"<html><body>{cards}{pager}</body></html>"
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+
+class FakeClient:
+    def __init__(self, pages: int = 4):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        page = int(url.rsplit("page=", 1)[1].split("&")[0])
+        self.requested.append(page)
+        return _Resp(_listing(page, self.pages))
+
+CATEGORY = "https://www.bestbuy.com/site/all-laptops/pc-laptops/abcat0502000.c?id=abcat0502000"
+
+def test_prefetching_paginator_matches_serial_order():
+    serial = list(BestBuyPaginator(FakeClient(), CATEGORY).iter_product_urls())
+    prefetched = list(PrefetchingPaginator(BestBuyPaginator(FakeClient(), CATEGORY), max_pages=2).iter_product_urls())
+    assert len(serial) == 12
+    assert prefetched == serial
+
+def test_prefetching_paginator_stops_at_max_products():
+    client = FakeClient(pages=10)
+    urls = list(PrefetchingPaginator(BestBuyPaginator(client, CATEGORY), max_pages=3, max_products=4).iter_product_urls())
+    assert len(urls) == 4
+    assert client.requested == [1, 2]
+
+def test_parse_listing_returns_urls_and_pager_in_one_pass():
+    paginator = BestBuyPaginator(FakeClient(), CATEGORY)
+    urls, has_next = paginator._parse_listing(_listing(1, 2), CATEGORY)
+    assert urls[0] == "https://www.bestbuy.com/site/item-10/1000.p?skuId=1000"
+    assert len(urls) == 3
+    assert has_next
+    assert paginator._parse_listing(_listing(2, 2), CATEGORY)[1] is False
+
+def test_parse_listing_falls_back_to_item_list_json_ld():
+    html = """<html><head><script type="application/ld+json">
+    {"@type": "ItemList", "itemListElement": [
+      {"@type": "ListItem", "url": "/site/a/1111111.p?skuId=1111111"},
+      {"@type": "ListItem", "item": {"url": "/site/b/2222222.p?skuId=2222222"}}
+    ]}</script></head><body></body></html>"""
+    urls, has_next = BestBuyPaginator(FakeClient(), CATEGORY)._parse_listing(html, CATEGORY)
+    assert urls == [
+        "https://www.bestbuy.com/site/a/1111111.p?skuId=1111111",
+        "https://www.bestbuy.com/site/b/2222222.p?skuId=2222222",
+    ]
+    assert not has_next
+
+class SponsoredClient(FakeClient):
+    """Every page repeats the first SKU of page 1 in a sponsored slot with tracking params."""
+
+    def get(self, url, **kwargs):
+        resp = super().get(url, **kwargs)
+        sponsored = '<a class="sku-header" href="/site/item-10/1000.p?skuId=1000&ref=sponsored">Ad</a>'
+        resp.text = resp.text.replace("<body>", "<body>" + sponsored)
+        return resp
+
+def test_iter_pages_drops_skus_already_listed():
+    pages = list(BestBuyPaginator(SponsoredClient(pages=3), CATEGORY).iter_pages())
+    skus = [u.rsplit("skuId=", 1)[1].split("&")[0] for _, urls in pages for u in urls]
+    assert len(skus) == 9
+    assert len(set(skus)) == 9
+
+def _card(sku: int, price: str = "$1,299.99", rating: bool = True) -> str:
+    stars = f'<div class="c-ratings-reviews"><p class="visually-hidden">Rating 4.6 out of 5 stars with 1,204 reviews</p></div>' if rating else ""
+    return (
+        f'<li class="sku-item" data-sku-id="{sku}"><img class="product-image" src="https://pisces.bbystatic.com/{sku}_sd.jpg">'
+        f'<h4 class="sku-title"><a href="/site/item/{sku}.p?skuId={sku}&intl=nosplash">Item {sku}</a></h4>{stars}'
+        f'<div class="priceView-hero-price priceView-customer-price"><span aria-hidden="true">{price}</span></div></li>'
+    )
+
+def test_parse_cards_reads_card_fields_and_merges_item_list():
+    ld = {
+        "@type": "ItemList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": 1, "item": {
+                "@type": "Product", "url": "/site/item/2222222.p?skuId=2222222", "name": "Item Two (LD)",
+                "offers": {"@type": "Offer", "priceCurrency": "USD", "price": "99.99"},
+            }},
+            {"@type": "ListItem", "position": 2, "item": {"@type": "Product", "url": "/site/item/3333333.p?skuId=3333333", "name": "LD only"}},
+        ],
+    }
+    html = (
+        f'<html><head><script type="application/ld+json">{json.dumps(ld)}</script></head><body><ol>'
+        f'{_card(1111111)}{_card(2222222, price="Sold Out", rating=False)}{_card(1111111)}</ol></body></html>'
+    )
+    cards, has_next = BestBuyPaginator(FakeClient(), CATEGORY)._parse_cards(html, CATEGORY)
+    assert not has_next
+    assert [c["sku"] for c in cards] == ["1111111", "2222222", "3333333"]
+    first = cards[0]
+    assert first["url"] == "https://www.bestbuy.com/site/item/1111111.p?skuId=1111111&intl=nosplash"
+    assert first["name"] == "Item 1111111"
+    assert first["image"] == "https://pisces.bbystatic.com/1111111_sd.jpg"
+    assert first["offers"] == {"priceCurrency": "USD", "lowPrice": "1299.99", "highPrice": "1299.99"}
+    assert first["aggregateRating"] == {"ratingValue": "4.6", "reviewCount": "1204"}
+    # JSON-LD wins where it has a value; the card supplies the rest.
+    assert cards[1]["name"] == "Item Two (LD)"
+    assert cards[1]["offers"]["price"] == "99.99"
+    assert cards[1]["image"] == "https://pisces.bbystatic.com/2222222_sd.jpg"
+    assert "aggregateRating" not in cards[1]
+    assert cards[2] == {"url": "https://www.bestbuy.com/site/item/3333333.p?skuId=3333333", "name": "LD only", "sku": "3333333"}
+
+class CardClient(FakeClient):
+    """Card listings; every page after the first repeats SKU 1000 in a sponsored slot."""
+
+    def get(self, url, **kwargs):
+        page = int(url.rsplit("page=", 1)[1].split("&")[0])
+        self.requested.append(page)
+        cards = "".join(_card(page * 1000 + i) for i in range(3)) + (_card(1000) if page > 1 else "")
+        pager = '<nav class="pagination"></nav>' if page < self.pages else ""
+        return _Resp(f"<html><body><ol>{cards}</ol>{pager}</body></html>")
+
+def test_iter_card_pages_fetches_only_listing_pages():
+    client = CardClient(pages=3)
+    pages = list(BestBuyPaginator(client, CATEGORY).iter_card_pages())
+    assert client.requested == [1, 2, 3]
+    assert [page for page, _ in pages] == [1, 2, 3]
+    skus = [c["sku"] for _, cards in pages for c in cards]
+    assert len(skus) == 9
+    assert len(set(skus)) == 9
@@ -40,4 +40,75 @@ def test_parse_product_from_html_basic():
     assert data["sku"] == "1234567"
     assert data["aggregateRating"]["ratingValue"] == "4.6"
     assert data["offers"]["lowPrice"] == "199.99"
-    assert "image" in data or "images" in data
\ No newline at end of file
+    assert "image" in data or "images" in data
+
+def test_complete_json_ld_skips_dom_fallback(monkeypatch):
+    import extractors.product_parser as pp
+
+    def no_dom(*args, **kwargs):
+        raise AssertionError("DOM should not be built")
+
+    monkeypatch.setattr(pp, "_parse_dom", no_dom)
+    html = HTML.replace('"name": "Acme Phone X",', '"name": "Acme Phone X", "description": "Great device", "image": "https://pisces.bbystatic.com/x.jpg",')
+    data = parse_product_from_html(html)
+    assert data["description"] == "Great device"
+    assert data["images"][0].endswith("1234567_sd.jpg")
+    assert "https://pisces.bbystatic.com/x.jpg" in data["images"]
+
+def test_parse_pool_matches_in_process_parse():
+    from extractors.parse_pool import ParsePool, parse_and_normalize
+
+    url = "https://www.bestbuy.com/site/acme-phone-x/1234567.p?skuId=1234567"
+    items = [(i, url, HTML.encode("utf-8")) for i in range(5)] + [(5, url, b"")]
+    with ParsePool(workers=2, chunksize=2) as pool:
+        out = list(pool.imap(items))
+    assert [key for key, _, _ in out] == list(range(6))
+    assert out[0][1] == parse_and_normalize(HTML, url)
+    assert out[0][1]["offers"]["lowPrice"] == "219.99"
+
+def test_ld_product_watch_fires_once_the_block_is_complete():
+    from extractors.product_parser import LdProductWatch
+
+    # The test page's JSON-LD lacks "image" and "description", so it never completes.
+    watch = LdProductWatch()
+    buf = bytearray()
+    body = HTML.encode()
+    for i in range(0, len(body), 64):
+        buf += body[i : i + 64]
+        assert not watch(buf)
+
+    complete = HTML.replace('"name": "Acme Phone X",', '"name": "Acme Phone X", "image": "i.jpg", "description": "d",').encode()
+    watch = LdProductWatch()
+    assert not watch(bytearray(complete[: complete.index(b"</script>")]))
+    end = complete.index(b"</script>") + len(b"</script>")
+    assert watch(bytearray(complete[:end]))
+    data = parse_product_from_html(complete[:end], url="https://www.bestbuy.com/site/x/1234567.p?skuId=1234567")
+    assert data["sku"] == "1234567" and data["offers"]["lowPrice"] == "199.99"
+
+def test_parse_pool_yields_while_input_stalls_and_keeps_passthrough_order():
+    import threading
+    import time
+
+    from extractors.parse_pool import ParsePool
+
+    url = "https://www.bestbuy.com/site/acme-phone-x/1234567.p?skuId=1234567"
+    release = threading.Event()
+
+    def items():
+        yield "a", url, HTML.encode("utf-8")
+        yield "skipped", url, None
+        # Blocks until the caller has both results: a partial chunk must not wait for more input.
+        release.wait(10)
+        yield "b", url, HTML.encode("utf-8")
+
+    with ParsePool(workers=1, chunksize=8, linger_s=0.01) as pool:
+        out = pool.imap(items())
+        start = time.monotonic()
+        first, second = next(out), next(out)
+        waited = time.monotonic() - start
+        release.set()
+        rest = list(out)
+    assert waited < 5
+    assert [key for key, _, _ in [first, second] + rest] == ["a", "skipped", "b"]
+    assert first[1]["offers"]["lowPrice"] == "219.99"
+    assert second[1:] == (None, None)
@@ -0,0 +1,87 @@
+import json
+
+from outputs.price_history import PriceHistory, main
+
+def _doc(sku, low, high=None, availability="InStock"):
+    return {
+        "sku": sku,
+        "offers": {
+            "priceCurrency": "USD",
+            "lowPrice": low,
+            "highPrice": high or low,
+            "offers": [{"price": high or low, "availability": availability, "itemCondition": "NewCondition", "description": "New"}],
+        },
+    }
+
+def _store(tmp_path):
+    store = PriceHistory(str(tmp_path / "prices.sqlite"))
+    first = store.start_run("cat", started_at=1000)
+    store.record(_doc("1", "100.00"), first, ts=1000)
+    store.record(_doc("2", "50.00"), first, ts=1001)
+    store.record(_doc("3", "20.00"), first, ts=1002)
+    second = store.start_run("cat", started_at=2000)
+    store.record(_doc("1", "80.00", "120.00"), second, ts=2000)
+    store.record(_doc("2", "30.00"), second, ts=2001)
+    store.record(_doc("3", "25.00"), second, ts=2002)
+    assert not store.record({"sku": "4"}, second)
+    return store, first, second
+
+def test_latest_and_point_in_time(tmp_path):
+    store, first, second = _store(tmp_path)
+    latest = store.latest("1")
+    assert (latest.low_price, latest.high_price, latest.run_id) == (80.0, 120.0, second)
+    assert latest.offers == [{"description": "New", "itemCondition": "NewCondition", "price": "120.00", "availability": "InStock"}]
+    assert store.at("1", 1999).low_price == 100.0
+    assert store.at("1", 999) is None
+    assert store.latest("missing") is None
+    assert [p.low_price for p in store.history("2")] == [50.0, 30.0]
+    assert [p.low_price for p in store.history("2", since=1500)] == [30.0]
+
+def test_drops_since_previous_run(tmp_path):
+    store, first, second = _store(tmp_path)
+    assert [(d.sku, d.previous, d.current, d.drop) for d in store.drops()] == [("1", 100.0, 80.0, 20.0), ("2", 50.0, 30.0, 20.0)]
+    assert [d.sku for d in store.drops(by="percent")] == ["2", "1"]
+    assert store.drops(run_id=first) == []
+    assert len(store.drops(limit=1)) == 1
+
+def test_cli_queries(tmp_path, capsys):
+    store, _, _ = _store(tmp_path)
+    store.close()
+    db = str(tmp_path / "prices.sqlite")
+    main([db, "latest", "1", "3"])
+    main([db, "at", "2", "1500"])
+    main([db, "drops", "--by", "percent", "--limit", "1"])
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line["sku"], line.get("low_price", line.get("current"))) for line in lines] == [("1", 80.0), ("3", 25.0), ("2", 50.0), ("2", 30.0)]
+
+def test_drops_cover_every_category_of_the_last_batch(tmp_path):
+    path = str(tmp_path / "prices.sqlite")
+    store = PriceHistory(path)
+    for category, sku in (("a", "1"), ("b", "2")):
+        store.record(_doc(sku, "100.00"), store.start_run(category, started_at=1000), ts=1000 + int(sku))
+    store.close()
+    store = PriceHistory(path)
+    a = store.start_run("a", started_at=2000)
+    store.record(_doc("1", "90.00"), a, ts=2001)
+    b = store.start_run("b", started_at=2010)
+    store.record(_doc("2", "60.00"), b, ts=2011)
+    assert store.last_invocation_runs() == [a, b]
+    assert [(d.sku, d.drop) for d in store.drops()] == [("2", 40.0), ("1", 10.0)]
+    assert [d.sku for d in store.drops(run_id=b)] == ["2"]
+    store.close()
+
+def test_databases_without_invocations_are_upgraded(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "prices.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL NOT NULL, category TEXT);"
+            "INSERT INTO runs (started_at, category) VALUES (1000, 'a'), (1001, 'b');"
+        )
+    store = PriceHistory(path)
+    store.record(_doc("1", "100.00"), 1, ts=1000)
+    store.record(_doc("1", "90.00"), 2, ts=1001)
+    assert store.last_invocation_runs() == [2]
+    assert [d.sku for d in store.drops()] == ["1"]
+    store.close()
@@ -0,0 +1,54 @@
+import requests
+
+from crawler.fetch import HttpClient
+from crawler.proxy_pool import ProxyPool
+
+PROXIES = ["http://u:p@a:1", "http://u:p@b:1", {"url": "http://u:p@c:1", "weight": 2}]
+
+def test_round_robin_covers_every_proxy():
+    pool = ProxyPool(PROXIES)
+    assert [pool.acquire().url for _ in range(4)] == ["http://u:p@a:1", "http://u:p@b:1", "http://u:p@c:1", "http://u:p@a:1"]
+
+def test_repeated_blocks_eject_a_proxy():
+    pool = ProxyPool(PROXIES, eject_after=2, cooldown_s=60)
+    a = pool.proxies[0]
+    pool.report(a, blocked=True)
+    pool.report(a, blocked=True)
+    assert all(pool.acquire() is not a for _ in range(6))
+    assert "u:p" not in repr(a)
+
+def test_http_client_rotates_proxies_per_request():
+    seen = []
+
+    class Session:
+        def get(self, url, proxies=None, **kwargs):
+            seen.append(proxies["https"])
+            resp = requests.Response()
+            resp.status_code = 200
+            resp._content = b"ok"
+            return resp
+
+    client = HttpClient(proxy_pool=ProxyPool(PROXIES[:2]))
+    client._local.session = Session()
+    client.get("https://x/1")
+    client.get("https://x/2")
+    assert seen == ["http://u:p@a:1", "http://u:p@b:1"]
+
+def test_server_errors_count_against_the_proxy(monkeypatch):
+    from crawler import fetch
+
+    monkeypatch.setattr(fetch, "retry_delay", lambda *args, **kwargs: 0)
+
+    class Session:
+        def get(self, url, proxies=None, **kwargs):
+            resp = requests.Response()
+            resp.status_code = 503 if proxies["https"] == PROXIES[0] else 200
+            resp._content = b"ok"
+            return resp
+
+    pool = ProxyPool(PROXIES[:2])
+    client = HttpClient(proxy_pool=pool)
+    client._local.session = Session()
+    assert client.get("https://x/1").content == b"ok"
+    bad, good = pool.proxies
+    assert bad.errors == 1 and bad.health < good.health
@@ -0,0 +1,47 @@
+import pytest
+
+from extractors import rules
+from extractors.product_parser import parse_product_from_html
+
+PAGE = """
+<html><head><meta name="description" content="Meta description"></head>
+<body>
+  <div class="sku-title"><h1> Acme <b>Phone</b> X </h1></div>
+  <div class="sku-value">SKU: 1,234,567</div>
+  <img class="primary-image" src="https://pisces.bbystatic.com/a.jpg">
+  <div class="c-reviews-v4"><span class="average-rating">4.5</span><span class="count">(1,024)</span></div>
+  <div class="priceView-hero-price"><span>$1,299.99</span></div>
+  <div class="pricing-price__regular-price">Was $1,499.99</div>
+  <span class="my-price" data-cents="99999">Now: 999.99</span>
+</body></html>
+"""
+
+def test_dom_fallback_uses_the_rule_table():
+    data = parse_product_from_html(PAGE.encode("utf-8"))
+    assert data["name"] == "AcmePhoneX"
+    assert data["sku"] == "1234567"
+    assert data["image"] == "https://pisces.bbystatic.com/a.jpg"
+    assert data["description"] == "Meta description"
+    assert data["aggregateRating"] == {"ratingValue": "4.5", "reviewCount": "(1,024)"}
+    assert data["offers"]["lowPrice"] == "1299.99"
+    assert data["offers"]["offers"][0]["price"] == "1499.99"
+
+def test_overrides_replace_single_fields():
+    custom = rules.ExtractionRules({"price": {"xpath": "//span[@class='my-price']", "regex": r"([0-9]+\.[0-9]{2})"}})
+    data = parse_product_from_html(PAGE, rules=custom)
+    assert data["offers"]["lowPrice"] == "999.99"
+    assert data["name"] == "AcmePhoneX"
+
+    by_attribute = rules.ExtractionRules({"name": {"xpath": ["//h2", "//span[@class='my-price']/@data-cents"]}})
+    assert by_attribute.first(None, "name") is None
+    assert parse_product_from_html(PAGE, rules=by_attribute)["name"] == "99999"
+
+def test_configure_installs_the_active_table_and_rejects_bad_xpath():
+    try:
+        rules.configure({"description": {"xpath": "//h1"}})
+        assert parse_product_from_html(PAGE)["description"] == "AcmePhoneX"
+    finally:
+        rules.configure()
+    assert parse_product_from_html(PAGE)["description"] == "Meta description"
+    with pytest.raises(ValueError):
+        rules.ExtractionRules({"name": {"xpath": "//h1["}})
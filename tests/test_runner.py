@@ -0,0 +1,313 @@
+import json
+import threading
+
+import pytest
+
+import runner
+from crawler.dedupe import SkuSeenSet
+from crawler.distributed import run_coordinator, run_worker
+from crawler.jobqueue import JobQueue
+from crawler.session import CrawlSession
+
+CATEGORY = "https://www.bestbuy.com/site/all-laptops/pc-laptops/abcat0502000.c?id=abcat0502000"
+
+def _listing(page: int, pages: int, skus) -> str:
+    cards = "".join(
+        f'<li class="sku-item" data-sku-id="{sku}"><h4 class="sku-title"><a href="/site/item/{sku}.p?skuId={sku}">Item {sku}</a></h4>'
+        f'<div class="priceView-customer-price"><span>${sku % 900}.99</span></div></li>'
+        for sku in skus
+    )
+    pager = '<nav class="pagination"></nav>' if page < pages else ""
+    return f"<html><body><ol>{cards}</ol>{pager}</body></html>"
+
+def _pdp(sku: int, price: str = None) -> str:
+    ld = {"@type": "Product", "name": f"Item {sku}", "sku": str(sku), "offers": {"priceCurrency": "USD", "price": price or f"{sku % 900}.99"}}
+    return f'<html><head><script type="application/ld+json">{json.dumps(ld)}</script></head><body></body></html>'
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode()
+
+class FakeClient:
+    """
+    `pages` listing pages of `per_page` SKUs each; SKUs start at 1000 * N for
+    a category URL with id=cN (default N = 1). Every category's first page
+    also lists the `shared` SKUs. `prices` overrides a SKU's PDP price,
+    `delisted` SKUs drop off the listing, and `on_pdp(sku)` runs before each
+    PDP is served.
+    """
+
+    def __init__(self, pages: int = 2, per_page: int = 3, shared=()):
+        self.pages = pages
+        self.per_page = per_page
+        self.shared = list(shared)
+        self.prices = {}
+        self.delisted = set()
+        self.on_pdp = None
+        self.pdp_requests = []
+        self._lock = threading.Lock()
+
+    def skus(self, category_url: str, page: int):
+        base = 1000 * (int(category_url.rsplit("id=c", 1)[1].split("&")[0]) if "id=c" in category_url else 1)
+        skus = [base + page * 10 + i for i in range(self.per_page)] + (self.shared if page == 1 else [])
+        return [sku for sku in skus if sku not in self.delisted]
+
+    def get(self, url, **kwargs):
+        if "skuId=" in url:
+            sku = int(url.rsplit("skuId=", 1)[1])
+            with self._lock:
+                self.pdp_requests.append(sku)
+            if self.on_pdp:
+                self.on_pdp(sku)
+            return _Resp(_pdp(sku, self.prices.get(sku)))
+        page = int(url.rsplit("page=", 1)[1].split("&")[0])
+        return _Resp(_listing(page, self.pages, self.skus(url, page)))
+
+    def close(self):
+        pass
+
+def _session(settings, argv=(), client=None):
+    args = runner.build_parser().parse_args(["-s", "settings.json", *argv])
+    session = CrawlSession(dict({"delayMs": 0}, **settings), args)
+    session.client.close()
+    session.client = client or FakeClient()
+    return session
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_coordinator_and_worker_crawl_through_the_queue(tmp_path):
+    settings = {"categoryUrl": CATEGORY, "tag": "laptops", "queuePollS": 0.01}
+    queue_path = str(tmp_path / "q.sqlite")
+    output = str(tmp_path / "out.jsonl")
+    coordinator = _session(settings)
+    coordinator.seen = SkuSeenSet()
+    coordinator.seen.add("1011")  # crawled by an earlier run
+    worker = _session(settings, ["--concurrency", "2"])
+
+    worker_queue = JobQueue(queue_path)
+    done = []
+    thread = threading.Thread(target=lambda: done.append(run_worker(worker, settings, worker_queue)))
+    thread.start()
+    queue = JobQueue(queue_path)
+    assert run_coordinator(coordinator, settings, queue, output)
+    thread.join(10)
+    assert done == [True]
+
+    docs = _read(output)
+    assert [d["sku"] for d in docs] == ["1010", "1012", "1020", "1021", "1022"]
+    assert {d["category"] for d in docs} == {"laptops"}
+    assert sorted(worker.client.pdp_requests) == [1010, 1012, 1020, 1021, 1022]
+    assert "1022" in coordinator.seen
+    assert queue.counts() == {"done": 5}
+    assert queue.take_results() == []
+    for s in (coordinator, worker):
+        s.close()
+
+def test_coordinator_resume_drops_unacknowledged_output(tmp_path):
+    settings = {"categoryUrl": CATEGORY, "queuePollS": 0.01}
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    output = tmp_path / "out.jsonl"
+    queue.push(["u1", "u2"])
+    queue.mark_listing_done()
+    for url in queue.lease("w1", 2):
+        queue.complete(url, "w1", doc={"sku": url})
+    # The earlier coordinator acked u1, then wrote u2 and crashed before acking it.
+    acked = b'{"sku": "u1"}\n'
+    queue.ack_results(queue.take_results()[0][0], output_offset=len(acked))
+    output.write_bytes(acked + b'{"sku": "u2"}\n')
+
+    session = _session(settings)
+    assert run_coordinator(session, settings, queue, str(output), resume=True)
+    assert [d["sku"] for d in _read(output)] == ["u1", "u2"]
+    session.close()
+
+@pytest.mark.parametrize(
+    "argv, prepare",
+    [
+        (["--role", "coordinator"], lambda q: q.push(["u1"])),
+        (["--role", "coordinator", "-o", "out.parquet"], lambda q: None),
+        (["--role", "worker", "--state", "state.json"], lambda q: None),
+    ],
+)
+def test_main_rejects_unsafe_role_setups(tmp_path, monkeypatch, argv, prepare):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text(json.dumps({"categoryUrl": CATEGORY, "queueFile": "q.sqlite"}))
+    queue = JobQueue("q.sqlite")
+    prepare(queue)
+    queue.close()
+    with pytest.raises(SystemExit) as exc:
+        runner.main(["-s", "settings.json", *argv])
+    assert exc.value.code == 2
+
+def test_category_configs_share_the_first_entry_and_keep_per_category_keys():
+    shared, categories = runner.category_configs(
+        [
+            {"categoryUrl": "https://x/a.c?id=c1", "concurrency": 8, "tag": "a", "outputPath": "out/a.jsonl"},
+            {"categoryUrl": "https://x/b.c?id=c2", "concurrency": 1, "maxProducts": 5},
+        ]
+    )
+    assert shared["concurrency"] == 8
+    assert categories == [
+        {"categoryUrl": "https://x/a.c?id=c1", "tag": "a", "outputPath": "out/a.jsonl"},
+        {"categoryUrl": "https://x/b.c?id=c2", "maxProducts": 5},
+    ]
+    single = {"categoryUrl": "https://x/a.c?id=c1", "concurrency": 2}
+    assert runner.category_configs(single) == (single, [single])
+    assert runner.category_configs([]) == ({}, [])
+
+def test_category_output_path_uses_the_category_id():
+    assert runner.category_output_path("data/out/products.jsonl.gz", "https://x/a.c?id=abcat0502000", 0) == (
+        "data/out/products.abcat0502000.jsonl.gz"
+    )
+    assert runner.category_output_path("products.jsonl", "https://x/deals", 2) == "products.category3.jsonl"
+
+def test_batch_fetches_shared_skus_once_but_writes_them_to_every_category(tmp_path):
+    client = FakeClient(pages=1, per_page=2, shared=[5000])
+    categories = [
+        {"categoryUrl": "https://www.bestbuy.com/site/a.c?id=c1", "tag": "a"},
+        {"categoryUrl": "https://www.bestbuy.com/site/b.c?id=c2", "tag": "b"},
+    ]
+    out = tmp_path / "out" / "p.jsonl"
+    session = _session({}, ["-o", str(out)], client=client)
+    assert runner.run_batch(session, {}, categories, session.args)
+    session.close()
+
+    first, second = _read(tmp_path / "out" / "p.c1.jsonl"), _read(tmp_path / "out" / "p.c2.jsonl")
+    assert [(d["sku"], d["category"]) for d in first] == [("1010", "a"), ("1011", "a"), ("5000", "a")]
+    assert [(d["sku"], d["category"]) for d in second] == [("2010", "b"), ("2011", "b"), ("5000", "b")]
+    assert sorted(client.pdp_requests) == [1010, 1011, 2010, 2011, 5000]
+    assert not (tmp_path / "out" / "batch.checkpoint.json").exists()
+
+def test_listing_only_batch_writes_shared_skus_to_every_category(tmp_path):
+    client = FakeClient(pages=1, per_page=1, shared=[5000])
+    categories = [{"categoryUrl": f"https://www.bestbuy.com/site/a.c?id=c{n}", "tag": str(n)} for n in (1, 2)]
+    session = _session({}, ["-o", str(tmp_path / "p.jsonl"), "--listing-only"], client=client)
+    assert runner.run_batch(session, {}, categories, session.args)
+    session.close()
+    assert [d["sku"] for d in _read(tmp_path / "p.c2.jsonl")] == ["2010", "5000"]
+    assert _read(tmp_path / "p.c2.jsonl")[1]["category"] == "2"
+    assert client.pdp_requests == []
+
+def test_list_urls_prints_capped_urls_and_skips_seen_skus(tmp_path, capsys):
+    categories = [
+        {"categoryUrl": "https://www.bestbuy.com/site/a.c?id=c1"},
+        {"categoryUrl": "https://www.bestbuy.com/site/b.c?id=c2", "maxProducts": 2},
+    ]
+    args = runner.build_parser().parse_args(["-s", "settings.json", "--list-urls"])
+    session = CrawlSession({"delayMs": 0, "maxProducts": 4}, args, discovery=True)
+    session.client.close()
+    session.client = FakeClient(pages=2, per_page=3, shared=[1020])
+    session.seen = SkuSeenSet()
+    session.seen.add("1011")
+    assert runner.list_urls(session, categories) == 6
+    session.close()
+
+    urls = capsys.readouterr().out.splitlines()
+    assert [u.rsplit("skuId=", 1)[1] for u in urls] == ["1010", "1012", "1020", "1021", "2010", "2011"]
+    assert session.client.pdp_requests == []
+
+def test_importing_the_runner_defers_heavy_modules():
+    import os
+    import subprocess
+    import sys
+
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    code = (
+        "import sys, runner; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('requests', 'lxml', 'httpx', 'pyarrow', 'bs4', 'extractors')))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+def test_batch_records_one_price_run_per_category(tmp_path):
+    import sqlite3
+
+    categories = [{"categoryUrl": f"https://www.bestbuy.com/site/a.c?id=c{n}"} for n in (1, 2)]
+    db = str(tmp_path / "prices.sqlite")
+    session = _session({}, ["-o", str(tmp_path / "p.jsonl"), "--price-history", db], client=FakeClient(pages=1, per_page=2))
+    assert runner.run_batch(session, {}, categories, session.args)
+    session.close()
+
+    with sqlite3.connect(db) as conn:
+        runs = conn.execute("SELECT id, category FROM runs ORDER BY id").fetchall()
+        by_run = dict(conn.execute("SELECT run_id, GROUP_CONCAT(sku) FROM prices GROUP BY run_id").fetchall())
+    assert [category for _, category in runs] == [c["categoryUrl"] for c in categories]
+    assert sorted(by_run[runs[1][0]].split(",")) == ["2010", "2011"]
+
+    from outputs.price_history import PriceHistory
+
+    store = PriceHistory(db)
+    assert store.last_invocation_runs() == [run_id for run_id, _ in runs]
+    store.close()
+
+def _crawl(session, tmp_path, name, **kwargs):
+    output = str(tmp_path / f"{name}.jsonl")
+    session.crawl_category(CATEGORY, output, output + ".checkpoint.json", state_path=str(tmp_path / "state.json"), **kwargs)
+    return [(d["sku"], d["changeType"]) for d in _read(output)]
+
+def test_incremental_crawl_writes_new_changed_and_removed(tmp_path):
+    client = FakeClient(pages=2, per_page=2)
+    session = _session({}, client=client)
+    assert _crawl(session, tmp_path, "first") == [("1010", "new"), ("1011", "new"), ("1020", "new"), ("1021", "new")]
+    client.prices[1011] = "1.99"
+    client.delisted.add(1020)
+    assert _crawl(session, tmp_path, "second") == [("1011", "changed"), ("1020", "removed")]
+    assert _crawl(session, tmp_path, "third") == []
+    session.close()
+
+def test_state_is_saved_with_every_checkpoint(tmp_path):
+    import shutil
+
+    client = FakeClient(pages=2, per_page=3)
+    session = _session({"checkpointEvery": 2}, client=client)
+    _crawl(session, tmp_path, "first")
+    client.prices = {sku: "1.99" for sku in (1010, 1011, 1012, 1020, 1021, 1022)}
+    files = ["second.jsonl", "second.jsonl.checkpoint.json", "state.json"]
+
+    def kill(sku):
+        # What a SIGKILL leaves on disk: the files as of the last checkpoint, no finally blocks.
+        if sku == 1020:
+            for name in files:
+                shutil.copy(tmp_path / name, tmp_path / f"{name}.killed")
+            raise KeyboardInterrupt
+
+    client.on_pdp = kill
+    _crawl(session, tmp_path, "second")
+    for name in files:
+        shutil.move(tmp_path / f"{name}.killed", tmp_path / name)
+    client.on_pdp = None
+    changed = [(str(sku), "changed") for sku in (1010, 1011, 1012, 1020, 1021, 1022)]
+    assert _crawl(session, tmp_path, "second", resume=True) == changed
+    assert _crawl(session, tmp_path, "third") == []
+    session.close()
+
+def test_interrupted_crawl_resumes_from_its_checkpoint(tmp_path):
+    client = FakeClient(pages=3, per_page=3)
+    session = _session({"checkpointEvery": 2}, ["--concurrency", "2"], client=client)
+    output = str(tmp_path / "out.jsonl")
+    checkpoint = output + ".checkpoint.json"
+
+    def interrupt(sku):
+        if sku == 1021:
+            raise KeyboardInterrupt
+
+    client.on_pdp = interrupt
+    assert session.crawl_category(CATEGORY, output, checkpoint).interrupted
+    with open(checkpoint, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["page"] == 2 and saved["completed"]
+    client.on_pdp = None
+    client.pdp_requests.clear()
+    result = session.crawl_category(CATEGORY, output, checkpoint, resume=True)
+    session.close()
+
+    assert result.completed and not (tmp_path / "out.jsonl.checkpoint.json").exists()
+    skus = [1010, 1011, 1012, 1020, 1021, 1022, 1030, 1031, 1032]
+    assert [d["sku"] for d in _read(output)] == [str(sku) for sku in skus]
+    assert not set(client.pdp_requests) & {int(key) for key in saved["completed"]}
+    assert sorted(client.pdp_requests) == [sku for sku in skus if str(sku) not in saved["completed"]]
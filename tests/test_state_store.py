@@ -0,0 +1,35 @@
+from outputs.state_store import CrawlState
+
+DOC = {"sku": "1234567", "offers": {"lowPrice": "199.99"}}
+
+def test_incremental_state_classifies_changes(tmp_path):
+    path = str(tmp_path / "state.json")
+    first = CrawlState(path)
+    assert not first.html_unchanged("1234567", b"<html>v1</html>")
+    assert first.classify("1234567", DOC) == "new"
+    assert first.classify("7654321", {"sku": "7654321"}) == "new"
+    first.save()
+
+    second = CrawlState(path)
+    # Same raw page: skipped before parsing.
+    assert second.html_unchanged("1234567", b"<html>v1</html>")
+    second.save()
+
+    third = CrawlState(path)
+    assert not third.html_unchanged("1234567", b"<html>v2 with new tracking id</html>")
+    assert third.classify("1234567", DOC) is None
+    assert third.classify("1234567", {"sku": "1234567", "offers": {"lowPrice": "179.99"}}) == "changed"
+    assert third.removed() == []
+
+def test_capped_run_carries_unvisited_skus_forward(tmp_path):
+    path = str(tmp_path / "state.json")
+    first = CrawlState(path)
+    first.classify("1", {"sku": "1"})
+    first.classify("2", {"sku": "2"})
+    first.save()
+
+    second = CrawlState(path)
+    second.classify("1", {"sku": "1"})
+    assert second.removed() == ["2"]
+    second.save(carry_forward=True)
+    assert set(CrawlState(path).previous) == {"1", "2"}
@@ -0,0 +1,45 @@
+import time
+
+from crawler.proxy_pool import ProxyPool
+from crawler.rate_limiter import TokenBucket
+from crawler.throttle import AdaptiveThrottle, parse_retry_after
+
+def test_aimd_halves_on_blocks_and_recovers_additively():
+    limiter = TokenBucket(rate=10.0)
+    throttle = AdaptiveThrottle(limiter, decrease_interval_s=0)
+    throttle.on_block()
+    throttle.on_block()
+    assert limiter.rate == 2.5
+    for _ in range(5):
+        throttle.on_success()
+    assert abs(limiter.rate - 3.5) < 1e-9
+    for _ in range(100):
+        throttle.on_success()
+    assert limiter.rate == 10.0
+    stats = throttle.stats()
+    assert stats["blocksPerMin"] == 2 and stats["requests"] == 107
+
+def test_block_burst_counts_as_one_congestion_event():
+    limiter = TokenBucket(rate=10.0)
+    throttle = AdaptiveThrottle(limiter, decrease_interval_s=60)
+    for _ in range(5):
+        throttle.on_block()
+    assert limiter.rate == 5.0
+
+def test_retry_after_pauses_the_shared_bucket():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    limiter = TokenBucket(rate=100.0)
+    AdaptiveThrottle(limiter).on_block(retry_after=0.1)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_unhealthy_proxy_is_benched():
+    pool = ProxyPool(["http://a:1", "http://b:1"], eject_after=100, min_health=0.5, cooldown_s=60)
+    a = pool.proxies[0]
+    for _ in range(7):
+        pool.report(a, error=True)
+    assert a.health == 0.5
+    assert all(pool.acquire() is not a for _ in range(4))
@@ -0,0 +1,25 @@
+import random
+import time
+
+from crawler.rate_limiter import TokenBucket
+from crawler.workers import ordered_map
+
+def test_ordered_map_preserves_input_order():
+    def slow_square(x):
+        time.sleep(random.uniform(0, 0.01))
+        if x == 3:
+            raise ValueError("boom")
+        return x * x
+
+    out = list(ordered_map(slow_square, range(8), concurrency=4))
+    assert [item for item, _, _ in out] == list(range(8))
+    assert out[2][1] == 4
+    assert isinstance(out[3][2], ValueError)
+
+def test_token_bucket_enforces_rate():
+    bucket = TokenBucket(rate=50.0)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # First token is free (burst of 1), the remaining five wait 20ms each.
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import pytest
+
+from outputs.checkpoint import BatchCheckpoint, Checkpoint
+from outputs.writer_jsonl import JsonlWriter
+
+def test_resume_truncates_partial_lines_and_appends(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    writer = JsonlWriter(path)
+    writer.write({"sku": "1"})
+    offset = writer.tell()
+    writer.write({"sku": "2"})
+    writer.flush()
+    writer.fh.write(b'{"sku": "3", "na')  # crash mid-line
+    writer.close()
+
+    writer = JsonlWriter(path, append=True, truncate_at=offset)
+    writer.write({"sku": "2"})
+    writer.close()
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["sku"] for line in f] == ["1", "2"]
+
+def test_checkpoint_round_trip_and_crawl_mismatch(tmp_path):
+    path = str(tmp_path / "out.jsonl.checkpoint.json")
+    Checkpoint(path, "https://cat", "out.jsonl").save(page=3, offset=120, scraped=2, completed=["1", "2"])
+    ckpt = Checkpoint.load(path, "https://cat", "out.jsonl")
+    assert (ckpt.page, ckpt.offset, ckpt.scraped, ckpt.completed) == (3, 120, 2, {"1", "2"})
+    with pytest.raises(ValueError):
+        Checkpoint.load(path, "https://other-cat", "out.jsonl")
+
+def test_batch_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "batch.checkpoint.json")
+    batch = BatchCheckpoint(path)
+    batch.done.add("https://cat-a")
+    batch.seen = {"version": 1, "kind": "exact", "ints": [1, 2]}
+    batch.save()
+    loaded = BatchCheckpoint.load(path)
+    assert (loaded.done, loaded.seen) == ({"https://cat-a"}, batch.seen)
+    loaded.remove()
+    assert not (tmp_path / "batch.checkpoint.json").exists()
+
+def test_batched_gzip_output_round_trips(tmp_path):
+    path = str(tmp_path / "out.jsonl.gz")
+    writer = JsonlWriter(path, flush_every=3, encoder="json")
+    for i in range(7):
+        writer.write({"sku": str(i), "name": "Télé"})
+    assert len(writer._pending) == 1
+    writer.close()
+    writer = JsonlWriter(path, append=True)
+    writer.write({"sku": "7"})
+    writer.close()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [r["sku"] for r in rows] == [str(i) for i in range(8)]
+    assert rows[0]["name"] == "Télé"
+    assert not writer.resumable
+
+def test_default_encoder_is_the_stdlib_one(tmp_path):
+    path = tmp_path / "out.jsonl"
+    record = {"sku": "1", "name": "Télé  ", "rating": float("nan"), "offers": [1, 2]}
+    writer = JsonlWriter(str(path))
+    writer.write(record)
+    writer.close()
+    assert path.read_bytes() == json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+    with pytest.raises(ValueError):
+        JsonlWriter(str(path), encoder="auto")
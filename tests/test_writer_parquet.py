@@ -0,0 +1,66 @@
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from outputs.dataset_adapter import open_writer, output_format_for
+from outputs.writer_parquet import ParquetWriter
+
+def _doc(sku):
+    return {
+        "name": f"Phone {sku}",
+        "sku": sku,
+        "brand": {"name": "Acme"},
+        "offers": {
+            "priceCurrency": "USD",
+            "lowPrice": "199.99",
+            "highPrice": "249.99",
+            "offercount": 2,
+            "offers": [
+                {"priceCurrency": "USD", "price": "199.99", "itemCondition": "NewCondition"},
+                {"priceCurrency": "USD", "price": "249.99", "offers": [{"price": "229.99"}]},
+            ],
+        },
+        "images": ["https://img/1.jpg"],
+    }
+
+def test_parquet_writer_streams_row_groups(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    writer = ParquetWriter(path, row_group_size=2)
+    for i in range(5):
+        writer.write(_doc(str(i)))
+    writer.write({"sku": "9", "changeType": "removed", "category": "phones"})
+    writer.close()
+
+    f = pq.ParquetFile(path)
+    assert f.metadata.num_row_groups == 3
+    rows = f.read().to_pylist()
+    assert [r["sku"] for r in rows] == ["0", "1", "2", "3", "4", "9"]
+    assert rows[0]["offers"]["offers"][1]["offers"][0]["price"] == "229.99"
+    assert rows[-1]["changeType"] == "removed" and rows[-1]["offers"] is None
+    assert rows[-1]["category"] == "phones" and rows[0]["category"] is None
+
+def test_open_writer_picks_format(tmp_path):
+    assert output_format_for("x.parquet") == "parquet"
+    assert output_format_for("x.jsonl.gz") == "jsonl"
+    assert output_format_for("x.out", "parquet") == "parquet"
+    writer = open_writer(str(tmp_path / "a" / "x.out"), "parquet")
+    assert isinstance(writer, ParquetWriter) and not writer.resumable
+    writer.close()
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / "x.parquet"), append=True)
+
+def test_parquet_writer_coerces_or_skips_records_off_schema(tmp_path, caplog):
+    path = str(tmp_path / "out.parquet")
+    writer = ParquetWriter(path)
+    image = ["https://img/a.jpg", "https://img/b.jpg"]
+    writer.write(dict(_doc("1"), sku=6452968, image=image, images=[image], extra="dropped"))
+    writer.write(dict(_doc("2"), name={"text": "not a string"}))
+    writer.write(dict(_doc("3"), offers=dict(_doc("3")["offers"], offercount="2", lowPrice=199.99)))
+    writer.close()
+
+    rows = pq.read_table(path).to_pylist()
+    assert [r["sku"] for r in rows] == ["6452968", "3"]
+    assert rows[0]["image"] == "https://img/a.jpg"
+    assert rows[0]["images"] == image
+    assert rows[1]["offers"]["offercount"] == 2 and rows[1]["offers"]["lowPrice"] == "199.99"
+    assert "Skipping record 2" in caplog.text